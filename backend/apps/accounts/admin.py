@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User, Group
-from .models import UserProfile
+from .models import RevokedToken, UserProfile
 
 
 # Customize User admin to respect permissions
@@ -86,6 +86,13 @@ class UserProfileAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ['jti', 'expires_at']
+    search_fields = ['jti']
+    readonly_fields = ['jti', 'expires_at']
+
+
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
 
@@ -0,0 +1,27 @@
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .tokens import user_from_token
+
+
+class DigestJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the permission digest embedded in the
+    access token while it is current, and falls back to loading the user from
+    the database otherwise (old tokens, or a bumped permission stamp).
+    """
+
+    def authenticate(self, request):
+        try:
+            return super().authenticate(request)
+        except AuthenticationFailed:
+            # InvalidToken is a subclass
+            from apps.core.metrics import record_auth_failure
+            record_auth_failure('invalid_token')
+            raise
+
+    def get_user(self, validated_token):
+        user = user_from_token(validated_token)
+        if user is None:
+            return super().get_user(validated_token)
+        return user
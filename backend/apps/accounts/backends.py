@@ -0,0 +1,20 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .permission_cache import all_permissions, user_permissions
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    ModelBackend whose permission checks read the compiled, cross-request
+    permission cache instead of querying groups and permissions per request.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            if user_obj.is_superuser:
+                user_obj._perm_cache = all_permissions()
+            else:
+                user_obj._perm_cache = user_permissions(user_obj)
+        return user_obj._perm_cache
@@ -0,0 +1,16 @@
+from django.core.checks import Tags, Warning, register
+
+from .permission_cache import stamps_are_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_permission_stamps(app_configs, **kwargs):
+    if stamps_are_shared():
+        return []
+    return [Warning(
+        'The default cache is local to each process, so permission changes made '
+        'in one worker are not seen by the others.',
+        hint="Access tokens are checked against the database on every request "
+             "until CACHES['default'] points at a shared backend such as Redis.",
+        id='accounts.W001',
+    )]
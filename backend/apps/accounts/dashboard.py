@@ -0,0 +1,104 @@
+"""Staff dashboard payload.
+
+All totals are read with one statement of scalar ``COUNT(*)`` subqueries and
+the recent-item lists with their relations joined or prefetched. The finished
+payload is cached under a version stamp that is bumped after any write to the
+models it shows (see ``signals.py``), so staff logins are served from cache
+until something actually changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Prefetch
+
+
+VERSION_KEY = 'accounts:dashboard:version'
+DEFAULT_TIMEOUT = 60 * 15
+
+
+def dashboard_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def bump_dashboard_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def count_rows(*models):
+    """Row counts of ``models`` in a single query"""
+    tables = [connection.ops.quote_name(model._meta.db_table) for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(f"(SELECT COUNT(*) FROM {table})" for table in tables))
+        return cursor.fetchone()
+
+
+def compute_dashboard_stats():
+    from apps.members.models import Member, Family, FamilyMember
+    from apps.members.serializers import MemberSerializer
+    from apps.structure.models import Zone, ServiceDivision
+    from apps.content.models import HeroSection
+    from apps.content.serializers import HeroSectionSerializer
+
+    members, families, zones, service_divisions, hero_sections = count_rows(
+        Member, Family, Zone, ServiceDivision, HeroSection
+    )
+
+    recent_members = (
+        Member.objects.select_related('zone', 'service_division')
+        .order_by('-created_at')[:5]
+    )
+    recent_families = (
+        Family.objects.select_related('head_member')
+        .prefetch_related(Prefetch(
+            'family_members', queryset=FamilyMember.objects.select_related('member')
+        ))
+        .order_by('-created_at')[:5]
+    )
+    upcoming_heros = HeroSection.objects.filter(
+        start_date__isnull=False
+    ).order_by('start_date')[:3]
+
+    return {
+        'members': {
+            'total': members,
+            'recent': MemberSerializer(recent_members, many=True).data,
+        },
+        'families': {
+            'total': families,
+            'recent': [
+                {
+                    'id': family.id,
+                    'display_name': family.display_name,
+                    'created_at': family.created_at,
+                }
+                for family in recent_families
+            ],
+        },
+        'zones': {
+            'total': zones,
+        },
+        'service_divisions': {
+            'total': service_divisions,
+        },
+        'hero_sections': {
+            'total': hero_sections,
+            'upcoming': HeroSectionSerializer(upcoming_heros, many=True).data,
+        },
+    }
+
+
+def cached_dashboard_stats():
+    """Cached dashboard payload"""
+    key = f"accounts:dashboard:{dashboard_version()}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(key, stats, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return stats
@@ -0,0 +1,61 @@
+"""Effective-permission matrix: users x permissions.
+
+For a page of users, group and direct grants, role memberships and leadership
+scopes are each read with one set-based query. Each user's effective
+permissions are encoded as a bitset over the sorted permission catalogue (the
+same encoding access tokens use), so a page is a few bytes per user whatever
+the number of permissions.
+"""
+from collections import defaultdict
+
+from django.contrib.auth.models import Permission, User
+
+from .permission_cache import permission_catalogue
+from .scopes import leadership_scopes
+from .tokens import encode_permissions
+
+
+def permission_matrix(users):
+    """Rows for ``users`` (User instances) and the catalogue they index into"""
+    codes, fingerprint = permission_catalogue()
+    known = set(codes)
+    user_ids = [user.pk for user in users]
+
+    granted = defaultdict(set)
+    via_groups = Permission.objects.filter(group__user__in=user_ids).values_list(
+        'group__user', 'content_type__app_label', 'codename'
+    )
+    direct = Permission.objects.filter(user__in=user_ids).values_list(
+        'user', 'content_type__app_label', 'codename'
+    )
+    for rows in (via_groups, direct):
+        for user_id, app_label, codename in rows:
+            granted[user_id].add(f"{app_label}.{codename}")
+
+    groups = defaultdict(list)
+    memberships = User.groups.through.objects.filter(user__in=user_ids).order_by('group_id')
+    for user_id, group_id in memberships.values_list('user_id', 'group_id'):
+        groups[user_id].append(group_id)
+
+    scopes = leadership_scopes(user_ids)
+
+    rows = []
+    for user in users:
+        # Django grants active superusers every permission, inactive users none
+        if not user.is_active:
+            effective = set()
+        elif user.is_superuser:
+            effective = known
+        else:
+            effective = granted[user.pk] & known
+        rows.append({
+            'id': user.pk,
+            'username': user.username,
+            'is_active': user.is_active,
+            'is_superuser': user.is_superuser,
+            'groups': groups[user.pk],
+            'permissions': encode_permissions(effective, codes),
+            'scope': scopes[user.pk],
+        })
+    return rows, codes, fingerprint
+
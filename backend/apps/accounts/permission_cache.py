@@ -0,0 +1,181 @@
+"""Compiled, cached permission sets.
+
+A user's effective ``app_label.codename`` set (group plus direct permissions)
+is read with a single query and cached across requests. Cache keys embed two
+version stamps: a global one, bumped when any group's permissions change, and
+a per-user one, bumped when that user's groups or direct permissions change
+(see ``signals.py``). Stale entries are never read, only left to expire.
+
+Versions are random, never counters: a version key that is evicted or lost
+with a cache restart comes back as a new value, so tokens and cache entries
+stamped before are stale, rather than current again with a recycled number.
+
+A bump is only seen by the workers that read the same cache. With a
+process-local backend (LocMemCache, DummyCache) other workers keep their own
+stamps, so ``stamps_are_shared`` is False and token digests are never
+trusted; cached permission sets are still served, for at most
+``PERMISSION_CACHE_TIMEOUT`` seconds after a missed bump.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Q
+
+
+GLOBAL_VERSION_KEY = 'accounts:perms:version'
+DEFAULT_TIMEOUT = 300
+CATALOGUE_TIMEOUT = 60 * 60 * 24
+
+
+def _timeout():
+    return getattr(settings, 'PERMISSION_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def stamps_are_shared():
+    """Whether every worker reads the version stamps written by this one"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _user_version_key(user_id):
+    return f"accounts:perms:user:{user_id}:version"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def _bump(key):
+    cache.set(key, _new_version(), None)
+
+
+def _version(key):
+    """The version stored at ``key``, starting a new one if it is missing"""
+    version = cache.get(key)
+    if version is None:
+        # add() keeps whichever value a concurrent request stored first
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_global_version():
+    _bump(GLOBAL_VERSION_KEY)
+
+
+def bump_user_version(user_id):
+    _bump(_user_version_key(user_id))
+
+
+def _versions(user_id):
+    keys = [GLOBAL_VERSION_KEY, _user_version_key(user_id)]
+    found = cache.get_many(keys)
+    return tuple(found[key] if key in found else _version(key) for key in keys)
+
+
+def permission_stamp(user_id):
+    """Opaque stamp that changes whenever the user's permissions may have"""
+    global_version, user_version = _versions(user_id)
+    return f"{global_version}.{user_version}"
+
+
+def _as_codes(rows):
+    return frozenset(f"{app_label}.{codename}" for app_label, codename in rows)
+
+
+def compile_permissions(user):
+    """Group and direct permissions of ``user`` in one query"""
+    rows = (
+        Permission.objects
+        .filter(Q(group__user=user) | Q(user=user))
+        .values_list('content_type__app_label', 'codename')
+        .distinct()
+    )
+    return _as_codes(rows)
+
+
+def user_permissions(user):
+    """Cached ``app_label.codename`` set granted to ``user`` via groups or directly"""
+    if not user.is_authenticated:
+        return frozenset()
+    global_version, user_version = _versions(user.pk)
+    key = f"accounts:perms:user:{user.pk}:{global_version}:{user_version}"
+    perms = cache.get(key)
+    if perms is None:
+        perms = compile_permissions(user)
+        cache.set(key, perms, _timeout())
+    return perms
+
+
+def all_permissions():
+    """Cached set of every permission in the system (what superusers hold)"""
+    global_version = _version(GLOBAL_VERSION_KEY)
+    key = f"accounts:perms:all:{global_version}"
+    perms = cache.get(key)
+    if perms is None:
+        perms = _as_codes(Permission.objects.values_list('content_type__app_label', 'codename'))
+        cache.set(key, perms, _timeout())
+    return perms
+
+
+def permission_catalogue():
+    """
+    Every permission code in a stable order, plus a short fingerprint of that
+    order, so that positions can be used as bit indexes across processes.
+    """
+    global_version = _version(GLOBAL_VERSION_KEY)
+    key = f"accounts:perms:catalogue:{global_version}"
+    catalogue = cache.get(key)
+    if catalogue is None:
+        codes = tuple(sorted(all_permissions()))
+        fingerprint = hashlib.sha1('\n'.join(codes).encode()).hexdigest()[:12]
+        catalogue = (codes, fingerprint)
+        cache.set(key, catalogue, _timeout())
+    return catalogue
+
+
+def available_permissions():
+    """
+    The role editor's permission catalogue, ``({'grouped', 'flat'}, etag)``.
+
+    Built in one pass over the permission table and cached under the global
+    version, which is bumped when permissions change and after migrations.
+    """
+    global_version = _version(GLOBAL_VERSION_KEY)
+    key = f"accounts:perms:available:{global_version}"
+    cached = cache.get(key)
+    if cached is None:
+        grouped = {}
+        flat = []
+        for perm in Permission.objects.select_related('content_type'):
+            app_label = perm.content_type.app_label
+            model_name = perm.content_type.model
+            group = grouped.setdefault(f"{app_label}.{model_name}", {
+                'app_label': app_label,
+                'model_name': model_name,
+                'permissions': []
+            })
+            group['permissions'].append({
+                'id': perm.id,
+                'name': perm.name,
+                'codename': perm.codename,
+                'full_codename': f"{app_label}.{perm.codename}"
+            })
+            flat.append({
+                'id': perm.id,
+                'name': perm.name,
+                'codename': perm.codename,
+                'content_type': perm.content_type_id,
+                'content_type_name': app_label,
+                'model_name': model_name,
+            })
+        payload = {'grouped': grouped, 'flat': flat}
+        etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        cached = (payload, etag)
+        cache.set(key, cached, CATALOGUE_TIMEOUT)
+    return cached
@@ -0,0 +1,134 @@
+"""Bulk provisioning of user accounts for existing members.
+
+Each row is validated up front and reported individually. Passwords of the
+valid rows are hashed once each, concurrently, outside any transaction; the
+users, their profiles, the member links and the group memberships are then
+written with one statement each.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from apps.members.models import Member
+from .models import UserProfile
+
+
+DEFAULT_HASH_WORKERS = 4
+
+
+class ProvisioningError(Exception):
+    pass
+
+
+def hash_passwords(passwords):
+    """
+    Hash ``passwords`` concurrently. The PBKDF2 hasher spends its time in
+    hashlib, which releases the GIL, so threads use separate cores.
+    """
+    workers = getattr(settings, 'PASSWORD_HASH_WORKERS', DEFAULT_HASH_WORKERS)
+    if len(passwords) < 2 or workers < 2:
+        return [make_password(password) for password in passwords]
+    with ThreadPoolExecutor(max_workers=min(workers, len(passwords))) as pool:
+        return list(pool.map(make_password, passwords))
+
+
+def validate_rows(rows):
+    """Split ``rows`` into ``(valid, errors)``; valid rows gain their ``member``"""
+    member_ids = [row['member_id'] for row in rows]
+    usernames = [row['username'] for row in rows]
+    members = Member.objects.in_bulk(member_ids)
+    taken = set(
+        User.objects.filter(username__in=usernames).values_list('username', flat=True)
+    )
+
+    valid, errors = [], []
+    seen_members, seen_usernames = set(), set()
+    for index, row in enumerate(rows):
+        member = members.get(row['member_id'])
+        problem = None
+        if member is None:
+            problem = 'Member not found'
+        elif member.user_id is not None:
+            problem = f"Member {member.full_name} already has a user account"
+        elif row['member_id'] in seen_members:
+            problem = 'Member listed more than once'
+        elif row['username'] in taken or row['username'] in seen_usernames:
+            problem = f"Username {row['username']} is already taken"
+        else:
+            try:
+                validate_password(row['password'], User(
+                    username=row['username'],
+                    first_name=member.first_name,
+                    last_name=member.last_name,
+                    email=member.email or '',
+                ))
+            except ValidationError as e:
+                problem = ' '.join(e.messages)
+
+        if problem:
+            errors.append({'index': index, 'member_id': row['member_id'], 'error': problem})
+            continue
+        seen_members.add(row['member_id'])
+        seen_usernames.add(row['username'])
+        valid.append({**row, 'member': member})
+    return valid, errors
+
+
+def provision_accounts(rows, groups=()):
+    """
+    Create an account for each ``{'member_id', 'username', 'password'}`` row
+    and add it to ``groups``. Returns ``(users, errors)``; invalid rows are
+    skipped and reported, valid ones are created together or not at all.
+    """
+    from .dashboard import bump_dashboard_version
+    valid, errors = validate_rows(rows)
+    if not valid:
+        return [], errors
+
+    hashes = hash_passwords([row['password'] for row in valid])
+    users = [
+        User(
+            username=row['username'],
+            first_name=row['member'].first_name,
+            last_name=row['member'].last_name,
+            email=row['member'].email or '',
+            password=hashed,
+            is_staff=False,
+            is_active=True,
+        )
+        for row, hashed in zip(valid, hashes)
+    ]
+
+    try:
+        with transaction.atomic():
+            # Lock the members so a concurrent request cannot link them first
+            locked = Member.objects.select_for_update().in_bulk([row['member_id'] for row in valid])
+            if any(locked[row['member_id']].user_id is not None for row in valid):
+                raise ProvisioningError('Some members were linked to a user by another request')
+
+            User.objects.bulk_create(users)
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, father_name=row['member'].father_name or '')
+                for row, user in zip(valid, users)
+            ])
+            members = []
+            for row, user in zip(valid, users):
+                member = locked[row['member_id']]
+                member.user = user
+                members.append(member)
+            Member.objects.bulk_update(members, ['user'])
+            Membership = User.groups.through
+            Membership.objects.bulk_create([
+                Membership(user_id=user.pk, group_id=group.pk)
+                for user in users for group in groups
+            ])
+            # bulk writes send no signals; the dashboard lists member links
+            transaction.on_commit(bump_dashboard_version)
+    except IntegrityError:
+        raise ProvisioningError('A username was taken by another request; nothing was created')
+    return users, errors
@@ -0,0 +1,109 @@
+"""Refresh-token revocation store.
+
+Revoked ``jti`` values live in the indexed ``RevokedToken`` table until the
+token would have expired anyway (``prune_revoked_tokens`` removes them after
+that). Revoking doubles as the check: the unique insert fails for a token that
+was already revoked, so a rotation costs one indexed write and no lookup.
+Replays of recently revoked tokens are rejected from an in-process LRU without
+touching the database.
+
+``is_revoked`` also remembers tokens it found valid, for
+TOKEN_REVOCATION_NEGATIVE_TTL seconds at most and never past their expiry, so
+a token checked repeatedly costs one query per interval. A revocation made in
+this process clears the entry at once; one made by another worker is seen
+when it expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+
+DEFAULT_LRU_SIZE = 10000
+DEFAULT_NEGATIVE_TTL = 5
+
+# Revoked jtis, and valid jtis with the time until which they are trusted
+_recent = OrderedDict()
+_valid = OrderedDict()
+_lock = threading.Lock()
+
+
+def _lru_size():
+    return getattr(settings, 'TOKEN_REVOCATION_LRU_SIZE', DEFAULT_LRU_SIZE)
+
+
+def _negative_ttl():
+    return getattr(settings, 'TOKEN_REVOCATION_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)
+
+
+def _store(lru, jti, value):
+    # Caller holds _lock
+    lru[jti] = value
+    lru.move_to_end(jti)
+    while len(lru) > _lru_size():
+        lru.popitem(last=False)
+
+
+def _remember(jti):
+    with _lock:
+        _valid.pop(jti, None)
+        _store(_recent, jti, True)
+
+
+def _remember_valid(jti, until):
+    with _lock:
+        if jti not in _recent:
+            _store(_valid, jti, until)
+
+
+def recently_revoked(jti):
+    with _lock:
+        if jti in _recent:
+            _recent.move_to_end(jti)
+            return True
+    return False
+
+
+def recently_valid(jti, now):
+    with _lock:
+        until = _valid.get(jti)
+        if until is None:
+            return False
+        if until <= now:
+            del _valid[jti]
+            return False
+        return True
+
+
+def revoke(token):
+    """Revoke a refresh token; returns False if it had already been revoked"""
+    from .models import RevokedToken
+    jti = token['jti']
+    if recently_revoked(jti):
+        return False
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=datetime_from_epoch(token['exp']))
+    except IntegrityError:
+        _remember(jti)
+        return False
+    _remember(jti)
+    return True
+
+
+def is_revoked(token):
+    from .models import RevokedToken
+    jti = token['jti']
+    if recently_revoked(jti):
+        return True
+    now = time.time()
+    if recently_valid(jti, now):
+        return False
+    if RevokedToken.objects.filter(jti=jti).exists():
+        _remember(jti)
+        return True
+    _remember_valid(jti, min(now + _negative_ttl(), token['exp']))
+    return False
@@ -0,0 +1,39 @@
+"""Leadership scope of a user: their member record and the zones and service
+divisions they lead. Read from the access token when it carries one (see
+``tokens.py``), otherwise with a single query, and memoized on the user."""
+
+
+def empty_scope():
+    return {'member': None, 'zones': [], 'services': []}
+
+
+def leadership_scopes(user_ids):
+    """``{user_id: scope}`` for many users in one query"""
+    from apps.members.models import Member
+    rows = Member.objects.filter(user__in=user_ids).values_list(
+        'user_id', 'id', 'zone_leaderships__zone_id', 'service_leaderships__service_division_id'
+    )
+    scopes = {user_id: empty_scope() for user_id in user_ids}
+    for user_id, member_id, zone_id, service_id in rows:
+        scope = scopes[user_id]
+        scope['member'] = member_id
+        if zone_id is not None and zone_id not in scope['zones']:
+            scope['zones'].append(zone_id)
+        if service_id is not None and service_id not in scope['services']:
+            scope['services'].append(service_id)
+    for scope in scopes.values():
+        scope['zones'].sort()
+        scope['services'].sort()
+    return scopes
+
+
+def compute_leadership_scope(user):
+    return leadership_scopes([user.pk])[user.pk]
+
+
+def leadership_scope(user):
+    if not user.is_authenticated:
+        return empty_scope()
+    if not hasattr(user, '_leadership_scope'):
+        user._leadership_scope = compute_leadership_scope(user)
+    return user._leadership_scope
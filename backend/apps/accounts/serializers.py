@@ -31,6 +31,8 @@ class GroupSerializer(serializers.ModelSerializer):
     
     def get_user_count(self, obj):
         """Get the number of users in this group"""
+        if hasattr(obj, 'user_count'):
+            return obj.user_count
         return obj.user_set.count()
 
 
@@ -45,10 +47,14 @@ class GroupListSerializer(serializers.ModelSerializer):
     
     def get_permission_count(self, obj):
         """Get the number of permissions in this group"""
+        if hasattr(obj, 'permission_count'):
+            return obj.permission_count
         return obj.permissions.count()
     
     def get_user_count(self, obj):
         """Get the number of users in this group"""
+        if hasattr(obj, 'user_count'):
+            return obj.user_count
         return obj.user_set.count()
 
 
@@ -241,9 +247,30 @@ class UserListSerializer(serializers.ModelSerializer):
     
     def get_groups_count(self, obj):
         """Get the number of groups this user belongs to"""
-        return obj.groups.count()
+        # len() of the prefetched rows rather than a COUNT per user
+        return len(obj.groups.all())
     
     def get_groups_names(self, obj):
         """Get the names of groups this user belongs to"""
         return [group.name for group in obj.groups.all()]
 
+
+
+class ProvisionAccountSerializer(serializers.Serializer):
+    """One account to create for an existing member"""
+    member_id = serializers.IntegerField()
+    username = serializers.CharField(
+        max_length=150,
+        validators=User._meta.get_field('username').validators
+    )
+    password = serializers.CharField(write_only=True)
+
+
+class BulkProvisionSerializer(serializers.Serializer):
+    """Accounts to create for members, all added to the same roles"""
+    accounts = ProvisionAccountSerializer(many=True, allow_empty=False)
+    groups = serializers.PrimaryKeyRelatedField(
+        many=True,
+        queryset=Group.objects.all(),
+        required=False
+    )
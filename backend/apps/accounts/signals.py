@@ -0,0 +1,117 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.content.models import HeroSection
+from apps.members.models import Family, FamilyMember, Member
+from apps.structure.models import ServiceDivision, ServiceLeader, Zone, ZoneLeader
+from .dashboard import bump_dashboard_version
+from .permission_cache import bump_global_version, bump_user_version
+
+
+def _bump_users(instance, model, pk_set, action):
+    """Bump the users on either side of a User m2m change"""
+    if isinstance(instance, User):
+        bump_user_version(instance.pk)
+    elif action == 'post_clear' or not pk_set:
+        # Reverse side cleared (e.g. group.user_set.clear()): users unknown
+        bump_global_version()
+    else:
+        for user_id in pk_set:
+            bump_user_version(user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, model, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _bump_users(instance, model, pk_set, action)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, model, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _bump_users(instance, model, pk_set, action)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_global_version()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def permission_catalogue_changed(sender, **kwargs):
+    bump_global_version()
+
+
+@receiver(post_migrate)
+def permissions_migrated(sender, **kwargs):
+    # Migrations create permissions with bulk_create, which sends no post_save
+    bump_global_version()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Staff/superuser/active flags are part of the token digest
+    bump_user_version(instance.pk)
+
+
+def _bump_member_users(member_ids):
+    user_ids = Member.objects.filter(pk__in=member_ids, user__isnull=False).values_list('user_id', flat=True)
+    for user_id in user_ids:
+        bump_user_version(user_id)
+
+
+@receiver(pre_save, sender=Member)
+def member_relinking(sender, instance, **kwargs):
+    # The previous user loses this member's scope when the link moves
+    if instance.pk:
+        previous = Member.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+        if previous and previous != instance.user_id:
+            bump_user_version(previous)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def member_changed(sender, instance, **kwargs):
+    if instance.user_id:
+        bump_user_version(instance.user_id)
+
+
+@receiver(pre_save, sender=ZoneLeader)
+@receiver(pre_save, sender=ServiceLeader)
+def leader_reassigning(sender, instance, **kwargs):
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list('member_id', flat=True).first()
+        if previous and previous != instance.member_id:
+            _bump_member_users([previous])
+
+
+@receiver(post_save, sender=ZoneLeader)
+@receiver(post_save, sender=ServiceLeader)
+@receiver(post_delete, sender=ZoneLeader)
+@receiver(post_delete, sender=ServiceLeader)
+def leader_changed(sender, instance, **kwargs):
+    _bump_member_users([instance.member_id])
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+@receiver(post_save, sender=Family)
+@receiver(post_delete, sender=Family)
+@receiver(post_save, sender=FamilyMember)
+@receiver(post_delete, sender=FamilyMember)
+@receiver(post_save, sender=Zone)
+@receiver(post_delete, sender=Zone)
+@receiver(post_save, sender=ServiceDivision)
+@receiver(post_delete, sender=ServiceDivision)
+@receiver(post_save, sender=HeroSection)
+@receiver(post_delete, sender=HeroSection)
+def dashboard_data_changed(sender, **kwargs):
+    # After commit, so a concurrent dashboard load cannot cache the old rows
+    # under the new version
+    transaction.on_commit(bump_dashboard_version)
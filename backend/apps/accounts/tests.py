@@ -1,3 +1,598 @@
-from django.test import TestCase
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import hashers
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.members.models import Member
+from apps.structure.models import ServiceDivision, ServiceLeader, Zone, ZoneLeader
+from . import dashboard, provisioning, revocation
+from .permission_cache import (
+    GLOBAL_VERSION_KEY, _user_version_key, permission_stamp, user_permissions,
+)
+from .scopes import leadership_scopes
+from .throttling import TokenRefreshThrottle
+from .tokens import decode_permissions, user_from_token
+from .views import CustomTokenObtainPairSerializer
+
+
+def file_caches(*aliases, location):
+    """Cache aliases on one directory: separate workers sharing a cache"""
+    backend = 'django.core.cache.backends.filebased.FileBasedCache'
+    return {alias: {'BACKEND': backend, 'LOCATION': location} for alias in aliases}
+
+
+class PermissionDigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_root = tempfile.TemporaryDirectory()
+        cls.shared = override_settings(
+            CACHES=file_caches('default', 'other_worker', location=cls.cache_root.name)
+        )
+        cls.shared.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.shared.disable()
+        cls.cache_root.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name='Readers')
+        self.group.permissions.add(Permission.objects.get(
+            content_type__app_label='members', codename='view_member'
+        ))
+        self.user = User.objects.create_user('reader', password='secret')
+        self.user.groups.add(self.group)
+        self.token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def get_members(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        return client.get('/api/members/')
+
+    def test_current_token_carries_permissions(self):
+        user = user_from_token(self.token)
+        self.assertIsNotNone(user)
+        self.assertTrue(user.has_perm('members.view_member'))
+        self.assertEqual(self.get_members().status_code, 200)
+
+    def test_revoked_permission_rejects_token(self):
+        self.user.groups.remove(self.group)
+        self.assertIsNone(user_from_token(self.token))
+        self.assertEqual(self.get_members().status_code, 403)
+
+    def test_evicted_stamp_keeps_revoked_token_stale(self):
+        # Minted on a fresh cache, then revoked, then the stamp is evicted
+        cache.clear()
+        self.token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.user.groups.remove(self.group)
+        cache.delete_many([GLOBAL_VERSION_KEY, _user_version_key(self.user.pk)])
+        self.assertIsNone(user_from_token(self.token))
+        self.assertEqual(self.get_members().status_code, 403)
+
+    def test_cache_restart_makes_tokens_stale(self):
+        cache.clear()
+        self.assertIsNone(user_from_token(self.token))
+        # The database path still authenticates with the current permissions
+        self.assertEqual(self.get_members().status_code, 200)
+
+    def test_missing_stamp_is_not_reused(self):
+        stamp = permission_stamp(self.user.pk)
+        cache.clear()
+        self.assertNotEqual(permission_stamp(self.user.pk), stamp)
+
+    def test_bump_in_one_worker_is_seen_by_another(self):
+        # This worker revokes; the other validates the token through its own client
+        self.user.groups.remove(self.group)
+        with mock.patch('apps.accounts.permission_cache.cache', caches['other_worker']):
+            self.assertIsNone(user_from_token(self.token))
+
+    def test_process_local_cache_is_never_trusted(self):
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES={'default': local}):
+            token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+            self.assertIsNone(user_from_token(token))
+            # Deactivation in another worker is seen through the database path
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            self.token = token
+            self.assertEqual(self.get_members().status_code, 401)
+
+
+def permission(codename, app_label='members'):
+    return Permission.objects.get(content_type__app_label=app_label, codename=codename)
+
+
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name='Editors')
+        self.group.permissions.add(permission('view_member'))
+        self.user = User.objects.create_user('editor')
+        self.user.groups.add(self.group)
+        self.user.user_permissions.add(permission('view_family'))
+
+    def test_compiled_once(self):
+        with self.assertNumQueries(1):
+            perms = user_permissions(self.user)
+        self.assertEqual(perms, {'members.view_member', 'members.view_family'})
+        fresh = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(fresh.has_perm('members.view_member'))
+            self.assertFalse(fresh.has_perm('members.delete_member'))
+
+    def test_changes_are_seen(self):
+        user_permissions(self.user)
+        self.group.permissions.add(permission('change_member'))
+        self.assertIn('members.change_member', user_permissions(self.user))
+        self.user.groups.remove(self.group)
+        self.assertEqual(user_permissions(self.user), {'members.view_family'})
+        self.user.user_permissions.clear()
+        self.assertEqual(user_permissions(self.user), frozenset())
+
+    def test_group_membership_changed_from_the_group(self):
+        user_permissions(self.user)
+        self.group.user_set.clear()
+        self.assertEqual(user_permissions(self.user), {'members.view_family'})
+
+    def test_check_auth(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        body = client.get('/api/auth/check/').json()
+        self.assertTrue(body['authenticated'])
+        self.assertEqual(body['permissions'], ['members.view_family', 'members.view_member'])
+        self.assertEqual(APIClient().get('/api/auth/check/').json(), {'authenticated': False})
+
+
+class DashboardTests(TestCase):
+    url = '/api/dashboard/stats/'
+
+    def setUp(self):
+        cache.clear()
+        self.zone = Zone.objects.create(name='North')
+        Member.objects.create(first_name='Abebe', last_name='Kebede', gender='male', zone=self.zone)
+        staff = User.objects.create_user('staff')
+        staff.user_permissions.add(permission('view_dashboard', 'accounts'))
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+
+    def stats(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_totals_and_recent_items(self):
+        body = self.stats()
+        self.assertEqual(
+            {name: section['total'] for name, section in body.items()},
+            {'members': 1, 'families': 0, 'zones': 1, 'service_divisions': 0, 'hero_sections': 0},
+        )
+        self.assertEqual([m['first_name'] for m in body['members']['recent']], ['Abebe'])
+
+    def test_cached_until_a_write_commits(self):
+        self.stats()
+        with mock.patch.object(dashboard, 'compute_dashboard_stats',
+                               wraps=dashboard.compute_dashboard_stats) as compute:
+            self.assertEqual(self.stats()['members']['total'], 1)
+            compute.assert_not_called()
+            with self.captureOnCommitCallbacks() as callbacks:
+                Member.objects.create(first_name='Almaz', last_name='Tesfaye', gender='female')
+            # Not before the commit: a concurrent load would cache the old rows
+            self.assertEqual(self.stats()['members']['total'], 1)
+            for callback in callbacks:
+                callback()
+            self.assertEqual(self.stats()['members']['total'], 2)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.zone.delete()
+            self.assertEqual(self.stats()['zones']['total'], 0)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_requires_permission(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('member'))
+        self.assertEqual(client.get(self.url).status_code, 403)
+
+
+class RevocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('rotator')
+        revocation._recent.clear()
+        revocation._valid.clear()
+
+    def token(self):
+        return RefreshToken.for_user(self.user)
+
+    def test_revoke_once(self):
+        token = self.token()
+        self.assertTrue(revocation.revoke(token))
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation.revoke(token))
+            self.assertTrue(revocation.is_revoked(token))
+
+    @override_settings(TOKEN_REVOCATION_LRU_SIZE=2)
+    def test_lru_is_bounded(self):
+        tokens = [self.token() for _ in range(3)]
+        for token in tokens:
+            revocation.revoke(token)
+        self.assertEqual(list(revocation._recent), [tokens[1]['jti'], tokens[2]['jti']])
+
+    @override_settings(TOKEN_REVOCATION_LRU_SIZE=1)
+    def test_replay_after_eviction_is_rejected(self):
+        first = self.token()
+        revocation.revoke(first)
+        revocation.revoke(self.token())
+        self.assertFalse(revocation.recently_revoked(first['jti']))
+        self.assertFalse(revocation.revoke(first))
+        revocation._recent.clear()
+        self.assertTrue(revocation.is_revoked(first))
+
+    def test_valid_token_checked_once_per_ttl(self):
+        token = self.token()
+        with self.assertNumQueries(1):
+            self.assertFalse(revocation.is_revoked(token))
+            self.assertFalse(revocation.is_revoked(token))
+        later = time.time() + revocation.DEFAULT_NEGATIVE_TTL + 1
+        with mock.patch('apps.accounts.revocation.time.time', return_value=later):
+            with self.assertNumQueries(1):
+                self.assertFalse(revocation.is_revoked(token))
+
+    def test_local_revocation_clears_valid_entry(self):
+        token = self.token()
+        self.assertFalse(revocation.is_revoked(token))
+        revocation.revoke(token)
+        self.assertTrue(revocation.is_revoked(token))
+
+
+THROTTLE = {
+    'WINDOW': 300,
+    'IP_ATTEMPTS': 10,
+    'IP_FAILURES': 4,
+    'USERNAME_FAILURES': 2,
+    'BACKOFF_BASE': 2,
+    'BACKOFF_MAX': 60,
+    'TRUSTED_PROXIES': 0,
+}
+
+
+@override_settings(LOGIN_THROTTLE=THROTTLE,
+                   PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginThrottleTests(TestCase):
+    url = '/api/auth/login/'
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('alice', password='right-password')
+        # Mid-window, so that the previous window weighs nothing
+        self.now = 1_000_000 * 300 + 1
+        patcher = mock.patch('apps.accounts.throttling.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self, username='alice', password='wrong-password', ip='203.0.113.7', **extra):
+        return APIClient().post(self.url, {'username': username, 'password': password},
+                                REMOTE_ADDR=ip, **extra)
+
+    def refresh(self, token='not-a-token', ip='203.0.113.7'):
+        return APIClient().post('/api/auth/refresh/', {'refresh': token}, REMOTE_ADDR=ip)
+
+    @override_settings(LOGIN_THROTTLE={**THROTTLE, 'IP_FAILURES': 100})
+    def test_ip_attempt_rate(self):
+        for i in range(THROTTLE['IP_ATTEMPTS']):
+            self.assertNotEqual(self.login(f"nobody{i}", ip='198.51.100.1').status_code, 429)
+        self.assertEqual(self.login('alice', 'right-password', ip='198.51.100.1').status_code, 429)
+        self.assertEqual(self.login('alice', 'right-password', ip='198.51.100.2').status_code, 200)
+
+    def test_ip_failures_block_a_password_spray(self):
+        for i in range(THROTTLE['IP_FAILURES']):
+            self.assertEqual(self.login(f"user{i}").status_code, 401)
+        self.assertEqual(self.login('alice', 'right-password').status_code, 429)
+
+    def test_username_failures_block_across_ips(self):
+        for i in range(THROTTLE['USERNAME_FAILURES']):
+            self.assertEqual(self.login(ip=f"198.51.100.{i}").status_code, 401)
+        response = self.login(password='right-password', ip='192.0.2.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.login('bob', ip='192.0.2.1').status_code, 401)
+
+    def test_backoff_doubles(self):
+        for i in range(THROTTLE['USERNAME_FAILURES']):
+            self.login(ip=f"198.51.100.{i}")
+        self.assertEqual(self.login(ip='192.0.2.1')['Retry-After'], '2')
+        self.now += 3
+        self.assertEqual(self.login(ip='192.0.2.2').status_code, 401)
+        self.assertEqual(self.login(ip='192.0.2.3')['Retry-After'], '4')
+
+    def test_spoofed_forwarded_for_is_ignored(self):
+        for i in range(THROTTLE['IP_FAILURES']):
+            self.login(f"user{i}", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}")
+        response = self.login('alice', 'right-password', HTTP_X_FORWARDED_FOR='10.0.0.99')
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(LOGIN_THROTTLE={**THROTTLE, 'TRUSTED_PROXIES': 1})
+    def test_trusted_proxy_address(self):
+        # Behind one proxy at 127.0.0.1: only the address it appended counts
+        for i in range(THROTTLE['IP_FAILURES']):
+            self.login(f"user{i}", ip='127.0.0.1',
+                       HTTP_X_FORWARDED_FOR=f"10.0.0.{i}, 203.0.113.7")
+        blocked = self.login('alice', 'right-password', ip='127.0.0.1',
+                             HTTP_X_FORWARDED_FOR='203.0.113.7')
+        self.assertEqual(blocked.status_code, 429)
+        other = self.login('alice', 'right-password', ip='127.0.0.1',
+                           HTTP_X_FORWARDED_FOR='203.0.113.7, 198.51.100.9')
+        self.assertEqual(other.status_code, 200)
+
+    def test_refreshes_are_not_login_attempts(self):
+        for _ in range(THROTTLE['IP_ATTEMPTS'] + 1):
+            self.assertEqual(self.refresh().status_code, 401)
+        self.assertEqual(self.login('alice', 'right-password').status_code, 200)
+
+    @mock.patch.object(TokenRefreshThrottle, 'THROTTLE_RATES', {'token_refresh': '3/min'})
+    def test_refresh_rate(self):
+        for _ in range(3):
+            self.assertEqual(self.refresh().status_code, 401)
+        self.assertEqual(self.refresh().status_code, 429)
+        self.assertEqual(self.refresh(ip='198.51.100.1').status_code, 401)
+
+
+class RoleCountTests(TestCase):
+    def setUp(self):
+        self.editors = Group.objects.create(name='Editors')
+        self.editors.permissions.add(permission('view_member'), permission('change_member'))
+        self.viewers = Group.objects.create(name='Viewers')
+        alice = User.objects.create_user('alice')
+        alice.groups.add(self.editors, self.viewers)
+        User.objects.create_user('bob').groups.add(self.editors)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', email=''))
+
+    def test_group_counts(self):
+        rows = self.client.get('/api/groups/').json()['results']
+        self.assertEqual(
+            [(row['name'], row['user_count'], row['permission_count']) for row in rows],
+            [('Editors', 2, 2), ('Viewers', 1, 0)],
+        )
+        detail = self.client.get(f'/api/groups/{self.editors.pk}/').json()
+        self.assertEqual(detail['user_count'], 2)
+        self.assertEqual(len(detail['permissions_detail']), 2)
+
+    def test_user_group_counts(self):
+        rows = self.client.get('/api/users/', {'ordering': 'username'}).json()['results']
+        self.assertEqual(
+            [(row['username'], row['groups_count'], sorted(row['groups_names'])) for row in rows],
+            [('admin', 0, []), ('alice', 2, ['Editors', 'Viewers']), ('bob', 1, ['Editors'])],
+        )
+
+
+class AvailablePermissionsTests(TestCase):
+    url = '/api/groups/available_permissions/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', email=''))
+
+    def test_catalogue(self):
+        response = self.client.get(self.url)
+        body = response.json()
+        self.assertEqual(len(body['flat']), Permission.objects.count())
+        view_member = permission('view_member')
+        self.assertIn(
+            {'id': view_member.id, 'name': view_member.name, 'codename': 'view_member',
+             'full_codename': 'members.view_member'},
+            body['grouped']['members.member']['permissions'],
+        )
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_revalidation(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        view_member = permission('view_member')
+        view_member.name = 'Can see members'
+        view_member.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        names = [p['name'] for p in response.json()['grouped']['members.member']['permissions']]
+        self.assertIn('Can see members', names)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkProvisionTests(TestCase):
+    url = '/api/users/bulk_provision/'
+
+    def setUp(self):
+        self.members = [
+            Member.objects.create(first_name=first, last_name='Bekele', father_name='Bekele', gender='male')
+            for first in ('Dawit', 'Yonas', 'Samuel')
+        ]
+        self.role = Group.objects.create(name='Volunteers')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', email=''))
+
+    def account(self, member, username, password='long-enough-Pa55'):
+        return {'member_id': member.pk, 'username': username, 'password': password}
+
+    def provision(self, *accounts):
+        return self.client.post(self.url, {'accounts': list(accounts), 'groups': [self.role.pk]},
+                                format='json')
+
+    def test_accounts_are_linked_and_rows_reported(self):
+        User.objects.create_user('taken')
+        dawit, yonas, samuel = self.members
+        response = self.provision(
+            self.account(dawit, 'dawit', 'first-Pa55word'),
+            self.account(yonas, 'yonas', 'second-Pa55word'),
+            self.account(dawit, 'dawit2'),
+            self.account(samuel, 'taken'),
+            {'member_id': 0, 'username': 'ghost', 'password': 'long-enough-Pa55'},
+        )
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body['created'], 2)
+        self.assertEqual([user['username'] for user in body['users']], ['dawit', 'yonas'])
+        self.assertEqual(
+            [(error['index'], error['error']) for error in body['errors']],
+            [(2, 'Member listed more than once'), (3, 'Username taken is already taken'),
+             (4, 'Member not found')],
+        )
+
+        for member, password in ((dawit, 'first-Pa55word'), (yonas, 'second-Pa55word')):
+            member.refresh_from_db()
+            user = member.user
+            self.assertTrue(user.check_password(password))
+            self.assertEqual((user.first_name, user.profile.father_name), (member.first_name, 'Bekele'))
+            self.assertEqual(list(user.groups.all()), [self.role])
+        samuel.refresh_from_db()
+        self.assertIsNone(samuel.user)
+
+    def test_nothing_valid(self):
+        response = self.provision(self.account(self.members[0], 'dawit', 'short'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['created'], 0)
+        self.assertFalse(User.objects.filter(username='dawit').exists())
+
+    def test_member_linked_while_hashing_creates_nothing(self):
+        dawit, yonas, _ = self.members
+        hash_passwords = provisioning.hash_passwords
+
+        def link_first(passwords):
+            dawit.user = User.objects.create_user('elsewhere')
+            dawit.save()
+            return hash_passwords(passwords)
+
+        with mock.patch.object(provisioning, 'hash_passwords', side_effect=link_first):
+            response = self.provision(self.account(dawit, 'dawit'), self.account(yonas, 'yonas'))
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(User.objects.filter(username__in=['dawit', 'yonas']).exists())
+        yonas.refresh_from_db()
+        self.assertIsNone(yonas.user)
+
+    def test_passwords_hashed_on_worker_threads_in_order(self):
+        passwords = [f'password-{i}' for i in range(6)]
+        threads = []
+
+        def make_password(password):
+            threads.append(threading.get_ident())
+            return hashers.make_password(password)
+
+        with mock.patch.object(provisioning, 'make_password', side_effect=make_password):
+            hashes = provisioning.hash_passwords(passwords)
+        self.assertEqual(len(threads), 6)
+        self.assertNotIn(threading.get_ident(), threads)
+        for password, hashed in zip(passwords, hashes):
+            self.assertTrue(hashers.check_password(password, hashed))
+        with self.settings(PASSWORD_HASH_WORKERS=1), \
+                mock.patch.object(provisioning, 'ThreadPoolExecutor') as pool:
+            hashes = provisioning.hash_passwords(passwords)
+        pool.assert_not_called()
+        self.assertTrue(hashers.check_password('password-5', hashes[5]))
+
+
+class LeadershipTestCase(TestCase):
+    """A zone leader and a service leader alongside an unscoped member"""
+
+    def setUp(self):
+        cache.clear()
+        self.north, self.south = Zone.objects.create(name='North'), Zone.objects.create(name='South')
+        self.choir, self.ushers = (ServiceDivision.objects.create(name='Choir'),
+                                   ServiceDivision.objects.create(name='Ushers'))
+        self.roles = Group.objects.create(name='Leaders')
+        self.roles.permissions.add(
+            permission('view_zone_members'), permission('view_service_members'),
+            permission('view_own_zone', 'structure'), permission('view_own_service_division', 'structure'),
+        )
+        self.zone_leader = self.leader('hana', zone=self.north, service_division=self.ushers)
+        ZoneLeader.objects.create(zone=self.north, member=self.zone_leader.member_profile)
+        self.service_leader = self.leader('kebede', zone=self.south, service_division=self.choir)
+        ServiceLeader.objects.create(service_division=self.choir, member=self.service_leader.member_profile)
+        self.member('Abebe', zone=self.north, service_division=self.choir)
+        self.member('Tigist', zone=self.south)
+
+    def member(self, first_name, **fields):
+        return Member.objects.create(first_name=first_name, last_name='Alemu', gender='female', **fields)
+
+    def leader(self, username, **fields):
+        user = User.objects.create_user(username)
+        user.groups.add(self.roles)
+        self.member(username.title(), user=user, **fields)
+        return user
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def names(self, user, url):
+        rows = self.client_for(user).get(url).json()['results']
+        return sorted(row.get('first_name') or row['name'] for row in rows)
+
+
+class LeadershipScopeTests(LeadershipTestCase):
+    def test_scopes(self):
+        self.assertEqual(
+            leadership_scopes([self.zone_leader.pk, self.service_leader.pk, 0]),
+            {
+                self.zone_leader.pk: {'member': self.zone_leader.member_profile.pk,
+                                      'zones': [self.north.pk], 'services': []},
+                self.service_leader.pk: {'member': self.service_leader.member_profile.pk,
+                                         'zones': [], 'services': [self.choir.pk]},
+                0: {'member': None, 'zones': [], 'services': []},
+            },
+        )
+
+    def test_members_are_filtered_by_led_zone_or_service(self):
+        self.assertEqual(self.names(self.zone_leader, '/api/members/'), ['Abebe', 'Hana'])
+        self.assertEqual(self.names(self.service_leader, '/api/members/'), ['Abebe', 'Kebede'])
+        admin = User.objects.create_superuser('admin', email='')
+        self.assertEqual(self.names(admin, '/api/members/'), ['Abebe', 'Hana', 'Kebede', 'Tigist'])
+
+    def test_structure_is_filtered_by_led_zone_or_service(self):
+        self.assertEqual(self.names(self.zone_leader, '/api/zones/'), ['North'])
+        self.assertEqual(self.names(self.service_leader, '/api/service-divisions/'), ['Choir'])
+        # Leading nothing of a kind leaves that list unfiltered
+        self.assertEqual(self.names(self.service_leader, '/api/zones/'), ['North', 'South'])
+
+
+class PermissionMatrixTests(LeadershipTestCase):
+    url = '/api/users/permission_matrix/'
+
+    def test_effective_permissions(self):
+        self.zone_leader.user_permissions.add(permission('view_family'))
+        inactive = User.objects.create_user('gone', is_active=False)
+        inactive.groups.add(self.roles)
+        User.objects.create_superuser('admin', email='')
+        body = self.client_for(User.objects.get(username='admin')).get(
+            self.url, {'ordering': 'username'}).json()
+
+        codes = body['permissions']
+        self.assertEqual(body['count'], 4)
+        rows = {row['username']: row for row in body['results']}
+        permissions = {name: decode_permissions(row['permissions'], codes) for name, row in rows.items()}
+        leading = {'members.view_zone_members', 'members.view_service_members',
+                   'structure.view_own_zone', 'structure.view_own_service_division'}
+        self.assertEqual(permissions['hana'], leading | {'members.view_family'})
+        self.assertEqual(permissions['kebede'], leading)
+        self.assertEqual(permissions['gone'], frozenset())
+        self.assertEqual(permissions['admin'], frozenset(codes))
+        self.assertEqual(rows['hana']['groups'], [self.roles.pk])
+        self.assertEqual(rows['hana']['scope']['zones'], [self.north.pk])
+        self.assertEqual(rows['kebede']['scope']['services'], [self.choir.pk])
+
+    def test_list_filters_and_permission(self):
+        client = self.client_for(User.objects.create_superuser('admin', email=''))
+        body = client.get(self.url, {'group': self.roles.pk}).json()
+        self.assertEqual(sorted(row['username'] for row in body['results']), ['hana', 'kebede'])
+        self.assertEqual(body['next'], None)
+        self.assertEqual(self.client_for(self.zone_leader).get(self.url).status_code, 403)
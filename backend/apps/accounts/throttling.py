@@ -0,0 +1,173 @@
+"""Login throttling.
+
+Attempts per client IP and failed logins per IP and per username are counted
+in sliding windows (the current fixed window plus a weighted share of the
+previous one) in a cache shared by all workers. Past the failure limit a key
+is blocked with exponential backoff. Blocked requests are rejected by
+``LoginThrottle`` before the view runs, i.e. before any user lookup or
+password hash, and cost the same whatever the username.
+
+The client IP is ``REMOTE_ADDR``. ``X-Forwarded-For`` is read only behind
+TRUSTED_PROXIES reverse proxies, and then only the address the outermost
+trusted proxy appended: anything a client sends in the header itself is
+ignored, so it cannot pick a fresh IP bucket for each attempt.
+
+Token refreshes are not login attempts: ``TokenRefreshThrottle`` gives them
+their own per-IP rate (the ``token_refresh`` scope), so browsers refreshing
+behind one address do not use up that address's login attempts.
+"""
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.dispatch import Signal
+from rest_framework.throttling import BaseThrottle, ScopedRateThrottle
+
+
+logger = logging.getLogger(__name__)
+
+# Sent with ``kind`` ('ip' or 'username') and ``reason`` ('blocked' or 'rate')
+# whenever an attempt is rejected, and with ``reason='failure'`` for each
+# failed login; for metrics and alerting
+login_throttled = Signal()
+
+DEFAULTS = {
+    'WINDOW': 300,
+    'IP_ATTEMPTS': 60,
+    'IP_FAILURES': 20,
+    'USERNAME_FAILURES': 5,
+    'BACKOFF_BASE': 2,
+    'BACKOFF_MAX': 15 * 60,
+    'TRUSTED_PROXIES': 0,
+}
+
+
+def throttle_setting(name):
+    return getattr(settings, 'LOGIN_THROTTLE', {}).get(name, DEFAULTS[name])
+
+
+def store():
+    return caches[getattr(settings, 'LOGIN_THROTTLE_CACHE', 'default')]
+
+
+class SlidingWindow:
+    """Approximate count of events in the last ``window`` seconds"""
+
+    def __init__(self, key, window):
+        self.key = key
+        self.window = window
+
+    def _keys(self, now):
+        current = int(now // self.window)
+        return f"{self.key}:{current}", f"{self.key}:{current - 1}"
+
+    def _estimate(self, now, current, previous):
+        elapsed = (now % self.window) / self.window
+        return current + previous * (1 - elapsed)
+
+    def hit(self, now):
+        current_key, previous_key = self._keys(now)
+        cache = store()
+        cache.add(current_key, 0, self.window * 2)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(current_key, 1, self.window * 2)
+            current = 1
+        return self._estimate(now, current, cache.get(previous_key, 0))
+
+    def reset(self, now):
+        store().delete_many(list(self._keys(now)))
+
+
+def _normalize(username):
+    return str(username or '').strip().lower()[:150]
+
+
+def client_ip(request):
+    """The client address, as seen by the first proxy we trust, if any"""
+    proxies = throttle_setting('TRUSTED_PROXIES')
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',') if address.strip()]
+        # Each trusted proxy appended one address; the rest came from the client
+        if len(addresses) >= proxies:
+            return addresses[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _idents(request, username):
+    idents = [('ip', client_ip(request))]
+    if username:
+        idents.append(('username', username))
+    return idents
+
+
+def _block_key(kind, ident):
+    return f"throttle:login:block:{kind}:{ident}"
+
+
+def _emit(kind, ident, reason, request=None):
+    login_throttled.send(sender=LoginThrottle, kind=kind, reason=reason, request=request)
+    level = logging.INFO if reason == 'failure' else logging.WARNING
+    logger.log(level, "Login %s for %s %s", reason, kind, ident)
+
+
+class LoginThrottle(BaseThrottle):
+    """Reject attempts from blocked IPs/usernames and IPs over the attempt rate"""
+
+    def allow_request(self, request, view):
+        now = time.time()
+        self.retry_after = None
+        idents = _idents(request, _normalize(request.data.get('username')))
+        blocks = store().get_many([_block_key(kind, ident) for kind, ident in idents])
+        for kind, ident in idents:
+            until = blocks.get(_block_key(kind, ident))
+            if until and until > now:
+                self.retry_after = until - now
+                _emit(kind, ident, 'blocked', request)
+                return False
+
+        kind, ip = idents[0]
+        window = throttle_setting('WINDOW')
+        attempts = SlidingWindow(f"throttle:login:attempts:{ip}", window).hit(now)
+        if attempts > throttle_setting('IP_ATTEMPTS'):
+            self.retry_after = window - now % window
+            _emit(kind, ip, 'rate', request)
+            return False
+        return True
+
+    def wait(self):
+        return math.ceil(self.retry_after) if self.retry_after else None
+
+
+class TokenRefreshThrottle(ScopedRateThrottle):
+    """``throttle_scope`` rate per client IP, identified like logins are"""
+
+    def get_ident(self, request):
+        return client_ip(request)
+
+
+def record_login_failure(request):
+    """Count a failed login; past the limit, block with exponential backoff"""
+    now = time.time()
+    window = throttle_setting('WINDOW')
+    limits = {'ip': throttle_setting('IP_FAILURES'), 'username': throttle_setting('USERNAME_FAILURES')}
+    for kind, ident in _idents(request, _normalize(request.data.get('username'))):
+        failures = SlidingWindow(f"throttle:login:failures:{kind}:{ident}", window).hit(now)
+        _emit(kind, ident, 'failure', request)
+        excess = math.floor(failures) - limits[kind]
+        if excess >= 0:
+            delay = min(throttle_setting('BACKOFF_BASE') * 2 ** excess, throttle_setting('BACKOFF_MAX'))
+            store().set(_block_key(kind, ident), now + delay, math.ceil(delay))
+
+
+def record_login_success(request):
+    """A successful login clears the username's failure history"""
+    username = _normalize(request.data.get('username'))
+    if username:
+        now = time.time()
+        SlidingWindow(f"throttle:login:failures:username:{username}", throttle_setting('WINDOW')).reset(now)
@@ -0,0 +1,101 @@
+"""Permission and scope digests carried in access tokens.
+
+At login a token gets a ``perms`` claim: the user's permissions as a bitset
+over the sorted permission catalogue, the catalogue's fingerprint and the
+server-side permission stamp at issue time; and a ``scope`` claim with their
+leadership scope. While the stamp and fingerprint still match, requests are
+authenticated from the token alone, without loading the user or their
+permissions. Any change to the user, their groups, permissions or leadership
+bumps the stamp (see ``signals.py``) and sends the token back to the database
+path until it is refreshed. Digests are only trusted when the stamps live in a
+cache shared by every worker; otherwise every request takes the database path.
+"""
+import base64
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.settings import api_settings
+
+from .permission_cache import (
+    all_permissions, permission_catalogue, permission_stamp, stamps_are_shared,
+    user_permissions,
+)
+from .scopes import compute_leadership_scope
+
+
+DIGEST_CLAIM = 'perms'
+SCOPE_CLAIM = 'scope'
+
+
+def encode_permissions(codes, catalogue):
+    index = {code: position for position, code in enumerate(catalogue)}
+    bits = 0
+    for code in codes:
+        bits |= 1 << index[code]
+    raw = bits.to_bytes((len(catalogue) + 7) // 8, 'little')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_permissions(encoded, catalogue):
+    raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+    bits = int.from_bytes(raw, 'little')
+    return frozenset(code for position, code in enumerate(catalogue) if bits >> position & 1)
+
+
+def add_digest_claims(token, user):
+    """Embed the current permission digest and leadership scope of ``user``"""
+    # Read the stamp first: a change racing with this login leaves the token stale
+    stamp = permission_stamp(user.pk)
+    codes, fingerprint = permission_catalogue()
+    # Superusers hold every permission; the User model short-circuits them
+    granted = frozenset() if user.is_superuser else user_permissions(user)
+    token['username'] = user.username
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token[DIGEST_CLAIM] = {
+        'v': stamp,
+        'c': fingerprint,
+        'p': encode_permissions(granted & set(codes), codes),
+    }
+    token[SCOPE_CLAIM] = compute_leadership_scope(user)
+    return token
+
+
+def digest_is_current(token):
+    digest = token.get(DIGEST_CLAIM)
+    # A bump made by another worker is invisible in a process-local cache
+    if not isinstance(digest, dict) or not stamps_are_shared():
+        return False
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    return (
+        digest.get('v') == permission_stamp(user_id)
+        and digest.get('c') == permission_catalogue()[1]
+    )
+
+
+def user_from_token(token):
+    """
+    A ``User`` built from the token's claims, or None if the digest is missing
+    or stale. Only the fields carried in the token are loaded; touching any other
+    field loads it from the database, and ``save()`` writes loaded fields only.
+    """
+    scope = token.get(SCOPE_CLAIM)
+    if not isinstance(scope, dict) or not digest_is_current(token):
+        return None
+    claims = {
+        # The claim may hold the id as a string
+        'id': User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM]),
+        'username': token.get('username', ''),
+        'is_staff': bool(token.get('is_staff')),
+        'is_superuser': bool(token.get('is_superuser')),
+        'is_active': True,
+    }
+    # from_db() expects values in model field order
+    fields = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+    user = User.from_db(DEFAULT_DB_ALIAS, fields, [claims[name] for name in fields])
+    if user.is_superuser:
+        user._perm_cache = all_permissions()
+    else:
+        user._perm_cache = decode_permissions(token[DIGEST_CLAIM]['p'], permission_catalogue()[0])
+    user._leadership_scope = scope
+    return user
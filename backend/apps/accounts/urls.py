@@ -1,8 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
-    CustomTokenObtainPairView, check_auth, dashboard_stats,
+    CustomTokenObtainPairView, CustomTokenRefreshView, check_auth, dashboard_stats, dashboard_growth,
     GroupViewSet, PermissionViewSet, UserViewSet
 )
 
@@ -15,8 +14,9 @@ router.register(r'users', UserViewSet, basename='user')
 
 urlpatterns = [
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('auth/check/', check_auth, name='check_auth'),
     path('dashboard/stats/', dashboard_stats, name='dashboard_stats'),
+    path('dashboard/growth/', dashboard_growth, name='dashboard_growth'),
     path('', include(router.urls)),
 ]
@@ -3,20 +3,43 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth.models import User, Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.timing import PhaseTimingMixin
 from .serializers import (
     GroupSerializer, GroupListSerializer, PermissionSerializer,
-    UserSerializer, UserListSerializer
+    UserSerializer, UserListSerializer, BulkProvisionSerializer
 )
 from .permissions import RolePermission, UserPermission
+from . import permission_cache
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+def count_through(through, fk):
+    """Correlated COUNT of ``through`` rows whose ``fk`` is the outer row"""
+    counts = (
+        through.objects.filter(**{fk: OuterRef('pk')})
+        .order_by().values(fk).annotate(count=Count('*')).values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def groups_with_counts():
+    """Groups annotated with ``user_count`` and ``permission_count``"""
+    return Group.objects.annotate(
+        user_count=count_through(User.groups.through, 'group'),
+        permission_count=count_through(Group.permissions.through, 'group'),
+    )
+
+
+class GroupViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Groups (Roles)
     """
-    queryset = Group.objects.prefetch_related('permissions', 'user_set').all()
+    queryset = Group.objects.all()
     permission_classes = [RolePermission]
+    query_budgets = {'list': 3, 'retrieve': 3, 'available_permissions': 2}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name']
@@ -26,39 +49,28 @@ class GroupViewSet(viewsets.ModelViewSet):
         if self.action == 'list':
             return GroupListSerializer
         return GroupSerializer
+
+    def get_queryset(self):
+        # Counts are correlated subqueries: nothing is prefetched just to count it
+        queryset = groups_with_counts()
+        if self.action == 'list':
+            return queryset
+        return queryset.prefetch_related(
+            Prefetch('permissions', queryset=Permission.objects.select_related('content_type'))
+        )
     
     @action(detail=False, methods=['get'])
     def available_permissions(self, request):
         """
-        Get all available permissions in the system, grouped by app and model
+        Get all available permissions in the system, grouped by app and model.
+        Served from cache with an ETag; revalidation answers 304.
         """
-        permissions = Permission.objects.select_related('content_type').all()
-        
-        # Group permissions by app and model
-        grouped_permissions = {}
-        for perm in permissions:
-            app_label = perm.content_type.app_label
-            model_name = perm.content_type.model
-            key = f"{app_label}.{model_name}"
-            
-            if key not in grouped_permissions:
-                grouped_permissions[key] = {
-                    'app_label': app_label,
-                    'model_name': model_name,
-                    'permissions': []
-                }
-            
-            grouped_permissions[key]['permissions'].append({
-                'id': perm.id,
-                'name': perm.name,
-                'codename': perm.codename,
-                'full_codename': f"{app_label}.{perm.codename}"
-            })
-        
-        return Response({
-            'grouped': grouped_permissions,
-            'flat': PermissionSerializer(permissions, many=True).data
-        })
+        catalogue, etag = permission_cache.available_permissions()
+        etag = f'"{etag}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(catalogue, headers=headers)
     
     @action(detail=True, methods=['post'])
     def assign_permissions(self, request, pk=None):
@@ -104,24 +116,26 @@ class GroupViewSet(viewsets.ModelViewSet):
         })
 
 
-class PermissionViewSet(viewsets.ReadOnlyModelViewSet):
+class PermissionViewSet(PhaseTimingMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only ViewSet for viewing available permissions
     """
     queryset = Permission.objects.select_related('content_type').all()
     serializer_class = PermissionSerializer
     permission_classes = [RolePermission]
+    query_budgets = {'list': 3, 'retrieve': 2}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['content_type']
     search_fields = ['name', 'codename']
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Users
     """
-    queryset = User.objects.prefetch_related('groups').all()
+    queryset = User.objects.all()
     permission_classes = [UserPermission]
+    query_budgets = {'list': 4, 'retrieve': 3, 'permission_matrix': 7}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['username', 'email', 'first_name', 'last_name']
     ordering_fields = ['username', 'date_joined', 'last_login']
@@ -134,6 +148,16 @@ class UserViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action == 'permission_matrix':
+            queryset = queryset.only('id', 'username', 'is_active', 'is_superuser', 'date_joined')
+        else:
+            queryset = queryset.select_related('profile', 'member_profile')
+            if self.action == 'list':
+                # Names only; the list derives groups_count from the same rows
+                groups = Group.objects.only('id', 'name')
+            else:
+                groups = groups_with_counts()
+            queryset = queryset.prefetch_related(Prefetch('groups', queryset=groups))
         
         # Filter by is_staff if requested
         is_staff = self.request.query_params.get('is_staff', None)
@@ -148,28 +172,112 @@ class UserViewSet(viewsets.ModelViewSet):
         
         return queryset.distinct()
 
+    @action(detail=False, methods=['get'])
+    def permission_matrix(self, request):
+        """
+        Effective permissions of a page of users (same filters as the list).
+        Each row's `permissions` is a base64url little-endian bitset over the
+        `permissions` catalogue in the response: bit i grants catalogue[i].
+        """
+        from .matrix import permission_matrix
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        rows, codes, fingerprint = permission_matrix(page)
+        response = self.get_paginated_response(rows)
+        response.data['permissions'] = codes
+        response.data['catalogue'] = fingerprint
+        return response
+
+    @action(detail=False, methods=['post'])
+    def bulk_provision(self, request):
+        """
+        Create accounts for many members at once.
+        Body: {"accounts": [{"member_id", "username", "password"}, ...], "groups": [ids]}
+        """
+        from .provisioning import ProvisioningError, provision_accounts
+        serializer = BulkProvisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            users, errors = provision_accounts(
+                serializer.validated_data['accounts'],
+                serializer.validated_data.get('groups', []),
+            )
+        except ProvisioningError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        created = [{'id': user.id, 'username': user.username} for user in users]
+        return Response({
+            'created': len(created),
+            'errors': errors,
+            'users': created,
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
 
 # Keep the original auth views
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.views import TokenRefreshView
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.contrib.auth.models import User
+from . import revocation
+from .scopes import leadership_scope
+from .throttling import (
+    LoginThrottle, TokenRefreshThrottle, record_login_failure, record_login_success,
+)
+from .tokens import add_digest_claims, digest_is_current
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        # Add custom claims
-        token['username'] = user.username
-        token['is_staff'] = user.is_staff
-        token['is_superuser'] = user.is_superuser
-        return token
+        # Add custom claims, including the permission digest and scope
+        return add_digest_claims(token, user)
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginThrottle]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            response = super().post(request, *args, **kwargs)
+        except AuthenticationFailed:
+            record_login_failure(request)
+            raise
+        record_login_success(request)
+        return response
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        # A rotated refresh token is revoked as it is used; the unique insert
+        # also rejects replays of one that was already rotated
+        if jwt_settings.ROTATE_REFRESH_TOKENS and jwt_settings.BLACKLIST_AFTER_ROTATION:
+            if not revocation.revoke(refresh):
+                raise InvalidToken('Token is blacklisted')
+        elif revocation.is_revoked(refresh):
+            raise InvalidToken('Token is blacklisted')
+
+        # Re-issue a stale permission digest so the new access token can be
+        # served statelessly again
+        if not digest_is_current(refresh):
+            user = User.objects.filter(pk=refresh.get(jwt_settings.USER_ID_CLAIM)).first()
+            if user is not None:
+                add_digest_claims(refresh, user)
+                attrs = {**attrs, 'refresh': str(refresh)}
+        return super().validate(attrs)
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+    # Refreshes have their own rate and never count as login attempts
+    throttle_classes = [TokenRefreshThrottle]
+    throttle_scope = 'token_refresh'
 
 
 @api_view(['GET'])
@@ -177,26 +285,18 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 def check_auth(request):
     """Check if user is authenticated and return permissions"""
     if request.user.is_authenticated:
-        # Get all user permissions (from groups and direct permissions)
-        user_permissions = set()
-        for group in request.user.groups.all():
-            for perm in group.permissions.all():
-                user_permissions.add(f"{perm.content_type.app_label}.{perm.codename}")
-        # Add direct user permissions
-        for perm in request.user.user_permissions.all():
-            user_permissions.add(f"{perm.content_type.app_label}.{perm.codename}")
-        
+        # Group and direct permissions, compiled once and cached across requests
+        user_permissions = permission_cache.user_permissions(request.user)
+
         # Get member_id if user is linked to a member
-        member_id = None
-        if hasattr(request.user, 'member_profile') and request.user.member_profile:
-            member_id = request.user.member_profile.id
+        member_id = leadership_scope(request.user)['member']
         
         return Response({
             'authenticated': True,
             'username': request.user.username,
             'is_staff': request.user.is_staff,
             'is_superuser': request.user.is_superuser,
-            'permissions': list(user_permissions),
+            'permissions': sorted(user_permissions),
             'member_id': member_id,
         })
     return Response({'authenticated': False})
@@ -212,51 +312,52 @@ def dashboard_stats(request):
             {'detail': 'You do not have permission to view the dashboard.'},
             status=status.HTTP_403_FORBIDDEN
         )
-    from apps.members.models import Member, Family
-    from apps.members.serializers import MemberSerializer
-    from apps.structure.models import Zone, ServiceDivision
-    from apps.content.models import HeroSection
-    from apps.content.serializers import HeroSectionSerializer
-    
-    # Get recent members
-    recent_members = Member.objects.order_by('-created_at')[:5]
-    recent_members_data = MemberSerializer(recent_members, many=True).data
-    
-    # Get recent families
-    recent_families = Family.objects.order_by('-created_at')[:5]
-    recent_families_data = []
-    for family in recent_families:
-        recent_families_data.append({
-            'id': family.id,
-            'display_name': family.display_name,
-            'created_at': family.created_at
-        })
-    
-    # Get upcoming hero sections
-    upcoming_heros = HeroSection.objects.filter(
-        start_date__isnull=False
-    ).order_by('start_date')[:3]
-    upcoming_heros_data = HeroSectionSerializer(upcoming_heros, many=True).data
-    
-    stats = {
-        'members': {
-            'total': Member.objects.count(),
-            'recent': recent_members_data
-        },
-        'families': {
-            'total': Family.objects.count(),
-            'recent': recent_families_data
-        },
-        'zones': {
-            'total': Zone.objects.count(),
-        },
-        'service_divisions': {
-            'total': ServiceDivision.objects.count(),
-        },
-        'hero_sections': {
-            'total': HeroSection.objects.count(),
-            'upcoming': upcoming_heros_data
-        }
-    }
-    
-    return Response(stats)
+    from .dashboard import cached_dashboard_stats
+    return Response(cached_dashboard_stats())
+
+
+def _query_date(request, name):
+    from django.utils.dateparse import parse_date
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    return parsed
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_growth(request):
+    """
+    Membership growth from daily snapshots.
+    Query params: start, end (YYYY-MM-DD; default the last year) and
+    granularity (day, week or month; default chosen from the range).
+    """
+    if not (request.user.is_superuser or request.user.has_perm('accounts.view_dashboard')):
+        return Response(
+            {'detail': 'You do not have permission to view the dashboard.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    from datetime import timedelta
+    from django.utils import timezone
+    from apps.members.snapshots import GRANULARITIES, default_granularity, growth_series
+
+    try:
+        start = _query_date(request, 'start')
+        end = _query_date(request, 'end')
+    except ValueError:
+        return Response({'detail': 'start and end must be valid dates (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=365)
+    if start > end:
+        return Response({'detail': 'start must not be after end.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    granularity = request.query_params.get('granularity') or default_granularity(start, end)
+    if granularity not in GRANULARITIES:
+        return Response(
+            {'detail': f"granularity must be one of: {', '.join(GRANULARITIES)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(growth_series(start, end, granularity))
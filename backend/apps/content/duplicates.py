@@ -0,0 +1,162 @@
+"""Perceptual hashing and near-duplicate search for photos.
+
+Each photo gets a 64-bit difference hash (dHash), which survives resizing,
+re-encoding and small exposure changes. Hashes are split into
+``len(BAND_BITS)`` bands stored in ``PhotoHashBand`` (multi-index hashing):
+by the pigeonhole principle two hashes within Hamming distance
+``MAX_DISTANCE`` share at least one band exactly, so candidates are found
+through an index lookup instead of comparing every pair, then verified.
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Q
+from PIL import Image
+
+
+BAND_BITS = (11, 11, 11, 11, 10, 10)
+MAX_DISTANCE = len(BAND_BITS) - 1
+DEFAULT_DISTANCE = 4
+# Candidate pairs read from the cursor at a time
+PAIR_CHUNK_SIZE = 2000
+
+
+def dhash(image):
+    """64-bit difference hash of a PIL image, as an unsigned int"""
+    small = image.resize((9, 8), Image.Resampling.LANCZOS, reducing_gap=3.0).convert('L')
+    pixels = small.load()
+    value = 0
+    for y in range(8):
+        for x in range(8):
+            value = (value << 1) | (pixels[x, y] > pixels[x + 1, y])
+    return value
+
+
+def to_signed(value):
+    """Fit an unsigned 64-bit hash into a BigIntegerField"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def hamming(a, b):
+    return bin(to_unsigned(a) ^ to_unsigned(b)).count('1')
+
+
+def bands(phash):
+    """Split a hash into ``(band, value)`` pairs"""
+    value = to_unsigned(phash)
+    result = []
+    shift = 64
+    for band, bits in enumerate(BAND_BITS):
+        shift -= bits
+        result.append((band, (value >> shift) & ((1 << bits) - 1)))
+    return result
+
+
+def index_photos(photos):
+    """(Re)write the band rows of ``photos``; photos without a hash are cleared"""
+    from .models import PhotoHashBand
+    photos = list(photos)
+    PhotoHashBand.objects.filter(photo__in=[photo.pk for photo in photos]).delete()
+    PhotoHashBand.objects.bulk_create([
+        PhotoHashBand(photo_id=photo.pk, band=band, value=value)
+        for photo in photos if photo.phash is not None
+        for band, value in bands(photo.phash)
+    ])
+
+
+def clamp_distance(distance):
+    return max(0, min(int(distance), MAX_DISTANCE))
+
+
+def find_near_duplicates(hashes, max_distance=DEFAULT_DISTANCE):
+    """
+    For ``{photo_id: phash}``, return ``{photo_id: [(other_id, distance), ...]}``
+    listing other indexed photos within ``max_distance``. One query.
+    """
+    from .models import PhotoHashBand
+    max_distance = clamp_distance(max_distance)
+    if not hashes:
+        return {}
+
+    lookup = Q()
+    for phash in hashes.values():
+        for band, value in bands(phash):
+            lookup |= Q(band=band, value=value)
+    candidates = (
+        PhotoHashBand.objects.filter(lookup)
+        .values_list('photo_id', 'photo__phash')
+        .distinct()
+    )
+
+    matches = defaultdict(list)
+    for other_id, other_hash in candidates:
+        for photo_id, phash in hashes.items():
+            if other_id == photo_id:
+                continue
+            distance = hamming(phash, other_hash)
+            if distance <= max_distance:
+                matches[photo_id].append((other_id, distance))
+    for found in matches.values():
+        found.sort(key=lambda match: match[1])
+    return dict(matches)
+
+
+def duplicate_clusters(max_distance=DEFAULT_DISTANCE):
+    """
+    Group all photos into clusters of near-duplicates.
+
+    Candidate pairs come from a single self-join of the band table on
+    ``(band, value)``, read in chunks of ``PAIR_CHUNK_SIZE``: near-identical
+    shots make the pair count quadratic, so they are never all in memory. Each
+    pair is verified against the full hashes and connected pairs are merged
+    with union-find as they arrive. Returns a list of
+    ``{'photo_ids': [...], 'max_distance': int}``, largest cluster first.
+    """
+    from .models import Photo, PhotoHashBand
+    max_distance = clamp_distance(max_distance)
+    bands_table = connection.ops.quote_name(PhotoHashBand._meta.db_table)
+    photos_table = connection.ops.quote_name(Photo._meta.db_table)
+
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    widest = defaultdict(int)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT a.photo_id, b.photo_id, pa.phash, pb.phash "
+            f"FROM {bands_table} a "
+            f"JOIN {bands_table} b ON a.band = b.band AND a.value = b.value "
+            f"AND a.photo_id < b.photo_id "
+            f"JOIN {photos_table} pa ON pa.id = a.photo_id "
+            f"JOIN {photos_table} pb ON pb.id = b.photo_id"
+        )
+        while rows := cursor.fetchmany(PAIR_CHUNK_SIZE):
+            for a, b, hash_a, hash_b in rows:
+                distance = hamming(hash_a, hash_b)
+                if distance > max_distance:
+                    continue
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+                    widest[root_a] = max(widest[root_a], widest.pop(root_b, 0))
+                widest[root_a] = max(widest[root_a], distance)
+
+    clusters = defaultdict(list)
+    for node in parent:
+        clusters[find(node)].append(node)
+    result = [
+        {'photo_ids': sorted(members), 'max_distance': widest[root]}
+        for root, members in clusters.items()
+    ]
+    result.sort(key=lambda cluster: (-len(cluster['photo_ids']), cluster['photo_ids'][0]))
+    return result
@@ -0,0 +1,79 @@
+"""Year/month/date facet counts for the photo gallery.
+
+Counts come from one GROUP BY at the finest requested granularity and are
+rolled up in Python. Results are cached under a version stamp that is bumped
+on every photo write (see ``signals.py``), so stale facets are never served
+and no explicit key deletion is needed.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth
+
+from .models import Photo
+
+
+VERSION_KEY = 'content:photo:version'
+FACETS_TIMEOUT = 60 * 60 * 24
+GRANULARITIES = ('year', 'month', 'date')
+
+
+def photo_cache_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def bump_photo_cache_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def compute_photo_facets(granularity='year', year=None):
+    queryset = Photo.objects.all()
+    if year is not None:
+        queryset = queryset.filter(year=year)
+
+    if granularity == 'date':
+        rows = queryset.values('year', 'date').order_by('-year', '-date')
+    elif granularity == 'month':
+        rows = queryset.values('year', month=ExtractMonth('date')).order_by('-year', '-month')
+    else:
+        rows = queryset.values('year').order_by('-year')
+    rows = rows.annotate(count=Count('id'))
+
+    years = {}
+    total = 0
+    for row in rows:
+        total += row['count']
+        bucket = years.setdefault(row['year'], {'year': row['year'], 'count': 0})
+        bucket['count'] += row['count']
+        if granularity == 'year':
+            continue
+        month = row['date'].month if granularity == 'date' else row['month']
+        months = bucket.setdefault('months', {})
+        month_bucket = months.setdefault(month, {'month': month, 'count': 0})
+        month_bucket['count'] += row['count']
+        if granularity == 'date':
+            month_bucket.setdefault('dates', []).append(
+                {'date': row['date'].isoformat(), 'count': row['count']}
+            )
+
+    result = []
+    for bucket in years.values():
+        if 'months' in bucket:
+            bucket['months'] = list(bucket['months'].values())
+        result.append(bucket)
+    return {'total': total, 'years': result}
+
+
+def photo_facets(granularity='year', year=None):
+    key = f"content:photo:facets:v{photo_cache_version()}:{granularity}:{year or 'all'}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_photo_facets(granularity, year)
+        cache.set(key, facets, FACETS_TIMEOUT)
+    return facets
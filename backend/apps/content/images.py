@@ -0,0 +1,184 @@
+"""Image derivative pipeline for uploaded photos.
+
+Each upload is decoded once, rotated according to its EXIF orientation and
+re-encoded at a handful of widths in modern formats. Re-encoding drops the
+EXIF/XMP metadata (camera serials, GPS) from everything served to visitors.
+"""
+import base64
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageFilter, ImageOps, features
+
+
+DEFAULT_DERIVATIVE_WIDTHS = (320, 640, 1280, 1920)
+DEFAULT_DERIVATIVE_FORMATS = ('avif', 'webp')
+PLACEHOLDER_WIDTH = 16
+
+FORMAT_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 55},
+    'webp': {'format': 'WEBP', 'quality': 78, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+
+
+def derivative_widths():
+    return tuple(getattr(settings, 'PHOTO_DERIVATIVE_WIDTHS', DEFAULT_DERIVATIVE_WIDTHS))
+
+
+def derivative_formats():
+    """Configured formats, minus those this Pillow build cannot encode"""
+    formats = getattr(settings, 'PHOTO_DERIVATIVE_FORMATS', DEFAULT_DERIVATIVE_FORMATS)
+    return tuple(fmt for fmt in formats if fmt == 'jpeg' or features.check(fmt))
+
+
+def open_upright(file):
+    """Open an image and apply its EXIF orientation"""
+    file.seek(0)
+    image = Image.open(file)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    return image
+
+
+def encode(image, fmt):
+    """Encode an image without any of the source metadata"""
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, **FORMAT_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def build_placeholder(image):
+    """Return a tiny blurred WebP (or JPEG) data URI for progressive loading"""
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    thumb = image.resize((PLACEHOLDER_WIDTH, height), Image.Resampling.BILINEAR)
+    thumb = thumb.filter(ImageFilter.GaussianBlur(1))
+    fmt = 'webp' if features.check('webp') else 'jpeg'
+    buffer = BytesIO()
+    thumb.convert('RGB').save(buffer, format=fmt.upper(), quality=40)
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f"data:{MIME_TYPES[fmt]};base64,{encoded}"
+
+
+def render_derivatives(file):
+    """
+    Decode an upload once and render every configured derivative in memory.
+
+    Returns ``(metadata, renditions)``: ``metadata`` holds the Photo fields
+    derived from the pixels (width, height, placeholder, phash) and
+    ``renditions`` is a list of ``(width, height, fmt, bytes)`` tuples. Widths
+    larger than the source are skipped so nothing is ever upscaled; a source
+    no wider than the largest configured width also gets a rendition at its
+    own size.
+    """
+    from .duplicates import dhash, to_signed
+
+    image = open_upright(file)
+    width, height = image.size
+
+    widths = derivative_widths()
+    targets = [w for w in widths if w < width]
+    if width <= max(widths):
+        targets.append(width)
+
+    renditions = []
+    for target in targets:
+        target_height = max(1, round(height * target / width))
+        resized = image if target == width else image.resize(
+            (target, target_height), Image.Resampling.LANCZOS
+        )
+        for fmt in derivative_formats():
+            renditions.append((target, target_height, fmt, encode(resized, fmt)))
+
+    metadata = {
+        'width': width,
+        'height': height,
+        'placeholder': build_placeholder(image),
+        'phash': to_signed(dhash(image)),
+    }
+    return metadata, renditions
+
+
+def derivative_name(image_name, width, fmt):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f"photos/derivatives/{stem}-{width}w.{fmt}"
+
+
+def store_derivatives(storage, image_name, renditions):
+    """Write rendered derivatives next to ``image_name`` and describe them"""
+    derivatives = []
+    for target, target_height, fmt, data in renditions:
+        name = storage.save(derivative_name(image_name, target, fmt), ContentFile(data))
+        derivatives.append({
+            'name': name,
+            'width': target,
+            'height': target_height,
+            'format': fmt,
+            'size': len(data),
+        })
+    return derivatives
+
+
+def delete_derivatives(storage, derivatives):
+    for derivative in derivatives or []:
+        storage.delete(derivative['name'])
+
+
+METADATA_FIELDS = ('width', 'height', 'placeholder', 'phash')
+
+
+def find_twin(photo_model, image_name, exclude_pk=None):
+    """Another photo with the same stored original that already has derivatives"""
+    twins = photo_model.objects.filter(image=image_name, width__isnull=False, phash__isnull=False)
+    if exclude_pk is not None:
+        twins = twins.exclude(pk=exclude_pk)
+    return twins.only(*METADATA_FIELDS, 'derivatives').first()
+
+
+def generate_derivatives(photo, commit=True):
+    """
+    Render and store the derivatives for ``photo`` and record its dimensions,
+    placeholder and perceptual hash.
+
+    When content-addressed storage has mapped the upload onto an original that
+    another photo already uses, that photo's derivatives are reused and
+    nothing is rendered. Derivatives of a previous upload are released. With
+    ``commit=True`` the new metadata is written with a single UPDATE so that
+    the model's ``save()`` is not re-entered.
+    """
+    from apps.media import references
+    from .duplicates import index_photos
+
+    storage = photo.image.storage
+    previous = list(photo.derivatives or [])
+
+    twin = find_twin(type(photo), photo.image.name, exclude_pk=photo.pk)
+    if twin:
+        metadata = {field: getattr(twin, field) for field in METADATA_FIELDS}
+        derivatives = twin.derivatives
+    else:
+        metadata, renditions = render_derivatives(photo.image)
+        derivatives = store_derivatives(storage, photo.image.name, renditions)
+
+    for field, value in metadata.items():
+        setattr(photo, field, value)
+    photo.derivatives = derivatives
+    if commit:
+        type(photo).objects.filter(pk=photo.pk).update(derivatives=derivatives, **metadata)
+        index_photos([photo])
+        # update() bypasses the reference-counting signals
+        new_names = {d['name'] for d in derivatives}
+        references.replace({d['name'] for d in previous}, new_names)
+        delete_derivatives(storage, [d for d in previous if d['name'] not in new_names])
+    return derivatives
@@ -0,0 +1,152 @@
+"""Parallel ingestion of photo uploads for ``PhotoViewSet.bulk_create``.
+
+Decoding, verification, resizing and file writes are CPU/IO bound and insert
+no rows, so they run on a bounded thread pool (Pillow releases the GIL while
+decoding and encoding). Rows are only inserted once every file has
+been processed, with a single ``bulk_create`` inside a transaction; if the
+insert fails, the files written for it are removed again.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from PIL import Image
+
+from .facets import bump_photo_cache_version
+from apps.media import references
+from .duplicates import DEFAULT_DISTANCE, find_near_duplicates, index_photos
+from .images import (
+    METADATA_FIELDS, delete_derivatives, find_twin, render_derivatives, store_derivatives
+)
+from .models import Photo
+
+
+DEFAULT_INGEST_WORKERS = 4
+
+
+class IngestError(Exception):
+    pass
+
+
+def ingest_workers():
+    return max(1, getattr(settings, 'PHOTO_INGEST_WORKERS', DEFAULT_INGEST_WORKERS))
+
+
+def process_upload(upload):
+    """
+    Verify one upload, write the original and its derivatives to storage and
+    return the image metadata for the row. Runs on a worker thread.
+    """
+    try:
+        upload.seek(0)
+        Image.open(upload).verify()
+    except Exception as e:
+        raise IngestError(f"Not a valid image: {e}")
+
+    field = Photo._meta.get_field('image')
+    storage = field.storage
+    upload.seek(0)
+    name = storage.save(field.generate_filename(None, upload.name), upload)
+
+    # Content already stored for another photo: reuse its derivatives
+    twin = find_twin(Photo, name)
+    if twin:
+        metadata = {field: getattr(twin, field) for field in METADATA_FIELDS}
+        return {'image': name, 'derivatives': twin.derivatives, **metadata}
+
+    try:
+        metadata, renditions = render_derivatives(upload)
+    except Exception as e:
+        storage.delete(name)
+        raise IngestError(f"Not a valid image: {e}")
+    try:
+        derivatives = store_derivatives(storage, name, renditions)
+    except Exception:
+        storage.delete(name)
+        raise
+
+    return {'image': name, 'derivatives': derivatives, **metadata}
+
+
+def discard_files(processed):
+    storage = Photo._meta.get_field('image').storage
+    for data in processed:
+        delete_derivatives(storage, data['derivatives'])
+        storage.delete(data['image'])
+
+
+def ingest_photos(uploads, date, year, title='', description='', warn_duplicates=False,
+                  max_distance=DEFAULT_DISTANCE):
+    """
+    Ingest many uploads for the same date.
+
+    Returns a list with one result per upload, in upload order: either
+    ``{'index', 'name', 'status': 'created', 'photo': Photo}`` or
+    ``{'index', 'name', 'status': 'error', 'error': str}``. With
+    ``warn_duplicates`` created results also carry ``near_duplicates``, the
+    ids and distances of similar photos, including others from this batch.
+    """
+    def run(upload):
+        try:
+            return process_upload(upload), None
+        except IngestError as e:
+            return None, str(e)
+        except Exception as e:
+            return None, f"Could not store image: {e}"
+        finally:
+            # Worker threads get their own connection for blob lookups
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=min(ingest_workers(), len(uploads) or 1)) as pool:
+        outcomes = list(pool.map(run, uploads))
+
+    results = []
+    photos = []
+    processed = []
+    for idx, (upload, (data, error)) in enumerate(zip(uploads, outcomes)):
+        result = {'index': idx, 'name': os.path.basename(upload.name)}
+        if error:
+            result.update(status='error', error=error)
+        else:
+            photo = Photo(
+                date=date,
+                year=year,
+                title=f"{title} {idx + 1}" if title else f"Photo {idx + 1}",
+                description=description,
+                **data
+            )
+            photos.append(photo)
+            processed.append(data)
+            result.update(status='created', photo=photo)
+        results.append(result)
+
+    if photos:
+        try:
+            with transaction.atomic():
+                Photo.objects.bulk_create(photos)
+                index_photos(photos)
+                # bulk_create sends no signals: count blob references here
+                references.retain(
+                    name for data in processed
+                    for name in [data['image'], *(d['name'] for d in data['derivatives'])]
+                )
+                # bulk_create sends no post_save, so invalidate explicitly
+                transaction.on_commit(bump_photo_cache_version)
+        except Exception:
+            discard_files(processed)
+            raise
+
+        if warn_duplicates:
+            matches = find_near_duplicates(
+                {photo.pk: photo.phash for photo in photos if photo.phash is not None},
+                max_distance
+            )
+            for result in results:
+                if result['status'] == 'created':
+                    result['near_duplicates'] = [
+                        {'id': other_id, 'distance': distance}
+                        for other_id, distance in matches.get(result['photo'].pk, [])
+                    ]
+
+    return results
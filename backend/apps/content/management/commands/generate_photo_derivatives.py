@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.content.images import generate_derivatives
+from apps.content.models import Photo
+
+
+class Command(BaseCommand):
+    help = 'Generate resized derivatives, dimensions, placeholders and perceptual hashes for photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate derivatives for every photo, not only those missing them',
+        )
+
+    def handle(self, *args, **options):
+        photos = Photo.objects.order_by('pk')
+        if not options['all']:
+            photos = photos.filter(Q(width__isnull=True) | Q(phash__isnull=True))
+
+        done = failed = 0
+        for photo in photos.iterator(chunk_size=100):
+            try:
+                generate_derivatives(photo)
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Photo {photo.pk}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated derivatives for {done} photo(s), {failed} failed"
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_photo_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['year', 'date'], name='content_photo_year_date_idx'),
+        ),
+    ]
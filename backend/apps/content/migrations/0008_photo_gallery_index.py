@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_photo_year_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['date', 'created_at', 'id'], name='content_photo_gallery_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 05:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_photo_gallery_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='phash',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='64-bit perceptual (difference) hash for near-duplicate search', null=True),
+        ),
+        migrations.CreateModel(
+            name='PhotoHashBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('value', models.IntegerField()),
+                ('photo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hash_bands', to='content.photo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'value'], name='content_phash_band_idx')],
+            },
+        ),
+    ]
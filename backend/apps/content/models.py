@@ -140,6 +140,16 @@ class HeroSection(models.Model):
         
         return hero
 
+    @classmethod
+    async def aget_active_hero(cls):
+        """Async version of ``get_active_hero``"""
+        from django.utils import timezone
+        now = timezone.now()
+        hero = await cls.objects.filter(start_date__lte=now, end_date__gte=now).afirst()
+        if not hero:
+            hero = await cls.objects.order_by('-created_at').afirst()
+        return hero
+
 
 class SocialFeedConfig(models.Model):
     PLATFORM_CHOICES = [
@@ -189,11 +199,44 @@ class Photo(models.Model):
         blank=True,
         help_text="Optional description of the photo"
     )
+    width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Width of the upright original in pixels"
+    )
+    height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Height of the upright original in pixels"
+    )
+    placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Tiny blurred data URI shown while the image loads"
+    )
+    derivatives = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Resized renditions generated from the original upload"
+    )
+    phash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="64-bit perceptual (difference) hash for near-duplicate search"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['year', 'date'], name='content_photo_year_date_idx'),
+            models.Index(fields=['date', 'created_at', 'id'], name='content_photo_gallery_idx'),
+        ]
         permissions = [
             ('manage_photo', 'Can manage photo'),
         ]
@@ -207,4 +250,28 @@ class Photo(models.Model):
         # Auto-populate year from date if not set
         if self.date and not self.year:
             self.year = self.date.year
+        # A file that has not been committed to storage yet is a fresh upload
+        fresh_upload = bool(self.image) and not self.image._committed
         super().save(*args, **kwargs)
+        if fresh_upload:
+            from .images import generate_derivatives
+            generate_derivatives(self)
+
+
+class PhotoHashBand(models.Model):
+    """One band of a photo's perceptual hash, indexed for near-duplicate lookups"""
+    photo = models.ForeignKey(
+        Photo,
+        on_delete=models.CASCADE,
+        related_name='hash_bands'
+    )
+    band = models.PositiveSmallIntegerField()
+    value = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'value'], name='content_phash_band_idx'),
+        ]
+
+    def __str__(self):
+        return f"Photo {self.photo_id} band {self.band}"
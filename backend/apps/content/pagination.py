@@ -0,0 +1,120 @@
+import base64
+import json
+from datetime import date as date_type
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class PhotoGalleryPagination(BasePagination):
+    """
+    Keyset pagination over ``(date, created_at, id)`` that returns whole date
+    buckets.
+
+    Each page reads at most ``page_size + 1`` rows through the gallery index,
+    whatever its depth, and never runs a COUNT. A bucket that does not fit is
+    left for the next page, unless it is the only bucket on the page, in which
+    case it is split and the next page reports ``continued: true``.
+    """
+    ordering = ('-date', '-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 60
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, photo):
+        position = [photo.date.isoformat(), photo.created_at.isoformat(), photo.pk]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            day, created_at, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            day = date_type.fromisoformat(day)
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return day, created_at, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            day, created_at, pk = cursor
+            queryset = queryset.filter(
+                Q(date__lt=day) |
+                Q(date=day, created_at__lt=created_at) |
+                Q(date=day, created_at=created_at, pk__lt=pk)
+            )
+
+        rows = list(queryset[:page_size + 1])
+        self.continued = bool(cursor and rows) and rows[0].date == cursor[0]
+        has_more = len(rows) > page_size
+        page = rows[:page_size]
+
+        if has_more and rows[page_size].date == page[-1].date:
+            # The last bucket is incomplete; hold it back if anything else fits
+            last_date = page[-1].date
+            complete = [photo for photo in page if photo.date != last_date]
+            if complete:
+                page = complete
+
+        self.next_cursor = self.encode_cursor(page[-1]) if has_more else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        groups = []
+        for photo in data:
+            if not groups or groups[-1]['date'] != photo['date']:
+                groups.append({'date': photo['date'], 'photos': []})
+            groups[-1]['photos'].append(photo)
+        return Response({
+            'next': self.get_next_link(),
+            'continued': self.continued,
+            'groups': groups,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'continued': {'type': 'boolean'},
+                'groups': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'date': {'type': 'string', 'format': 'date'},
+                            'photos': schema,
+                        },
+                    },
+                },
+            },
+        }
@@ -0,0 +1,64 @@
+"""
+Async read endpoints for the public site: published blog posts, the active
+hero and the photos. Same responses as the matching viewset actions for an
+anonymous visitor, served without holding a worker thread (see
+apps/core/asyncviews.py).
+"""
+from django.db.models import Q
+from django.views.decorators.http import require_GET
+
+from apps.core.asyncviews import not_found, paginate, render, serialize
+from .models import BlogPost, HeroSection, Photo
+from .serializers import (
+    BlogPostListSerializer, BlogPostSerializer, HeroSectionSerializer, PhotoSerializer
+)
+
+
+def _published_posts():
+    return BlogPost.objects.select_related('author').filter(status='published')
+
+
+@require_GET
+async def public_blog_posts(request):
+    """Published posts, newest first. Query params: search, page, page_size"""
+    queryset = _published_posts().order_by('-published_at', '-created_at')
+    for term in request.GET.get('search', '').split():
+        queryset = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+    page = await paginate(request, queryset, BlogPostListSerializer)
+    if page is None:
+        return not_found(request, 'Invalid page.')
+    return render(request, page)
+
+
+@require_GET
+async def public_blog_post(request, slug):
+    """A published post by slug, with full content"""
+    try:
+        post = await _published_posts().aget(slug=slug)
+    except BlogPost.DoesNotExist:
+        return not_found(request, 'Blog post not found')
+    return render(request, serialize(request, BlogPostSerializer, post))
+
+
+@require_GET
+async def public_active_hero(request):
+    hero = await HeroSection.aget_active_hero()
+    if hero is None:
+        return not_found(request, 'No active hero section')
+    return render(request, serialize(request, HeroSectionSerializer, hero))
+
+
+@require_GET
+async def public_photos(request):
+    """Photos, newest first. Query params: year, page, page_size"""
+    queryset = Photo.objects.order_by('-date', '-created_at')
+    year = request.GET.get('year')
+    if year:
+        try:
+            queryset = queryset.filter(year=int(year))
+        except ValueError:
+            return render(request, {'detail': 'Invalid year'}, status=400)
+    page = await paginate(request, queryset, PhotoSerializer)
+    if page is None:
+        return not_found(request, 'Invalid page.')
+    return render(request, page)
@@ -1,12 +1,15 @@
 from rest_framework import serializers
 from .models import BlogPost, HeroSection, SocialFeedConfig, Photo
+from .images import MIME_TYPES
 from apps.members.serializers import MemberSerializer
+from apps.media.serializers import ResizedImageField
 
 
 class BlogPostSerializer(serializers.ModelSerializer):
     author_name = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     thumbnail_image = serializers.ImageField(required=False, allow_null=True)
+    thumbnail_variants = ResizedImageField(source='thumbnail_image', presets=['blog_card', 'blog_cover'])
     
     def get_author_name(self, obj):
         """Get author's full name, return empty string if no author"""
@@ -19,7 +22,7 @@ class BlogPostSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'slug', 'content', 'author', 'author_name',
             'status', 'status_display', 'published_at', 'thumbnail_image',
-            'created_at', 'updated_at'
+            'thumbnail_variants', 'created_at', 'updated_at'
         ]
         read_only_fields = ['slug', 'created_at', 'updated_at']
 
@@ -28,12 +31,13 @@ class BlogPostListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for blog post lists"""
     author_name = serializers.CharField(source='author.full_name', read_only=True)
     excerpt = serializers.SerializerMethodField()
+    thumbnail_variants = ResizedImageField(source='thumbnail_image', presets=['blog_card'])
 
     class Meta:
         model = BlogPost
         fields = [
             'id', 'title', 'slug', 'author_name', 'status',
-            'published_at', 'thumbnail_image', 'excerpt', 'created_at'
+            'published_at', 'thumbnail_image', 'thumbnail_variants', 'excerpt', 'created_at'
         ]
         read_only_fields = ['slug', 'created_at']
 
@@ -48,11 +52,14 @@ class HeroSectionSerializer(serializers.ModelSerializer):
     layout_display = serializers.CharField(source='get_layout_display', read_only=True)
     text_alignment_display = serializers.CharField(source='get_text_alignment_display', read_only=True)
     button_variant_display = serializers.CharField(source='get_button_variant_display', read_only=True)
+    background_image_variants = ResizedImageField(
+        source='background_image', presets=['hero_large', 'hero_small']
+    )
 
     class Meta:
         model = HeroSection
         fields = [
-            'id', 'title', 'subtitle', 'background_image', 'button_text',
+            'id', 'title', 'subtitle', 'background_image', 'background_image_variants', 'button_text',
             'button_link', 'start_date', 'end_date',
             'layout', 'layout_display', 'text_alignment', 'text_alignment_display',
             'button_variant', 'button_variant_display', 'title_color',
@@ -89,14 +96,41 @@ class SocialFeedConfigSerializer(serializers.ModelSerializer):
 
 class PhotoSerializer(serializers.ModelSerializer):
     """Serializer for Photo model"""
+    srcset = serializers.SerializerMethodField()
+    sources = serializers.SerializerMethodField()
     
     class Meta:
         model = Photo
         fields = [
             'id', 'image', 'date', 'year', 'title', 'description',
+            'width', 'height', 'placeholder', 'srcset', 'sources',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['width', 'height', 'placeholder', 'created_at', 'updated_at']
+
+    def _derivative_url(self, obj, name):
+        url = obj.image.storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def _srcset(self, obj, fmt):
+        return ', '.join(
+            f"{self._derivative_url(obj, d['name'])} {d['width']}w"
+            for d in sorted(obj.derivatives or [], key=lambda d: d['width'])
+            if d['format'] == fmt
+        )
+
+    def get_srcset(self, obj):
+        """WebP srcset for a plain <img>; empty until derivatives exist"""
+        return self._srcset(obj, 'webp')
+
+    def get_sources(self, obj):
+        """One entry per derivative format, best compression first, for <picture>"""
+        formats = {d['format'] for d in obj.derivatives or []}
+        return [
+            {'type': MIME_TYPES[fmt], 'srcset': self._srcset(obj, fmt)}
+            for fmt in MIME_TYPES if fmt in formats
+        ]
     
     def validate(self, data):
         """Auto-populate year from date if not provided"""
@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.media import references
+from .facets import bump_photo_cache_version
+from .models import BlogPost, HeroSection, Photo
+
+
+def photo_media_names(photo):
+    """The original upload plus every generated derivative"""
+    names = references.file_field_names(photo)
+    names.update(d['name'] for d in photo.derivatives or [])
+    return names
+
+
+def photo_derivative_names(chunk_size):
+    rows = Photo.objects.exclude(derivatives=[]).values_list('derivatives', flat=True)
+    for derivatives in rows.iterator(chunk_size=chunk_size):
+        for derivative in derivatives or []:
+            yield derivative['name']
+
+
+references.track(Photo, photo_media_names)
+references.register_source(photo_derivative_names)
+references.track(BlogPost)
+references.track(HeroSection)
+
+
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+def photo_changed(sender, **kwargs):
+    """Invalidate cached photo facets on any photo write"""
+    bump_photo_cache_version()
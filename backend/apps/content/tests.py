@@ -1,3 +1,420 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import random
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.media.models import MediaBlob
+from .duplicates import duplicate_clusters, find_near_duplicates, index_photos, to_signed
+from .facets import photo_facets
+from .ingest import ingest_photos
+from apps.members.models import Member
+from .models import BlogPost, HeroSection, Photo
+
+
+BASE_HASH = 0x0123456789ABCDEF
+
+
+def jpeg(name='photo.jpg', color='red', size=(800, 600), exif=None):
+    image = Image.new('RGB', size, color)
+    # A shape, so that colours alone do not decide the perceptual hash
+    image.paste('white', (size[0] // 4, size[1] // 4, size[0] // 2, size[1] // 2))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', **({'exif': exif} if exif else {}))
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+class TemporaryMediaMixin:
+    """Stores files under a temporary MEDIA_ROOT, with fewer derivatives"""
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.media_root = root.name
+        media = override_settings(MEDIA_ROOT=root.name, PHOTO_DERIVATIVE_WIDTHS=(320, 640, 1280),
+                                  PHOTO_DERIVATIVE_FORMATS=('webp',))
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.media_root)
+            for directory, _, names in os.walk(self.media_root) for name in names
+        )
+
+
+class MediaTestCase(TemporaryMediaMixin, TestCase):
+    pass
+
+
+class PhotoDerivativeTests(MediaTestCase):
+    def test_derivatives_and_metadata(self):
+        photo = Photo.objects.create(image=jpeg(), date=date(2024, 5, 1))
+        photo.refresh_from_db()
+        self.assertEqual((photo.width, photo.height, photo.year), (800, 600, 2024))
+        self.assertTrue(photo.placeholder.startswith('data:image/webp;base64,'))
+        self.assertIsNotNone(photo.phash)
+        # Nothing is upscaled; the source width stands in for 1280
+        self.assertEqual(
+            [(d['width'], d['height'], d['format']) for d in photo.derivatives],
+            [(320, 240, 'webp'), (640, 480, 'webp'), (800, 600, 'webp')],
+        )
+        for derivative in photo.derivatives:
+            with Image.open(os.path.join(self.media_root, derivative['name'])) as image:
+                self.assertEqual(image.size, (derivative['width'], derivative['height']))
+        self.assertEqual(photo.hash_bands.count(), 6)
+
+    def test_rotated_upright_without_metadata(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6        # Orientation: rotate 90 degrees clockwise
+        exif[0x010F] = 'Camera Maker'
+        photo = Photo.objects.create(image=jpeg(exif=exif), date=date(2024, 5, 1))
+        photo.refresh_from_db()
+        self.assertEqual((photo.width, photo.height), (600, 800))
+        largest = photo.derivatives[-1]
+        self.assertEqual((largest['width'], largest['height']), (600, 800))
+        with Image.open(os.path.join(self.media_root, largest['name'])) as image:
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_twin_reuses_derivatives(self):
+        first = Photo.objects.create(image=jpeg('first.jpg'), date=date(2024, 5, 1))
+        files = self.stored_files()
+        with mock.patch('apps.content.images.render_derivatives') as render:
+            second = Photo.objects.create(image=jpeg('second.jpg'), date=date(2024, 5, 2))
+        render.assert_not_called()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(second.derivatives, first.derivatives)
+        self.assertEqual(second.phash, first.phash)
+        self.assertEqual(self.stored_files(), files)
+
+
+class IngestTests(TemporaryMediaMixin, TransactionTestCase):
+    # Uploads are stored from worker threads, on their own connections
+    def test_results_in_upload_order(self):
+        uploads = [
+            jpeg('a.jpg', 'red'),
+            SimpleUploadedFile('b.jpg', b'not an image', 'image/jpeg'),
+            jpeg('c.jpg', 'blue'),
+        ]
+        results = ingest_photos(uploads, date=date(2024, 5, 1), year=2024, title='Easter')
+        self.assertEqual([(r['index'], r['name'], r['status']) for r in results], [
+            (0, 'a.jpg', 'created'), (1, 'b.jpg', 'error'), (2, 'c.jpg', 'created'),
+        ])
+        self.assertIn('Not a valid image', results[1]['error'])
+        photos = Photo.objects.order_by('pk')
+        self.assertEqual([photo.title for photo in photos], ['Easter 1', 'Easter 3'])
+        self.assertTrue(all(photo.derivatives and photo.phash is not None for photo in photos))
+        self.assertEqual(photos[0].hash_bands.count(), 6)
+        # Originals and derivatives are each referenced once
+        self.assertEqual(set(MediaBlob.objects.values_list('ref_count', flat=True)), {1})
+
+    def test_failed_insert_leaves_no_files(self):
+        uploads = [jpeg('a.jpg', 'red'), jpeg('b.jpg', 'blue')]
+        with mock.patch.object(Photo.objects, 'bulk_create', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                ingest_photos(uploads, date=date(2024, 5, 1), year=2024)
+        self.assertFalse(Photo.objects.exists())
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+
+def add_photo(day, **fields):
+    """A photo row pointing at a file that is never read"""
+    return Photo.objects.create(image=f"photos/{day}.jpg", date=day, **fields)
+
+
+class ZipDownloadTests(MediaTestCase):
+    url = '/api/photos/download/'
+
+    def setUp(self):
+        super().setUp()
+        self.easter = Photo.objects.create(image=jpeg('easter.jpg', 'red'), date=date(2024, 5, 1),
+                                           title='Easter Sunday')
+        self.choir = Photo.objects.create(image=jpeg('choir.jpg', 'blue'), date=date(2024, 6, 9),
+                                          title='Choir')
+        Photo.objects.create(image=jpeg('old.jpg', 'green'), date=date(2023, 12, 24))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('archivist', email=''))
+
+    def download(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        return zipfile.ZipFile(io.BytesIO(b''.join(chunks))), chunks
+
+    def test_filtered_album(self):
+        archive, _ = self.download(year=2024)
+        # Newest first, like the list
+        self.assertEqual(archive.namelist(), [
+            f"2024-06-09/choir-{self.choir.pk}.jpg", f"2024-05-01/easter-sunday-{self.easter.pk}.jpg",
+        ])
+        entry = archive.getinfo(f"2024-05-01/easter-sunday-{self.easter.pk}.jpg")
+        self.assertEqual(entry.compress_type, zipfile.ZIP_STORED)
+        with self.easter.image.open('rb') as original:
+            self.assertEqual(archive.read(entry), original.read())
+        self.assertIsNone(archive.testzip())
+
+    def test_streamed_in_chunks(self):
+        with mock.patch('apps.content.archive.CHUNK_SIZE', 1024):
+            archive, chunks = self.download(date='2024-05-01')
+        self.assertEqual(len(archive.namelist()), 1)
+        self.assertGreater(len(chunks), 3)
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 1024 + 512)
+
+    def test_missing_files_are_listed(self):
+        os.remove(self.choir.image.path)
+        archive, _ = self.download(year=2024)
+        self.assertEqual(archive.read('MISSING.txt').decode(), f"{self.choir.image.name}\n")
+
+    def test_access(self):
+        self.assertEqual(APIClient().get(self.url).status_code, 401)
+        member = APIClient()
+        member.force_authenticate(User.objects.create_user('member'))
+        self.assertEqual(member.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, {'date': '2024-13-01'}).status_code, 400)
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for day in (date(2024, 5, 1), date(2024, 5, 1), date(2024, 6, 9), date(2023, 12, 24)):
+            add_photo(day)
+
+    def test_rollup(self):
+        self.assertEqual(photo_facets('year'), {'total': 4, 'years': [
+            {'year': 2024, 'count': 3}, {'year': 2023, 'count': 1},
+        ]})
+        self.assertEqual(photo_facets('date', 2024), {'total': 3, 'years': [
+            {'year': 2024, 'count': 3, 'months': [
+                {'month': 6, 'count': 1, 'dates': [{'date': '2024-06-09', 'count': 1}]},
+                {'month': 5, 'count': 2, 'dates': [{'date': '2024-05-01', 'count': 2}]},
+            ]},
+        ]})
+
+    def test_cached_until_a_photo_changes(self):
+        photo_facets('month')
+        with self.assertNumQueries(0):
+            self.assertEqual(photo_facets('month')['total'], 4)
+        photo = add_photo(date(2022, 1, 1))
+        self.assertEqual(photo_facets('month')['total'], 5)
+        photo.delete()
+        self.assertEqual(photo_facets('month')['total'], 4)
+
+    def test_endpoint(self):
+        response = APIClient().get('/api/photos/facets/', {'granularity': 'month', 'year': 2023})
+        self.assertEqual(response.json(), {'total': 1, 'years': [
+            {'year': 2023, 'count': 1, 'months': [{'month': 12, 'count': 1}]},
+        ]})
+        self.assertEqual(
+            APIClient().get('/api/photos/facets/', {'granularity': 'week'}).status_code, 400
+        )
+
+
+class GalleryTests(TestCase):
+    url = '/api/photos/gallery/'
+
+    def setUp(self):
+        same_moment = datetime(2024, 5, 1, 9, 30, tzinfo=timezone.utc)
+        self.tied = [add_photo(date(2024, 5, 1)) for _ in range(5)]
+        Photo.objects.filter(pk__in=[p.pk for p in self.tied]).update(created_at=same_moment)
+        self.newer = [add_photo(date(2024, 6, 1)) for _ in range(2)]
+        self.older = [add_photo(date(2023, 1, 1))]
+
+    def pages(self, **params):
+        client = APIClient()
+        response = client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            yield body
+            if not body['next']:
+                return
+            response = client.get(body['next'])
+
+    def test_every_photo_once_across_ties(self):
+        pages = list(self.pages(page_size=3))
+        seen = [photo['id'] for page in pages for group in page['groups'] for photo in group['photos']]
+        expected = ([p.pk for p in reversed(self.newer)] + [p.pk for p in reversed(self.tied)]
+                    + [self.older[0].pk])
+        self.assertEqual(seen, expected)
+        # The tied bucket fills one page on its own, so it is split
+        self.assertEqual([[g['date'] for g in page['groups']] for page in pages], [
+            ['2024-06-01'], ['2024-05-01'], ['2024-05-01', '2023-01-01'],
+        ])
+        self.assertEqual([page['continued'] for page in pages], [False, False, True])
+
+    def test_bucket_held_back_when_others_fit(self):
+        first = next(self.pages(page_size=4))
+        self.assertEqual([g['date'] for g in first['groups']], ['2024-06-01'])
+
+    def test_filters_apply(self):
+        [page] = self.pages(year=2023)
+        self.assertEqual([g['date'] for g in page['groups']], ['2023-01-01'])
+
+    def test_invalid_cursors(self):
+        def encoded(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+        for cursor in ['not-base64!', encoded(['2024-05-01', '2024-05-01T09:30:00']),
+                       encoded(['yesterday', '2024-05-01T09:30:00', 1]),
+                       encoded(['2024-05-01', 'noon', 1]), encoded(['2024-05-01', 5, 'x']),
+                       encoded({'date': 1})]:
+            with self.subTest(cursor=cursor):
+                response = APIClient().get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class FacetBulkInsertTests(TemporaryMediaMixin, TransactionTestCase):
+    def test_bulk_insert_invalidates_after_commit(self):
+        cache.clear()
+        add_photo(date(2024, 5, 1))
+        self.assertEqual(photo_facets()['total'], 1)
+        ingest_photos([jpeg('a.jpg', 'red'), jpeg('b.jpg', 'blue')], date=date(2024, 5, 2),
+                      year=2024)
+        self.assertEqual(photo_facets(), {'total': 3, 'years': [{'year': 2024, 'count': 3}]})
+
+
+class DuplicateClusterTests(TestCase):
+    def photo(self, phash):
+        photo = Photo.objects.create(image=f"photos/{phash:016x}.jpg", date=date(2024, 5, 1),
+                                     year=2024, phash=to_signed(phash))
+        index_photos([photo])
+        return photo
+
+    def setUp(self):
+        self.original = self.photo(BASE_HASH)
+        self.close = self.photo(BASE_HASH ^ 0xF)            # 4 bits from the original
+        self.further = self.photo(BASE_HASH ^ 0x1F << 20)   # 5 bits from it, 9 from close
+        self.unrelated = self.photo(~BASE_HASH & (1 << 64) - 1)
+
+    def test_distance_boundary(self):
+        self.assertEqual(duplicate_clusters(4), [
+            {'photo_ids': [self.original.pk, self.close.pk], 'max_distance': 4},
+        ])
+        self.assertEqual(duplicate_clusters(5), [
+            {'photo_ids': [self.original.pk, self.close.pk, self.further.pk], 'max_distance': 5},
+        ])
+        self.assertEqual(duplicate_clusters(3), [])
+
+    def test_near_duplicates_of_given_hashes(self):
+        query = {self.original.pk: self.original.phash, self.unrelated.pk: self.unrelated.phash}
+        with self.assertNumQueries(1):
+            matches = find_near_duplicates(query, 5)
+        self.assertEqual(matches, {
+            self.original.pk: [(self.close.pk, 4), (self.further.pk, 5)],
+        })
+        self.assertEqual(find_near_duplicates(query, 4), {self.original.pk: [(self.close.pk, 4)]})
+
+    def test_pairs_read_in_chunks(self):
+        expected = duplicate_clusters(5)
+        with mock.patch('apps.content.duplicates.PAIR_CHUNK_SIZE', 1):
+            self.assertEqual(duplicate_clusters(5), expected)
+
+    def test_endpoint_is_paginated(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            phash = rng.getrandbits(64)
+            self.photo(phash)
+            self.photo(phash ^ 1)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('curator', email=''))
+        first = client.get('/api/photos/duplicates/').json()
+        self.assertEqual(first['count'], 21)
+        self.assertEqual(len(first['results']), 20)
+        self.assertEqual(len(first['results'][0]['photos']), 2)
+        last = client.get(first['next']).json()
+        self.assertEqual(len(last['results']), 1)
+
+
+class PublicContentTests(TestCase):
+    """The async endpoints of the public site"""
+    PRIVATE_FIELDS = {'phone', 'email', 'address', 'date_of_birth', 'age'}
+
+    def setUp(self):
+        self.author = Member.objects.create(
+            first_name='Hana', last_name='Girma', gender='F',
+            phone='+251911000000', email='hana@example.com', address='Bole, Addis Ababa',
+        )
+        now = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        self.older = BlogPost.objects.create(title='Easter service', content='Join us at dawn',
+                                             author=self.author, status='published', published_at=now)
+        self.newer = BlogPost.objects.create(title='Choir news', content='New hymns',
+                                             author=self.author, status='published',
+                                             published_at=now + timedelta(days=1))
+        BlogPost.objects.create(title='Draft', content='Not yet', author=self.author)
+
+    def assertNoPrivateFields(self, body):
+        text = json.dumps(body)
+        for value in (self.author.phone, self.author.email, self.author.address):
+            self.assertNotIn(value, text)
+
+        def keys(value):
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    yield key
+                    yield from keys(item)
+            elif isinstance(value, list):
+                for item in value:
+                    yield from keys(item)
+        self.assertFalse(self.PRIVATE_FIELDS & set(keys(body)))
+
+    async def test_published_posts(self):
+        response = await self.async_client.get('/api/public/blog-posts/')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([post['title'] for post in body['results']], ['Choir news', 'Easter service'])
+        self.assertEqual(body['results'][0]['author_name'], self.author.full_name)
+        self.assertNoPrivateFields(body)
+
+        search = (await self.async_client.get('/api/public/blog-posts/', {'search': 'dawn'})).json()
+        self.assertEqual([post['slug'] for post in search['results']], [self.older.slug])
+        paged = (await self.async_client.get('/api/public/blog-posts/', {'page_size': 1, 'page': 2})).json()
+        self.assertEqual((paged['count'], paged['results'][0]['title']), (2, 'Easter service'))
+        self.assertEqual((await self.async_client.get('/api/public/blog-posts/', {'page': 3})).status_code, 404)
+
+    def test_same_posts_as_the_viewset(self):
+        public = self.client.get('/api/public/blog-posts/').json()
+        self.assertEqual(public, APIClient().get('/api/blog-posts/').json())
+
+    async def test_post_by_slug(self):
+        response = await self.async_client.get(f'/api/public/blog-posts/{self.newer.slug}/')
+        body = response.json()
+        self.assertEqual((body['title'], body['content']), ('Choir news', 'New hymns'))
+        self.assertNoPrivateFields(body)
+        draft = await BlogPost.objects.aget(title='Draft')
+        response = await self.async_client.get(f'/api/public/blog-posts/{draft.slug}/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_active_hero(self):
+        self.assertEqual((await self.async_client.get('/api/public/hero/')).status_code, 404)
+        now = datetime.now(timezone.utc)
+        await HeroSection.objects.acreate(title='Current', start_date=now - timedelta(days=1),
+                                          end_date=now + timedelta(days=1))
+        await HeroSection.objects.acreate(title='Latest')
+        body = (await self.async_client.get('/api/public/hero/')).json()
+        self.assertEqual(body['title'], 'Current')
+
+    async def test_photos(self):
+        for day in (date(2023, 6, 1), date(2024, 5, 1), date(2024, 7, 1)):
+            await Photo.objects.acreate(image=f'photos/{day}.jpg', date=day)
+        body = (await self.async_client.get('/api/public/photos/', {'year': 2024})).json()
+        self.assertEqual([photo['date'] for photo in body['results']], ['2024-07-01', '2024-05-01'])
+        self.assertEqual(body['count'], 2)
+        invalid = await self.async_client.get('/api/public/photos/', {'year': 'last'})
+        self.assertEqual((invalid.status_code, invalid.json()), (400, {'detail': 'Invalid year'}))
+        self.assertEqual((await self.async_client.post('/api/public/photos/')).status_code, 405)
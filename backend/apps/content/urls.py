@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import BlogPostViewSet, HeroSectionViewSet, SocialFeedConfigViewSet, PhotoViewSet
+from . import public_views
 
 router = DefaultRouter()
 router.register(r'blog-posts', BlogPostViewSet, basename='blog-post')
@@ -12,4 +13,9 @@ app_name = 'content'
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Async read endpoints for the public site
+    path('public/blog-posts/', public_views.public_blog_posts, name='public-blog-posts'),
+    path('public/blog-posts/<str:slug>/', public_views.public_blog_post, name='public-blog-post'),
+    path('public/hero/', public_views.public_active_hero, name='public-active-hero'),
+    path('public/photos/', public_views.public_photos, name='public-photos'),
 ]
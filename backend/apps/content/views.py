@@ -2,6 +2,7 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.timing import PhaseTimingMixin
 from .models import BlogPost, HeroSection, SocialFeedConfig, Photo
 from .serializers import (
     BlogPostSerializer, BlogPostListSerializer,
@@ -12,9 +13,10 @@ from .permissions import (
 )
 
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = BlogPost.objects.select_related('author').all()
     permission_classes = [BlogPostPermission]
+    query_budgets = {'list': 3, 'retrieve': 2}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'author']
     search_fields = ['title', 'content']
@@ -55,10 +57,11 @@ class BlogPostViewSet(viewsets.ModelViewSet):
             )
 
 
-class HeroSectionViewSet(viewsets.ModelViewSet):
+class HeroSectionViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = HeroSection.objects.all()
     serializer_class = HeroSectionSerializer
     permission_classes = [HeroSectionPermission]
+    query_budgets = {'list': 2}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['layout']
     search_fields = ['title', 'subtitle']
@@ -75,10 +78,11 @@ class HeroSectionViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'No active hero section'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class SocialFeedConfigViewSet(viewsets.ModelViewSet):
+class SocialFeedConfigViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = SocialFeedConfig.objects.all()
     serializer_class = SocialFeedConfigSerializer
     permission_classes = [SocialFeedConfigPermission]
+    query_budgets = {'list': 2}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['platform']
     search_fields = ['handle_or_page_id']
@@ -91,10 +95,11 @@ class SocialFeedConfigViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class PhotoViewSet(viewsets.ModelViewSet):
+class PhotoViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = Photo.objects.all()
     serializer_class = PhotoSerializer
     permission_classes = [PhotoPermission]
+    query_budgets = {'list': 3, 'retrieve': 2, 'gallery': 2, 'facets': 2}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['year']
     search_fields = ['title', 'description']
@@ -106,6 +111,124 @@ class PhotoViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def gallery(self, request):
+        """
+        Photos grouped by date, paginated by cursor instead of page number.
+        Supports the same filters as the list (e.g. year) without a count query.
+        """
+        from .pagination import PhotoGalleryPagination
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = PhotoGalleryPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """
+        Clusters of near-duplicate photos, largest first, paginated like the
+        list (``page``). Query param: distance=<0-5> (maximum Hamming distance
+        between perceptual hashes, default 4)
+        """
+        if not (request.user.is_authenticated and
+                (request.user.is_superuser or request.user.has_perm('content.manage_photo'))):
+            return Response(
+                {'detail': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        from .duplicates import DEFAULT_DISTANCE, duplicate_clusters
+        try:
+            distance = int(request.query_params.get('distance', DEFAULT_DISTANCE))
+        except ValueError:
+            return Response(
+                {'detail': 'Invalid distance'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Only the clusters on this page are loaded and serialized
+        clusters = self.paginate_queryset(duplicate_clusters(distance))
+        photo_ids = [photo_id for cluster in clusters for photo_id in cluster['photo_ids']]
+        photos = {
+            photo.id: photo for photo in self.get_queryset().filter(id__in=photo_ids)
+        }
+        data = []
+        for cluster in clusters:
+            members = [photos[photo_id] for photo_id in cluster['photo_ids'] if photo_id in photos]
+            if len(members) < 2:
+                continue
+            data.append({
+                'max_distance': cluster['max_distance'],
+                'photos': self.get_serializer(members, many=True).data,
+            })
+        
+        return self.get_paginated_response(data)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Distinct years (and optionally months or dates) with photo counts.
+        Query params: granularity=year|month|date, year=<int>
+        """
+        from .facets import GRANULARITIES, photo_facets
+        granularity = request.query_params.get('granularity', 'year')
+        if granularity not in GRANULARITIES:
+            return Response(
+                {'detail': f"granularity must be one of: {', '.join(GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        year = request.query_params.get('year')
+        if year:
+            try:
+                year = int(year)
+            except ValueError:
+                return Response(
+                    {'detail': 'Invalid year'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(photo_facets(granularity, year or None))
+
+    @action(detail=False, methods=['get'])
+    def download(self, request):
+        """
+        Stream a ZIP of the filtered photos (e.g. ?year=2024 or ?date=2024-05-12)
+        """
+        if not request.user.is_authenticated:
+            return Response(
+                {'detail': 'Authentication required'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        if not (request.user.is_superuser or request.user.has_perm('content.manage_photo')):
+            return Response(
+                {'detail': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        date = request.query_params.get('date')
+        if date:
+            from django.utils.dateparse import parse_date
+            try:
+                parsed = parse_date(date)
+            except ValueError:
+                parsed = None
+            if not parsed:
+                return Response(
+                    {'detail': 'Invalid date format'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(date=parsed)
+        
+        from django.http import StreamingHttpResponse
+        from .archive import stream_photo_zip
+        photos = queryset.only('id', 'image', 'date', 'title').iterator(chunk_size=200)
+        label = date or request.query_params.get('year') or 'all'
+        response = StreamingHttpResponse(stream_photo_zip(photos), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="photos-{label}.zip"'
+        return response
+
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         """Bulk create photos from multiple images"""
@@ -150,27 +273,44 @@ class PhotoViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        created_photos = []
-        errors = []
+        # Shared fields are validated once instead of once per image
+        shared = self.get_serializer(
+            data={'date': date, 'year': year, 'title': title, 'description': description},
+            partial=True
+        )
+        shared.is_valid(raise_exception=True)
         
-        for idx, image in enumerate(images):
-            try:
-                photo_data = {
-                    'image': image,
-                    'date': date,
-                    'year': year,
-                    'title': f"{title} {idx + 1}" if title else f"Photo {idx + 1}",
-                    'description': description,
-                }
-                serializer = self.get_serializer(data=photo_data)
-                serializer.is_valid(raise_exception=True)
-                photo = serializer.save()
-                created_photos.append(serializer.data)
-            except Exception as e:
-                errors.append(f"Image {idx + 1}: {str(e)}")
+        from .ingest import ingest_photos
+        warn_duplicates = str(request.data.get('warn_duplicates', '')).lower() in ('1', 'true', 'yes')
+        results = ingest_photos(
+            images,
+            date=shared.validated_data['date'],
+            year=shared.validated_data['year'],
+            title=shared.validated_data.get('title', ''),
+            description=shared.validated_data.get('description', ''),
+            warn_duplicates=warn_duplicates,
+        )
+        
+        created = [r['photo'] for r in results if r['status'] == 'created']
+        created_photos = self.get_serializer(created, many=True).data
+        errors = [
+            f"Image {r['index'] + 1}: {r['error']}"
+            for r in results if r['status'] == 'error'
+        ]
+        file_results = []
+        for r in results:
+            entry = {'index': r['index'], 'name': r['name'], 'status': r['status']}
+            if r['status'] == 'created':
+                entry['id'] = r['photo'].id
+                if 'near_duplicates' in r:
+                    entry['near_duplicates'] = r['near_duplicates']
+            else:
+                entry['error'] = r['error']
+            file_results.append(entry)
         
         return Response({
             'created': len(created_photos),
             'errors': errors,
-            'photos': created_photos
+            'photos': created_photos,
+            'results': file_results
         }, status=status.HTTP_201_CREATED if created_photos else status.HTTP_400_BAD_REQUEST)
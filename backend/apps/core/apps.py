@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+
+    def ready(self):
+        from apps.accounts.throttling import login_throttled
+        from .metrics import on_login_throttled
+        login_throttled.connect(on_login_throttled)
+
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+        from .timing import track_queries
+        connection_created.connect(track_queries)
+        for connection in connections.all(initialized_only=True):
+            track_queries(None, connection)
@@ -0,0 +1,76 @@
+"""Helpers for async read-only views.
+
+DRF views are synchronous: under ASGI each one holds a worker thread for the
+whole request. The public read paths are plain Django ``async def`` views
+instead, which fetch through the async ORM and then reuse the DRF serializers
+and JSON renderer on the loaded rows, so their responses match the viewsets'.
+Serializers must not touch the database: load every relation they read up
+front with ``select_related``.
+"""
+import math
+
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .timing import phase
+
+
+def render(request, data, status=200):
+    """A JSON response rendered the way DRF renders ``data``"""
+    with phase(request, 'render'):
+        content = JSONRenderer().render(data)
+    return HttpResponse(content, status=status, content_type='application/json')
+
+
+def not_found(request, detail):
+    return render(request, {'detail': detail}, status=404)
+
+
+def serialize(request, serializer_class, instance, many=False):
+    with phase(request, 'serialization'):
+        return serializer_class(instance, many=many, context={'request': request}).data
+
+
+async def fetch(queryset):
+    """Evaluate ``queryset`` through the async ORM"""
+    return [obj async for obj in queryset]
+
+
+async def paginate(request, queryset, serializer_class, max_page_size=100):
+    """
+    ``PageNumberPagination``'s response body for ``queryset``: ``count``,
+    ``next``, ``previous`` and ``results``, with an optional ``page_size``
+    query parameter up to ``max_page_size``. None for an invalid page.
+    """
+    try:
+        page_size = int(request.GET['page_size'])
+    except (KeyError, ValueError):
+        page_size = api_settings.PAGE_SIZE
+    page_size = max(1, min(page_size, max_page_size))
+
+    with phase(request, 'pagination'):
+        count = await queryset.acount()
+    pages = max(1, math.ceil(count / page_size))
+    number = request.GET.get('page', 1)
+    try:
+        number = pages if number == 'last' else int(number)
+    except ValueError:
+        return None
+    if not 1 <= number <= pages:
+        return None
+
+    offset = (number - 1) * page_size
+    rows = await fetch(queryset[offset:offset + page_size])
+    url = request.build_absolute_uri()
+    previous = None
+    if number > 1:
+        previous = (remove_query_param(url, 'page') if number == 2
+                    else replace_query_param(url, 'page', number - 1))
+    return {
+        'count': count,
+        'next': replace_query_param(url, 'page', number + 1) if number < pages else None,
+        'previous': previous,
+        'results': serialize(request, serializer_class, rows, many=True),
+    }
@@ -0,0 +1,440 @@
+"""Endpoint benchmarks over synthetic data.
+
+Every GET route of every API view is found by walking the URL resolver: the
+list, retrieve and custom actions of the viewsets and the plain API views.
+Each is requested through the test client, once to warm up and then a number
+of times, recording the status, the queries of the first request (cold
+caches), the queries of the last one and the latency spread.
+
+``run`` works in a throwaway test database, like the test runner, and
+generates each scale inside a transaction that is rolled back afterwards, so
+scales do not add up. A separate in-memory cache is used per scale, since
+cache invalidation is tied to commits that never happen here.
+
+``run_public`` compares the async public read endpoints under ASGI with the
+DRF viewset actions they mirror under WSGI, for the same number of concurrent
+clients: the sync side runs the WSGI handler on a fixed pool of threads, like
+a threaded worker, so requests queue once every thread is busy; the async
+side runs every request at once on one event loop through the ASGI handler.
+Both call Django's own handlers, as a server would, rather than the test
+clients: those keep database connections open across requests and, for ASGI,
+run every request's ORM calls on one thread. Its data is committed, since both sides read it
+from other threads. An optional per-statement delay stands in for the round
+trip to a database server, which an in-process SQLite database does not have.
+"""
+import asyncio
+import io
+import platform
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import django
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.viewsets import ViewSetMixin
+
+from .queries import QueryRecorder
+from .synthetic import generate
+
+
+def _walk(patterns, namespace=None):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from _walk(pattern.url_patterns, pattern.namespace or namespace)
+        else:
+            yield pattern, namespace
+
+
+def endpoints():
+    """
+    ``[(label, url_name, kwarg names, model)]`` for every named GET route of
+    a DRF view, skipping the ``.json``-style format suffix variants.
+    """
+    found = []
+    seen = set()
+    for pattern, namespace in _walk(get_resolver().url_patterns):
+        view = getattr(pattern.callback, 'cls', None)
+        if view is None or not pattern.name:
+            continue
+        kwargs = list(pattern.pattern.regex.groupindex)
+        if 'format' in kwargs:
+            continue
+        if issubclass(view, ViewSetMixin):
+            action = pattern.callback.actions.get('get')
+            if action is None:
+                continue
+            label = f"{view.__name__}.{action}"
+            model = getattr(view.queryset, 'model', None)
+        else:
+            if 'get' not in view.http_method_names or not hasattr(view, 'get'):
+                continue
+            label = pattern.name
+            model = None
+        if label in seen:
+            continue
+        seen.add(label)
+        name = f"{namespace}:{pattern.name}" if namespace else pattern.name
+        found.append((label, name, kwargs, model))
+    return found
+
+
+def _url(name, kwargs, model):
+    """The route's URL for the first row of its model, or None if it has none"""
+    if not kwargs:
+        return reverse(name)
+    if model is None:
+        return None
+    values = {}
+    for kwarg in kwargs:
+        field = 'pk' if kwarg == 'pk' else kwarg
+        value = model._default_manager.order_by('pk').values_list(field, flat=True).first()
+        if value is None:
+            return None
+        values[kwarg] = value
+    return reverse(name, kwargs=values)
+
+
+def _request(client, url):
+    response = client.get(url)
+    if getattr(response, 'streaming', False):
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response.status_code, size
+
+
+def measure(client, url, repeat):
+    """
+    Timings of ``url``, or ``{'url', 'status', 'error'}`` if it does not
+    answer with a 2xx: error pages are not worth timing.
+    """
+    with QueryRecorder() as cold:
+        status, size = _request(client, url)
+    if not 200 <= status < 300:
+        return {'url': url, 'status': status, 'error': f"HTTP {status}"}
+    timings = []
+    for _ in range(repeat):
+        with QueryRecorder() as warm:
+            started = time.perf_counter()
+            _request(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'url': url,
+        'status': status,
+        'bytes': size,
+        'queries_cold': cold.count,
+        'queries': warm.count,
+        'latency_ms': {
+            'min': round(min(timings), 2),
+            'median': round(statistics.median(timings), 2),
+            'max': round(max(timings), 2),
+        },
+    }
+
+
+def benchmark_scale(members, seed, repeat, anonymous=False, only=None, log=None):
+    from django.contrib.auth.models import User
+
+    results = {}
+    with transaction.atomic():
+        counts = generate(members, seed=seed)
+        client = APIClient()
+        if not anonymous:
+            client.force_authenticate(User.objects.create_superuser('benchmark', email=''))
+        for label, name, kwargs, model in endpoints():
+            if only and not any(part in label for part in only):
+                continue
+            url = _url(name, kwargs, model)
+            if url is None:
+                results[label] = {'skipped': 'no row to address'}
+                continue
+            results[label] = measure(client, url, repeat)
+            if log:
+                log(label, results[label])
+        transaction.set_rollback(True)
+    return {'counts': counts, 'endpoints': results}
+
+
+def run(scales, seed=0, repeat=5, anonymous=False, only=None, log=None):
+    """Benchmark every endpoint at each ``{name: members}`` scale"""
+    report = {
+        'created_at': timezone.now().isoformat(),
+        'seed': seed,
+        'repeat': repeat,
+        'user': 'anonymous' if anonymous else 'superuser',
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'scales': {},
+    }
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with tempfile.TemporaryDirectory() as media_root:
+            for scale, members in scales.items():
+                caches = {'default': {
+                    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': f"benchmark-{scale}",
+                }}
+                with override_settings(CACHES=caches, MEDIA_ROOT=media_root, DEBUG=False,
+                                       ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                                       QUERY_INSPECTION={'ENABLED': False},
+                                       REQUEST_TIMING={'ENABLED': False}):
+                    report['scales'][scale] = {
+                        'members': members,
+                        **benchmark_scale(members, seed, repeat, anonymous, only,
+                                          log and (lambda label, result: log(scale, label, result))),
+                    }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return report
+
+
+def compare(baseline, report, tolerance=0.25, min_ms=2.0):
+    """
+    Regressions of ``report`` against ``baseline``: an error where there was
+    none, more queries, or a median latency more than ``tolerance`` slower
+    (ignoring differences under ``min_ms``, which are noise).
+    """
+    regressions = []
+    for scale, current in report['scales'].items():
+        previous = baseline.get('scales', {}).get(scale, {}).get('endpoints', {})
+        for label, now in current['endpoints'].items():
+            before = previous.get(label)
+            if not before or 'skipped' in before or 'skipped' in now or 'error' in before:
+                continue
+            if 'error' in now:
+                regressions.append(f"{scale} {label}: {now['error']}, was HTTP {before['status']}")
+                continue
+            if now['queries'] > before['queries'] or now['queries_cold'] > before['queries_cold']:
+                regressions.append(
+                    f"{scale} {label}: queries {before['queries_cold']}/{before['queries']} "
+                    f"-> {now['queries_cold']}/{now['queries']} (cold/warm)"
+                )
+            was, is_ = before['latency_ms']['median'], now['latency_ms']['median']
+            if is_ - was > min_ms and is_ > was * (1 + tolerance):
+                regressions.append(f"{scale} {label}: median {was}ms -> {is_}ms")
+    return regressions
+
+
+# (label, sync DRF route, async route, model field for the URL's slug)
+PUBLIC_ENDPOINTS = [
+    ('blog list', 'content:blog-post-list', 'content:public-blog-posts', None),
+    ('blog detail', 'content:blog-post-by-slug', 'content:public-blog-post', 'slug'),
+    ('active hero', 'content:hero-section-active', 'content:public-active-hero', None),
+    ('photos', 'content:photo-list', 'content:public-photos', None),
+    # The members list is not public, so the staff page has no sync counterpart
+    ('staff', None, 'members:public-staff', None),
+]
+
+
+def _public_urls(sync_name, async_name, slug_field):
+    if slug_field is None:
+        return sync_name and reverse(sync_name), reverse(async_name)
+    from apps.content.models import BlogPost
+    slug = BlogPost.objects.filter(status='published').values_list(slug_field, flat=True).first()
+    if slug is None:
+        return None, None
+    return (sync_name and reverse(sync_name, kwargs={'slug': slug}),
+            reverse(async_name, kwargs={'slug': slug}))
+
+
+def _load_stats(url, latencies, statuses, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'url': url,
+        'statuses': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'median': round(statistics.median(latencies), 2),
+            'p95': round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+            'max': round(latencies[-1], 2),
+        },
+    }
+
+
+def _wsgi_get(application, url):
+    path, _, query = url.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1', 'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': True,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    status = []
+    body = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return int(status[0].split()[0])
+
+
+async def _asgi_get(application, url):
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query.encode(), 'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    requested = False
+    status = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client stays connected; the handler cancels this wait when done
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def sync_load(url, requests, concurrency, threads):
+    """
+    ``requests`` GETs of ``url`` from ``concurrency`` clients at once, served
+    by the WSGI handler on a pool of ``threads`` threads, as a threaded WSGI
+    server would. Latencies include the wait for a free thread.
+    """
+    application = WSGIHandler()
+
+    async def load(pool):
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def get():
+            async with limit:
+                started = time.perf_counter()
+                status = await loop.run_in_executor(pool, _wsgi_get, application, url)
+                return (time.perf_counter() - started) * 1000, status
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(get() for _ in range(requests)))
+        return results, time.perf_counter() - started
+
+    with ThreadPoolExecutor(threads) as pool:
+        results, elapsed = asyncio.run(load(pool))
+    return _load_stats(url, [r[0] for r in results], [r[1] for r in results], elapsed)
+
+
+def async_load(url, requests, concurrency):
+    """
+    ``requests`` GETs of ``url`` from ``concurrency`` clients at once, served
+    by the ASGI handler on one event loop, as an ASGI server would
+    """
+    application = ASGIHandler()
+
+    async def load():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def get():
+            async with limit:
+                started = time.perf_counter()
+                status = await _asgi_get(application, url)
+                return (time.perf_counter() - started) * 1000, status
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(get() for _ in range(requests)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(load())
+    return _load_stats(url, [r[0] for r in results], [r[1] for r in results], elapsed)
+
+
+class _StatementDelay:
+    """Sleeps before every statement, on every connection opened meanwhile"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, self)
+
+    def __enter__(self):
+        connection_created.connect(self.install)
+        for conn in connections.all(initialized_only=True):
+            self.install(None, conn)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+        for conn in connections.all(initialized_only=True):
+            if self in conn.execute_wrappers:
+                conn.execute_wrappers.remove(self)
+
+
+def run_public(members, seed=0, requests=200, concurrency=32, threads=8, db_latency_ms=0.0,
+               log=None):
+    """Compare the async public endpoints with their sync counterparts"""
+    report = {
+        'created_at': timezone.now().isoformat(),
+        'members': members,
+        'seed': seed,
+        'requests': requests,
+        'concurrency': concurrency,
+        'wsgi_threads': threads,
+        'db_latency_ms': db_latency_ms,
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'endpoints': {},
+    }
+    caches = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-public',
+    }}
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(CACHES=caches, MEDIA_ROOT=media_root, DEBUG=False,
+                                  ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                                  QUERY_INSPECTION={'ENABLED': False},
+                                  REQUEST_TIMING={'ENABLED': False}):
+            report['counts'] = generate(members, seed=seed)
+            with _StatementDelay(db_latency_ms / 1000) if db_latency_ms else nullcontext():
+                for label, sync_name, async_name, slug_field in PUBLIC_ENDPOINTS:
+                    sync_url, async_url = _public_urls(sync_name, async_name, slug_field)
+                    if async_url is None:
+                        report['endpoints'][label] = {'skipped': 'no row to address'}
+                        continue
+                    result = {'sync': None, 'async': None}
+                    if sync_url:
+                        sync_load(sync_url, concurrency, concurrency, threads)  # warm up
+                        result['sync'] = sync_load(sync_url, requests, concurrency, threads)
+                    async_load(async_url, concurrency, concurrency)
+                    result['async'] = async_load(async_url, requests, concurrency)
+                    report['endpoints'][label] = result
+                    if log:
+                        log(label, result)
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return report
@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmark import compare, run
+from apps.core.synthetic import SCALES
+
+
+class Command(BaseCommand):
+    help = (
+        'Time every GET endpoint (viewset list, retrieve and custom actions, API views) '
+        'over synthetic data at several scales, recording latency and query counts to a '
+        'JSON baseline. Runs in a throwaway test database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            default='small,medium',
+            help=f"Comma-separated presets ({', '.join(SCALES)}) or member counts",
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed requests per endpoint, after one warm-up request',
+        )
+        parser.add_argument(
+            '--anonymous',
+            action='store_true',
+            help='Request as an anonymous visitor instead of a superuser',
+        )
+        parser.add_argument(
+            '--only',
+            help='Comma-separated substrings; only matching endpoints are run, e.g. Member,Photo',
+        )
+        parser.add_argument(
+            '--output',
+            default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'),
+            help='Where to write the results',
+        )
+        parser.add_argument(
+            '--compare',
+            metavar='BASELINE',
+            help='Fail if any endpoint regressed against this earlier result file',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed relative slowdown of the median latency for --compare',
+        )
+
+    def _scales(self, value):
+        scales = {}
+        for part in filter(None, (p.strip() for p in value.split(','))):
+            if part in SCALES:
+                scales[part] = SCALES[part]
+            elif part.isdigit() and int(part) > 0:
+                scales[part] = int(part)
+            else:
+                raise CommandError(f"Unknown scale '{part}'")
+        if not scales:
+            raise CommandError('No scales given')
+        return scales
+
+    def _log(self, scale, label, result):
+        if 'skipped' in result:
+            self.stdout.write(f"  [{scale}] {label}: skipped, {result['skipped']}")
+            return
+        if 'error' in result:
+            self.stdout.write(self.style.WARNING(f"  [{scale}] {label}: {result['error']}, not timed"))
+            return
+        self.stdout.write(
+            f"  [{scale}] {label}: {result['status']}, "
+            f"{result['queries_cold']}/{result['queries']} queries (cold/warm), "
+            f"median {result['latency_ms']['median']}ms"
+        )
+
+    def handle(self, *args, **options):
+        scales = self._scales(options['scales'])
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline: {e}")
+
+        only = [part for part in (options['only'] or '').split(',') if part]
+        report = run(scales, seed=options['seed'], repeat=max(1, options['repeat']),
+                     anonymous=options['anonymous'], only=only, log=self._log)
+
+        results = [result for scale in report['scales'].values()
+                   for result in scale['endpoints'].values() if 'skipped' not in result]
+        errors = [result for result in results if 'error' in result]
+        if results and len(errors) == len(results):
+            raise CommandError(
+                f"Every endpoint failed ({errors[0]['error']} for {errors[0]['url']}); "
+                "nothing was measured and no results were written"
+            )
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{len(errors)} endpoint(s) returned errors"))
+
+        if baseline is not None:
+            regressions = compare(baseline, report, tolerance=options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
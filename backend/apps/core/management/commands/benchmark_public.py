@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmark import run_public
+from apps.core.synthetic import SCALES
+
+
+class Command(BaseCommand):
+    help = (
+        'Load the async public read endpoints (ASGI) and the DRF actions they mirror '
+        '(WSGI, on a fixed thread pool) with the same concurrent clients over synthetic '
+        'data, and compare throughput and latency. Runs in a throwaway test database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            default='small',
+            help=f"Preset ({', '.join(SCALES)}) or member count",
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Timed requests per endpoint and side, after a warm-up round',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Clients sending requests at once, on both sides',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Threads of the WSGI worker serving the sync side',
+        )
+        parser.add_argument(
+            '--db-latency',
+            type=float,
+            default=0.0,
+            metavar='MS',
+            help='Delay added to every statement, to stand in for a database server round trip',
+        )
+        parser.add_argument('--output', help='Also write the results to this JSON file')
+
+    def _log(self, label, result):
+        line = [f"  {label}:"]
+        for side in ('sync', 'async'):
+            stats = result[side]
+            if stats is None:
+                line.append(f"{side} n/a")
+                continue
+            line.append(
+                f"{side} {stats['throughput_rps']} req/s, median {stats['latency_ms']['median']}ms, "
+                f"p95 {stats['latency_ms']['p95']}ms {stats['statuses']}"
+            )
+        if result['sync'] and result['sync']['throughput_rps']:
+            ratio = result['async']['throughput_rps'] / result['sync']['throughput_rps']
+            line.append(f"(async x{ratio:.2f})")
+        self.stdout.write(' '.join(line))
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        if scale in SCALES:
+            members = SCALES[scale]
+        elif scale.isdigit() and int(scale) > 0:
+            members = int(scale)
+        else:
+            raise CommandError(f"Unknown scale '{scale}'")
+        if min(options['requests'], options['concurrency'], options['threads']) < 1:
+            raise CommandError('--requests, --concurrency and --threads must be positive')
+
+        report = run_public(members, seed=options['seed'], requests=options['requests'],
+                            concurrency=options['concurrency'], threads=options['threads'],
+                            db_latency_ms=max(0.0, options['db_latency']), log=self._log)
+
+        if options['output']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
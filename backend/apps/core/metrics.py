@@ -0,0 +1,141 @@
+"""Prometheus metrics.
+
+Collected with ``prometheus_client`` and exposed at ``/metrics`` in the text
+format. Under a multi-process server (gunicorn, uWSGI) set the
+``PROMETHEUS_MULTIPROC_DIR`` environment variable to an empty directory
+writable by every worker before they start: each process then records into
+its own memory-mapped files, which the endpoint merges when scraped. Updating
+a metric is a dictionary lookup and an in-memory add, in either mode.
+
+Labels are bounded: requests are labelled by the resolved view
+(``Viewset.action``), never by path, and cache reads by the key's namespace
+(the part before the first ``:``).
+"""
+import os
+
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.files.uploadhandler import FileUploadHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by view, method and status',
+    ['view', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce the response, by view and method',
+    ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries run per request, by view',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in database queries per request, by view',
+    ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_READS = Counter(
+    'cache_reads_total', 'Cache reads by key namespace and result (hit or miss)',
+    ['namespace', 'result'],
+)
+UPLOAD_SIZE = Histogram(
+    'upload_size_bytes', 'Size of each uploaded file',
+    buckets=(16e3, 64e3, 256e3, 1e6, 2.5e6, 5e6, 10e6, 25e6, 50e6),
+)
+AUTH_FAILURES = Counter(
+    'auth_failures_total', 'Rejected authentication: failed and throttled logins, invalid tokens',
+    ['reason'],
+)
+
+UNMATCHED = '<unmatched>'
+
+
+def registry():
+    """The registry to expose: merged across processes in multiprocess mode"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        merged = CollectorRegistry()
+        multiprocess.MultiProcessCollector(merged)
+        return merged
+    return REGISTRY
+
+
+def exposition():
+    """``(body, content_type)`` of the current metrics in the text format"""
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+
+def observe_request(view, method, status, duration, queries, db_duration):
+    view = view or UNMATCHED
+    REQUESTS.labels(view, method, str(status)).inc()
+    LATENCY.labels(view, method).observe(duration)
+    DB_QUERIES.labels(view).observe(queries)
+    DB_DURATION.labels(view).observe(db_duration)
+
+
+def record_auth_failure(reason):
+    AUTH_FAILURES.labels(reason).inc()
+
+
+def on_login_throttled(sender, kind, reason, **kwargs):
+    """``login_throttled`` receiver; a failed login is sent once per identifier"""
+    if reason != 'failure' or kind == 'ip':
+        record_auth_failure(f"login_{reason}")
+
+
+def _namespace(key):
+    return key.split(':', 1)[0] if isinstance(key, str) and ':' in key else 'other'
+
+
+_MISSING = object()
+
+
+class CacheMetricsMixin:
+    """
+    Counts hits and misses of ``get`` and ``get_many`` on a cache backend,
+    e.g. ``class RedisCache(CacheMetricsMixin, RedisCache)``.
+    Cache instances are per thread, so the re-entrancy flag is too.
+    """
+    _reading_many = False
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if not self._reading_many:
+            CACHE_READS.labels(_namespace(key), 'miss' if value is _MISSING else 'hit').inc()
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        # BaseCache.get_many() calls get() for each key: count once, here
+        self._reading_many = True
+        try:
+            found = super().get_many(keys, version=version)
+        finally:
+            self._reading_many = False
+        for key in keys:
+            CACHE_READS.labels(_namespace(key), 'hit' if key in found else 'miss').inc()
+        return found
+
+
+class LocMemCache(CacheMetricsMixin, BaseLocMemCache):
+    pass
+
+
+class UploadMetricsHandler(FileUploadHandler):
+    """
+    Records the size of every uploaded file and passes the data on untouched
+    to the next handler. Goes first in FILE_UPLOAD_HANDLERS.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        return raw_data
+
+    def file_complete(self, file_size):
+        UPLOAD_SIZE.observe(file_size)
+        return None
+
@@ -0,0 +1,194 @@
+import json
+import logging
+import time
+from contextlib import nullcontext
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject, empty
+
+from .metrics import observe_request
+from .queries import QueryRecorder, inspection_setting
+from .timing import RequestTimings, request_timings, timed_queries, timing_setting
+
+
+logger = logging.getLogger('apps.core.queries')
+timing_logger = logging.getLogger('apps.core.timing')
+
+
+def view_label(view_func, method):
+    """``Viewset.action`` for viewsets, else the view's name"""
+    view = getattr(view_func, 'cls', None)
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    if view is not None:
+        return f"{view.__name__}.{action}" if action else view.__name__
+    return getattr(view_func, '__name__', None)
+
+
+def request_view(request):
+    """The label of the view ``request`` resolved to, None if it matched none"""
+    match = getattr(request, 'resolver_match', None)
+    return view_label(match.func, request.method) if match else None
+
+
+def view_query_budget(view_func, method):
+    """
+    ``(budget, label)`` for the viewset action ``view_func`` dispatches
+    ``method`` to. Viewsets declare budgets as ``query_budgets = {action: n}``.
+    """
+    viewset = getattr(view_func, 'cls', None)
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    if viewset is None or action is None:
+        return None, None
+    return getattr(viewset, 'query_budgets', {}).get(action), f"{viewset.__name__}.{action}"
+
+
+class QueryInspectionMiddleware:
+    """
+    Count the queries of each request and flag budget overruns and N+1
+    patterns (one query shape repeated REPEAT_THRESHOLD times or more).
+    Adds X-Query-Count/X-Query-Budget headers. Enabled by
+    QUERY_INSPECTION['ENABLED']; with CALL_SITES the log names the code and
+    serializer field behind each repeated query. Sync only, as a development
+    aid: under ASGI it puts the views behind it on a thread.
+    """
+
+    def __init__(self, get_response):
+        if not inspection_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder(call_sites=inspection_setting('CALL_SITES')) as recorder:
+            response = self.get_response(request)
+
+        budget, label = getattr(request, '_query_budget', (None, None))
+        label = label or request.path
+        response['X-Query-Count'] = recorder.count
+        if budget is not None:
+            response['X-Query-Budget'] = budget
+            if recorder.count > budget:
+                logger.warning("%s %s ran %d queries, over its budget of %d",
+                               request.method, label, recorder.count, budget)
+        for shape, times in recorder.repeated():
+            logger.warning("Possible N+1 in %s %s: %d x %s%s",
+                           request.method, label, times, shape[:300],
+                           f" [{recorder.describe(shape)}]" if recorder.call_sites else '')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = view_query_budget(view_func, request.method)
+
+
+def metrics_setting(name):
+    defaults = {'ENABLED': True, 'ALLOWED_IPS': [], 'TOKEN': ''}
+    return getattr(settings, 'METRICS', {}).get(name, defaults[name])
+
+
+def _loaded_user(request):
+    """The request's user if something already loaded it; never runs a query"""
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+class RequestTimingMiddleware:
+    """
+    Time each request, its database work and, for views with
+    ``PhaseTimingMixin``, its DRF phases (see timing.py). Staff get the
+    result in a ``Server-Timing`` header; every request is logged as one
+    JSON line to ``apps.core.timing``, at WARNING from REQUEST_TIMING['SLOW_MS'].
+    Runs natively under both WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not timing_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = request._timings = RequestTimings()
+        started = time.perf_counter()
+        with timed_queries(timings):
+            response = self.get_response(request)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = request._timings = RequestTimings()
+        started = time.perf_counter()
+        with timed_queries(timings):
+            response = await self.get_response(request)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def finish(self, request, response, timings, total):
+        user = _loaded_user(request)
+        if timing_setting('HEADER') and user is not None and (user.is_staff or user.is_superuser):
+            response['Server-Timing'] = timings.header(total)
+            # Devtools only show cross-origin timings the server allows
+            origin = request.headers.get('Origin')
+            if origin and origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+                response['Timing-Allow-Origin'] = origin
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': request_view(request),
+            'status': response.status_code,
+            'user': user.pk if user is not None and user.is_authenticated else None,
+            **timings.as_dict(total),
+        }
+        level = logging.WARNING if total * 1000 >= timing_setting('SLOW_MS') else logging.INFO
+        timing_logger.log(level, json.dumps(record), extra={'timing': record})
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record each request's latency, status and database work, labelled by
+    view (see metrics.py). Reuses the database counts of
+    RequestTimingMiddleware when that is enabled; it must then come after
+    this one. Runs natively under both WSGI and ASGI. Enabled by
+    METRICS['ENABLED'].
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.reuse_timings = timing_setting('ENABLED')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        timings = None if self.reuse_timings else RequestTimings()
+        with timed_queries(timings) if timings else nullcontext():
+            response = self.get_response(request)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        timings = None if self.reuse_timings else RequestTimings()
+        with timed_queries(timings) if timings else nullcontext():
+            response = await self.get_response(request)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def finish(self, request, response, timings, duration):
+        timings = timings or request_timings(request)
+        observe_request(
+            request_view(request), request.method, response.status_code, duration,
+            timings.queries if timings else 0, timings.db if timings else 0.0,
+        )
+        return response
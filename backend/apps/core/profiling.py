@@ -0,0 +1,227 @@
+"""On-demand and sampled request profiling.
+
+``ProfilingMiddleware`` runs cProfile over a whole request when either
+a superuser asks for it, with an ``X-Profile: 1`` header or a ``?_profile=1``
+query flag, or the request falls in the sampled fraction
+PROFILING['SAMPLE_RATE'] (0 by default).
+
+Each profile is written to PROFILING['DIRECTORY'] as ``<id>.prof`` (pstats
+format, for snakeviz or ``python -m pstats``) next to ``<id>.json`` with the
+URL, view, user, status and timings. Only the newest MAX_PROFILES are kept.
+Requested profiles return their id in an ``X-Profile-Id`` header.
+
+cProfile is deterministic and slows the profiled request down, typically by
+a factor of 1.5 to 3; call counts and relative times remain representative.
+Only one request per process is profiled at a time. The middleware goes
+after ``AuthenticationMiddleware``, which sets the session user it checks, so
+the profile leaves out the middleware above it. Under ASGI the profile
+covers the event loop thread while the request is in flight: it includes
+other requests' coroutines running meanwhile, and not the queries the async
+ORM runs in its worker thread (their count and time are in the metadata).
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from .timing import request_timings
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.0,
+    'DIRECTORY': None,
+    'MAX_PROFILES': 200,
+}
+HEADER = 'X-Profile'
+QUERY_FLAG = '_profile'
+PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$")
+
+# cProfile cannot run in two threads of a process at once
+_active = threading.Lock()
+
+
+def profiling_setting(name):
+    return getattr(settings, 'PROFILING', {}).get(name, DEFAULTS[name])
+
+
+def profile_directory():
+    return Path(profiling_setting('DIRECTORY') or Path(settings.BASE_DIR) / 'profiles')
+
+
+def _requested(request):
+    flag = request.headers.get(HEADER) or request.GET.get(QUERY_FLAG)
+    return flag in ('1', 'true', 'yes')
+
+
+def _superuser(request):
+    """
+    The superuser behind ``request``, from the session or else statelessly
+    from its bearer token, so that anonymous requests never get profiled.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_superuser else None
+    from apps.accounts.authentication import DigestJWTAuthentication
+    try:
+        authenticated = DigestJWTAuthentication().authenticate(request)
+    except Exception:
+        return None
+    if authenticated and authenticated[0].is_superuser:
+        return authenticated[0]
+    return None
+
+
+def _new_id():
+    return f"{timezone.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+
+
+def save_profile(profiler, meta):
+    directory = profile_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f"{meta['id']}.prof")
+    (directory / f"{meta['id']}.json").write_text(json.dumps(meta, indent=2))
+    prune(directory, profiling_setting('MAX_PROFILES'))
+
+
+def prune(directory, keep):
+    # Ids start with the time, so names sort oldest first
+    for meta in sorted(directory.glob('*.json'))[:-keep or None]:
+        for path in (meta, meta.with_suffix('.prof')):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """Metadata of the stored profiles, newest first"""
+    profiles = []
+    for path in sorted(profile_directory().glob('*.json'), reverse=True):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def profile_path(profile_id):
+    """Path of a stored ``.prof`` file, or None for unknown or malformed ids"""
+    if not PROFILE_ID.match(profile_id or ''):
+        return None
+    path = profile_directory() / f"{profile_id}.prof"
+    return path if path.exists() else None
+
+
+def summary(path, limit=50, sort='cumulative'):
+    """The top ``limit`` functions of a profile as pstats text"""
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """See the module docstring. Enabled by PROFILING['ENABLED']."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not profiling_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        return random.random() < profiling_setting('SAMPLE_RATE')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        reason = user = None
+        if _requested(request):
+            user = _superuser(request)
+            reason = 'requested' if user is not None else None
+        if reason is None and self._sampled():
+            reason = 'sampled'
+        if reason is None or not _active.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - started
+        finally:
+            _active.release()
+
+        meta = self.metadata(request, response, reason, user, duration)
+        save_profile(profiler, meta)
+        if reason == 'requested':
+            response['X-Profile-Id'] = meta['id']
+        return response
+
+    async def __acall__(self, request):
+        reason = user = None
+        if _requested(request):
+            # Token authentication may need the database
+            user = await sync_to_async(_superuser)(request)
+            reason = 'requested' if user is not None else None
+        if reason is None and self._sampled():
+            reason = 'sampled'
+        if reason is None or not _active.acquire(blocking=False):
+            return await self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - started
+        finally:
+            _active.release()
+
+        meta = self.metadata(request, response, reason, user, duration)
+        await sync_to_async(save_profile)(profiler, meta)
+        if reason == 'requested':
+            response['X-Profile-Id'] = meta['id']
+        return response
+
+    def metadata(self, request, response, reason, user, duration):
+        from .middleware import _loaded_user, request_view
+        timings = request_timings(request)
+        user = user or _loaded_user(request)
+        return {
+            'id': _new_id(),
+            'created_at': timezone.now().isoformat(),
+            'reason': reason,
+            'method': request.method,
+            'url': request.get_full_path(),
+            'view': request_view(request),
+            'user': user.get_username() if user is not None and user.is_authenticated else None,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'queries': timings.queries if timings else None,
+            'db_ms': round(timings.db * 1000, 2) if timings else None,
+            'phases': {name: round(seconds * 1000, 2) for name, seconds in timings.phases.items()}
+            if timings else None,
+        }
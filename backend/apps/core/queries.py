@@ -0,0 +1,104 @@
+"""Per-request query recording and N+1 detection.
+
+``QueryRecorder`` hooks every connection's execute wrapper and counts the
+statements run inside it, grouped by *shape*: the SQL text with its parameter
+placeholders, ``IN (...)`` lists collapsed. Parameters are not part of the
+shape, so the same lookup repeated for each row of a list shows up as one
+shape executed many times, which is what an N+1 looks like. Optionally the
+call site and the serializer field being rendered are captured for each
+statement, to point at the code responsible.
+"""
+import re
+import sys
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+DEFAULTS = {
+    'ENABLED': False,
+    'REPEAT_THRESHOLD': 5,
+    'CALL_SITES': False,
+}
+
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+IGNORED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT')
+
+
+def inspection_setting(name):
+    return getattr(settings, 'QUERY_INSPECTION', {}).get(name, DEFAULTS[name])
+
+
+def query_shape(sql):
+    return IN_LIST.sub('(%s, ...)', ' '.join(sql.split()))
+
+
+def _serializer_field():
+    """Name of the serializer field being rendered, from the live stack"""
+    from rest_framework.fields import Field
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_name == 'to_representation':
+            field = frame.f_locals.get('field')
+            owner = frame.f_locals.get('self')
+            if isinstance(field, Field) and owner is not None:
+                return f"{type(owner).__name__}.{field.field_name}"
+        frame = frame.f_back
+    return None
+
+
+def _call_site():
+    """Innermost frame in project code (apps/), other than this app's own"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace('\\', '/')
+        if '/apps/' in filename and '/apps/core/' not in filename:
+            return f"{filename[filename.rindex('/apps/') + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryRecorder:
+    """Context manager counting queries on all connections, by shape"""
+
+    def __init__(self, call_sites=False):
+        self.call_sites = call_sites
+        self.shapes = Counter()
+        self.origins = defaultdict(Counter)
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = query_shape(sql)
+        if not shape.upper().startswith(IGNORED):
+            self.shapes[shape] += 1
+            if self.call_sites:
+                self.origins[shape][(_call_site(), _serializer_field())] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def count(self):
+        return sum(self.shapes.values())
+
+    def repeated(self, threshold=None):
+        """``[(shape, times)]`` executed at least ``threshold`` times, worst first"""
+        threshold = threshold or inspection_setting('REPEAT_THRESHOLD')
+        return [(shape, times) for shape, times in self.shapes.most_common() if times >= threshold]
+
+    def describe(self, shape):
+        """Where a shape was executed from, e.g. for a log line"""
+        places = []
+        for (site, field), times in self.origins.get(shape, Counter()).most_common(3):
+            where = ' at '.join(part for part in (field, site) if part) or 'unknown call site'
+            places.append(f"{times}x {where}")
+        return '; '.join(places)
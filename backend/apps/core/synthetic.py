@@ -0,0 +1,513 @@
+"""Seedable synthetic data at a configurable scale.
+
+``generate(members, seed)`` fills the database with a church of roughly
+``members`` people: households of a father, a mother and their children
+named the Ethiopian way (given name, father's given name, grandfather's given
+name), single members, zones with their groups, leaders and bible study
+groups, service divisions, user accounts in roles, blog posts, photos, hero
+sections, social feeds and a year of membership snapshots. Everything else is
+sized from the member count. The same seed and size always produce the same
+rows, apart from ids and timestamps.
+
+Rows are written with ``bulk_create``, which sends no signals, so the caches
+kept fresh by signals are invalidated explicitly once the transaction commits.
+"""
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from PIL import Image, ImageDraw
+
+
+SCALES = {
+    'small': 300,
+    'medium': 3000,
+    'large': 15000,
+}
+
+DEFAULT_PASSWORD = 'synthetic-password'
+
+MALE_NAMES = [
+    'Abebe', 'Alemayehu', 'Amanuel', 'Berhanu', 'Bekele', 'Biniam', 'Dawit', 'Daniel',
+    'Desta', 'Elias', 'Ermias', 'Eyob', 'Fikru', 'Girma', 'Getachew', 'Habtamu',
+    'Haile', 'Henok', 'Kebede', 'Kidus', 'Lemma', 'Mekonnen', 'Mesfin', 'Mulugeta',
+    'Nahom', 'Negash', 'Samuel', 'Solomon', 'Tadesse', 'Tesfaye', 'Teshome', 'Tewodros',
+    'Yared', 'Yohannes', 'Yonas', 'Zerihun', 'Abel', 'Bereket', 'Fitsum', 'Natnael',
+]
+FEMALE_NAMES = [
+    'Almaz', 'Aster', 'Bethlehem', 'Birtukan', 'Eden', 'Elsa', 'Etenesh', 'Feven',
+    'Genet', 'Hanna', 'Hiwot', 'Kidist', 'Lidya', 'Mahlet', 'Meron', 'Mekdes',
+    'Meseret', 'Meklit', 'Rahel', 'Ruth', 'Saba', 'Selam', 'Senait', 'Sara',
+    'Tigist', 'Tsion', 'Wubit', 'Yeshi', 'Yordanos', 'Zewditu', 'Helen', 'Blen',
+]
+NEIGHBOURHOODS = [
+    'Bole', 'Kazanchis', 'Piassa', 'Megenagna', 'CMC', 'Ayat', 'Gerji', 'Lebu',
+    'Sarbet', 'Mexico', 'Kality', 'Kotebe', 'Summit', 'Jemo', 'Gulele', 'Shiro Meda',
+    'Arat Kilo', 'Sidist Kilo', 'Kolfe', 'Akaki', 'Lideta', 'Addisu Gebeya', 'Saris',
+    'Gofa', 'Wello Sefer', 'Old Airport', 'Hayat', 'Tor Hailoch', 'Asko', 'Yeka',
+]
+SERVICE_DIVISIONS = [
+    'Choir', 'Ushers', 'Sunday School', 'Youth Ministry', 'Prayer Ministry', 'Media',
+    'Evangelism', 'Hospitality', "Women's Ministry", "Men's Ministry", 'Deacons',
+    'Worship Team',
+]
+STAFF_TITLES = [
+    'Senior Pastor', 'Associate Pastor', 'Youth Pastor', 'Worship Leader', 'Elder',
+    'Church Administrator', 'Finance Officer', 'Sunday School Coordinator',
+]
+ROLES = {
+    'Zone Leader': [
+        'structure.view_own_zone', 'structure.manage_own_zone',
+        'members.view_zone_members', 'members.manage_zone_members',
+    ],
+    'Service Leader': [
+        'structure.view_own_service_division', 'structure.manage_own_service_division',
+        'members.view_service_members', 'members.manage_service_members',
+    ],
+    'Content Editor': [
+        'content.manage_blog_post', 'content.manage_photo', 'content.manage_hero_section',
+    ],
+    'Membership Secretary': [
+        'members.manage_member', 'members.manage_family', 'members.manage_family_member',
+        'accounts.view_dashboard',
+    ],
+}
+POST_TOPICS = [
+    'Sunday Service', 'Youth Conference', 'Prayer Night', 'Baptism Celebration',
+    'Choir Anniversary', 'Easter Program', 'Christmas Program', 'Bible Study Retreat',
+    'Community Outreach', 'Timket Celebration', 'Meskel Gathering', 'Harvest Thanksgiving',
+]
+SENTENCES = [
+    'We gathered as one family to worship and give thanks.',
+    'The choir led us in songs of praise in Amharic and English.',
+    'Members from every zone came together for fellowship after the service.',
+    'Our youth shared testimonies of what God has done in their lives.',
+    'The message reminded us to love our neighbours as ourselves.',
+    'Volunteers prepared coffee and bread for everyone who attended.',
+    'Children from the Sunday School presented a short drama.',
+    'We prayed for the sick, for our city and for our nation.',
+    'New members were welcomed and introduced to their zone leaders.',
+    'Thank you to everyone who served to make this day possible.',
+]
+GROUP_SUFFIXES = ['Fellowship', 'Light', 'Hope', 'Grace', 'Vine', 'Cornerstone', 'Shalom']
+
+
+def _sized(members, per, minimum=1):
+    return max(minimum, round(members / per))
+
+
+def _unique(names, taken, separator=' '):
+    """``names`` made distinct from each other and from ``taken``"""
+    result = []
+    taken = set(taken)
+    for name in names:
+        candidate, counter = name, 2
+        while candidate in taken:
+            candidate = f"{name}{separator}{counter}"
+            counter += 1
+        taken.add(candidate)
+        result.append(candidate)
+    return result
+
+
+def _birth_date(rng, today, min_age, max_age):
+    return today - timedelta(days=rng.randint(min_age * 365, max_age * 365 + 364))
+
+
+def _phone(rng):
+    return f"+2519{rng.randint(10000000, 99999999)}"
+
+
+class _Generator:
+    def __init__(self, members, seed):
+        self.target = members
+        self.rng = random.Random(seed)
+        self.today = timezone.localdate()
+        self.counts = {}
+
+    def run(self):
+        from apps.accounts.dashboard import bump_dashboard_version
+        from apps.accounts.permission_cache import bump_global_version
+        from apps.content.facets import bump_photo_cache_version
+
+        with transaction.atomic():
+            self.structure()
+            self.people()
+            self.leadership()
+            self.accounts()
+            self.content()
+            self.photos()
+            self.snapshots()
+            transaction.on_commit(bump_dashboard_version)
+            transaction.on_commit(bump_global_version)
+            transaction.on_commit(bump_photo_cache_version)
+        return self.counts
+
+    def structure(self):
+        from apps.structure.models import ServiceDivision, Zone, ZoneGroup
+
+        zone_count = _sized(self.target, 120, minimum=3)
+        names = [NEIGHBOURHOODS[i % len(NEIGHBOURHOODS)] for i in range(zone_count)]
+        self.zones = Zone.objects.bulk_create([
+            Zone(name=name, description=f"Members living around {name}",
+                 location_hint=f"{name}, Addis Ababa")
+            for name in _unique(names, Zone.objects.values_list('name', flat=True))
+        ])
+        self.divisions = ServiceDivision.objects.bulk_create([
+            ServiceDivision(name=name, description=f"The {name} serving team")
+            for name in _unique(
+                SERVICE_DIVISIONS[:_sized(self.target, 50, minimum=4)],
+                ServiceDivision.objects.values_list('name', flat=True),
+            )
+        ])
+        zone_groups = ZoneGroup.objects.bulk_create([
+            ZoneGroup(zone=zone, group_type=group_type, name=f"{zone.name} {label}")
+            for zone in self.zones
+            for group_type, label in ZoneGroup.GROUP_TYPE_CHOICES
+        ])
+        self.counts.update(zones=len(self.zones), service_divisions=len(self.divisions),
+                           zone_groups=len(zone_groups))
+
+    def _member(self, gender, father_name, grandfather_name, min_age, max_age, zone, **extra):
+        from apps.members.models import Member
+
+        rng = self.rng
+        first_name = rng.choice(MALE_NAMES if gender == 'M' else FEMALE_NAMES)
+        adult = min_age >= 18
+        knows_birthday = rng.random() < 0.85
+        birth = _birth_date(rng, self.today, min_age, max_age)
+        return Member(
+            first_name=first_name,
+            father_name=father_name,
+            last_name=grandfather_name,
+            gender=gender,
+            date_of_birth=birth if knows_birthday else None,
+            age=None if knows_birthday else (self.today - birth).days // 365,
+            use_age_instead_of_birthdate=not knows_birthday,
+            phone=_phone(rng) if adult else '',
+            email=f"{first_name}.{father_name}{rng.randint(1, 999)}@example.com".lower()
+            if adult and rng.random() < 0.6 else '',
+            address=f"{zone.name}, Addis Ababa",
+            zone=zone,
+            service_division=rng.choice(self.divisions) if adult and rng.random() < 0.4 else None,
+            **extra
+        )
+
+    def _age(self, member):
+        if member.date_of_birth:
+            return (self.today - member.date_of_birth).days // 365
+        return member.age or 0
+
+    def _parent(self, gender, zone):
+        rng = self.rng
+        return self._member(
+            gender, rng.choice(MALE_NAMES), rng.choice(MALE_NAMES), 25, 65, zone
+        )
+
+    def people(self):
+        """Households of parents and children, plus members without a family"""
+        from apps.members.models import Family, FamilyMember, Member
+
+        rng = self.rng
+        households = []
+        total = 0
+        while total < self.target:
+            zone = rng.choice(self.zones)
+            if rng.random() < 0.15:
+                # Single adult
+                single = self._member(rng.choice('MF'), rng.choice(MALE_NAMES),
+                                      rng.choice(MALE_NAMES), 18, 80, zone)
+                households.append((None, [(single, None)]))
+                total += 1
+                continue
+            father = self._parent('M', zone)
+            people = [(father, 'father')]
+            if rng.random() < 0.9:
+                people.append((self._parent('F', zone), 'mother'))
+            oldest_child = min(25, min(self._age(parent) for parent, _ in people) - 18)
+            for _ in range(rng.choice([0, 1, 1, 2, 2, 3, 3, 4, 5])):
+                gender = rng.choice('MF')
+                # Children carry the father's name and the paternal grandfather's
+                child = self._member(gender, father.first_name, father.father_name,
+                                     0, oldest_child, zone)
+                people.append((child, 'son' if gender == 'M' else 'daughter'))
+            if rng.random() < 0.05:
+                people.append((self._parent(rng.choice('MF'), zone), 'guardian'))
+            households.append((Family(), people))
+            total += len(people)
+
+        self.members = Member.objects.bulk_create([
+            member for _, people in households for member, _ in people
+        ])
+        families = [family for family, _ in households if family is not None]
+        Family.objects.bulk_create(families)
+        links = []
+        heads = []
+        for family, people in households:
+            if family is None:
+                continue
+            for member, relationship in people:
+                links.append(FamilyMember(family=family, member=member, relationship=relationship))
+            # Some families are named through their members instead of a head
+            if rng.random() < 0.8:
+                family.head_member = people[0][0]
+                heads.append(family)
+        FamilyMember.objects.bulk_create(links)
+        Family.objects.bulk_update(heads, ['head_member'])
+
+        self.adults = [member for member in self.members if self._age(member) >= 18]
+        staff = rng.sample(self.adults, min(len(self.adults), _sized(self.target, 100, minimum=3)))
+        for member in staff:
+            member.is_staff_member = True
+            member.staff_title = rng.choice(STAFF_TITLES)
+            member.staff_bio = ' '.join(rng.sample(SENTENCES, 2))
+            member.show_in_staff_page = rng.random() < 0.8
+        Member.objects.bulk_update(staff, ['is_staff_member', 'staff_title', 'staff_bio',
+                                           'show_in_staff_page'])
+        self.staff = staff
+        self.counts.update(members=len(self.members), families=len(families),
+                           family_members=len(links), staff_members=len(staff))
+
+    def leadership(self):
+        from apps.structure.models import BibleStudyGroup, ServiceLeader, ZoneLeader
+
+        rng = self.rng
+        by_zone = {}
+        for member in self.members:
+            by_zone.setdefault(member.zone_id, []).append(member)
+        adults_by_zone = {}
+        for member in self.adults:
+            adults_by_zone.setdefault(member.zone_id, []).append(member)
+
+        self.zone_leaders = [
+            ZoneLeader(zone=zone, member=rng.choice(adults_by_zone[zone.pk]))
+            for zone in self.zones if adults_by_zone.get(zone.pk)
+        ]
+        ZoneLeader.objects.bulk_create(self.zone_leaders)
+        self.service_leaders = [
+            ServiceLeader(service_division=division, member=rng.choice(self.adults))
+            for division in self.divisions
+        ]
+        ServiceLeader.objects.bulk_create(self.service_leaders)
+
+        groups = []
+        for zone in self.zones:
+            residents = by_zone.get(zone.pk, [])
+            for _ in range(_sized(len(residents), 15) if residents else 0):
+                group = BibleStudyGroup(
+                    zone=zone,
+                    name=f"{zone.name} {rng.choice(GROUP_SUFFIXES)} Group",
+                    place_of_study=f"Home of the {rng.choice(MALE_NAMES)} family",
+                )
+                groups.append((group, residents))
+        BibleStudyGroup.objects.bulk_create([group for group, _ in groups])
+        Members = BibleStudyGroup.members.through
+        Leaders = BibleStudyGroup.leaders.through
+        memberships, leaderships = [], []
+        for group, residents in groups:
+            attendees = rng.sample(residents, min(len(residents), rng.randint(6, 15)))
+            memberships.extend(Members(biblestudygroup=group, member=member) for member in attendees)
+            leaderships.extend(
+                Leaders(biblestudygroup=group, member=member)
+                for member in attendees[:rng.randint(1, 2)]
+            )
+        Members.objects.bulk_create(memberships)
+        Leaders.objects.bulk_create(leaderships)
+        self.counts.update(zone_leaders=len(self.zone_leaders),
+                           service_leaders=len(self.service_leaders),
+                           bible_study_groups=len(groups))
+
+    def accounts(self):
+        """Accounts for staff and leaders, in roles matching what they lead"""
+        from apps.accounts.models import UserProfile
+        from apps.members.models import Member
+
+        roles = {}
+        for name, codes in ROLES.items():
+            role, _ = Group.objects.get_or_create(name=name)
+            wanted = [code.split('.') for code in codes]
+            role.permissions.add(*Permission.objects.filter(
+                content_type__app_label__in={app_label for app_label, _ in wanted},
+                codename__in={codename for _, codename in wanted},
+            ))
+            roles[name] = role
+
+        assignments = {}
+        for leader in self.zone_leaders:
+            assignments.setdefault(leader.member, set()).add('Zone Leader')
+        for leader in self.service_leaders:
+            assignments.setdefault(leader.member, set()).add('Service Leader')
+        for member in self.staff:
+            assignments.setdefault(member, set()).add(
+                self.rng.choice(['Content Editor', 'Membership Secretary'])
+            )
+
+        # One hash for every account: hashing is deliberately slow
+        password = make_password(DEFAULT_PASSWORD)
+        taken = set(User.objects.values_list('username', flat=True))
+        people = list(assignments)
+        usernames = _unique(
+            [f"{m.first_name}.{m.father_name}".lower() for m in people], taken
+        )
+        users = User.objects.bulk_create([
+            User(username=username, first_name=m.first_name, last_name=m.last_name,
+                 email=m.email, password=password, is_staff=m.is_staff_member)
+            for m, username in zip(people, usernames)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, father_name=m.father_name) for m, user in zip(people, users)
+        ])
+        for m, user in zip(people, users):
+            m.user = user
+        Member.objects.bulk_update(people, ['user'])
+        Membership = User.groups.through
+        Membership.objects.bulk_create([
+            Membership(user_id=user.pk, group_id=roles[name].pk)
+            for m, user in zip(people, users) for name in sorted(assignments[m])
+        ])
+        self.counts.update(users=len(users), roles=len(roles))
+
+    def content(self):
+        from apps.content.models import BlogPost, HeroSection, SocialFeedConfig
+
+        rng = self.rng
+        now = timezone.now()
+        authors = self.staff or self.adults
+        posts = []
+        titles = []
+        for _ in range(_sized(self.target, 20, minimum=5)):
+            topic = rng.choice(POST_TOPICS)
+            titles.append(f"{topic} {rng.randint(2016, self.today.year)}")
+        slugs = _unique([slugify(title) for title in titles],
+                        BlogPost.objects.values_list('slug', flat=True), separator='-')
+        for title, slug in zip(titles, slugs):
+            published = rng.random() < 0.85
+            posts.append(BlogPost(
+                title=title,
+                slug=slug,
+                content='\n\n'.join(
+                    ' '.join(rng.sample(SENTENCES, rng.randint(3, 6)))
+                    for _ in range(rng.randint(2, 6))
+                ),
+                author=rng.choice(authors),
+                status='published' if published else 'draft',
+                published_at=now - timedelta(days=rng.randint(0, 3 * 365)) if published else None,
+            ))
+        BlogPost.objects.bulk_create(posts)
+
+        HeroSection.objects.bulk_create([
+            HeroSection(
+                title=rng.choice(POST_TOPICS),
+                subtitle=rng.choice(SENTENCES),
+                button_text='Learn more',
+                button_link='/blog',
+                start_date=now - timedelta(days=30 * (i + 1)),
+                end_date=now + timedelta(days=30) if i == 0 else now - timedelta(days=30 * i),
+                layout=rng.choice(HeroSection.LAYOUT_CHOICES)[0],
+            )
+            for i in range(3)
+        ])
+        SocialFeedConfig.objects.bulk_create([
+            SocialFeedConfig(platform=platform, handle_or_page_id=f"synthetic-church-{platform}")
+            for platform, _ in SocialFeedConfig.PLATFORM_CHOICES
+        ])
+        self.counts.update(blog_posts=len(posts), hero_sections=3,
+                           social_feeds=len(SocialFeedConfig.PLATFORM_CHOICES))
+
+    def _image(self, index):
+        """A small JPEG with distinct shapes, so perceptual hashes differ"""
+        rng = self.rng
+        image = Image.new('RGB', (480, 320), tuple(rng.randint(0, 255) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(6):
+            x, y = rng.randint(0, 440), rng.randint(0, 280)
+            size = rng.randint(20, 160)
+            draw.ellipse([x, y, x + size, y + size],
+                         fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=80)
+        return SimpleUploadedFile(f"synthetic-{index}.jpg", buffer.getvalue(), 'image/jpeg')
+
+    def photos(self):
+        """
+        Event photos grouped by date. A bounded set of distinct images is
+        rendered once and shared between photos, like re-uploaded pictures;
+        every image is used, so none is left unreferenced in the media root.
+        """
+        from apps.content.duplicates import index_photos
+        from apps.content.ingest import process_upload
+        from apps.content.models import Photo
+        from apps.media import references
+
+        rng = self.rng
+        count = _sized(self.target, 10, minimum=10)
+        sources = [process_upload(self._image(i)) for i in range(min(count, 40))]
+        # Round-robin, then shuffled: each source at least once
+        picks = [sources[i % len(sources)] for i in range(count)]
+        rng.shuffle(picks)
+        photos = []
+        event_count = max(1, count // 8)
+        events = sorted(
+            self.today - timedelta(days=rng.randint(0, 3 * 365)) for _ in range(event_count)
+        )
+        for i in range(count):
+            event = events[i % event_count]
+            photos.append(Photo(
+                date=event,
+                year=event.year,
+                title=f"{rng.choice(POST_TOPICS)} {i + 1}",
+                description=rng.choice(SENTENCES),
+                **picks[i]
+            ))
+        Photo.objects.bulk_create(photos)
+        index_photos(photos)
+        references.retain(
+            name for photo in photos
+            for name in [photo.image.name, *(d['name'] for d in photo.derivatives)]
+        )
+        self.counts.update(photos=len(photos))
+
+    def snapshots(self):
+        """A year of daily totals growing towards today's"""
+        from apps.members.models import MembershipSnapshot, ZoneMembershipSnapshot
+
+        days = 365
+        start = self.today - timedelta(days=days - 1)
+        existing = set(MembershipSnapshot.objects.filter(date__gte=start)
+                       .values_list('date', flat=True))
+        zone_members = {}
+        for member in self.members:
+            zone_members[member.zone_id] = zone_members.get(member.zone_id, 0) + 1
+        totals, per_zone = [], []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            if day in existing:
+                continue
+            share = 0.7 + 0.3 * offset / (days - 1)
+            totals.append(MembershipSnapshot(
+                date=day,
+                members=round(len(self.members) * share),
+                staff_members=round(len(self.staff) * share),
+                families=round(self.counts['families'] * share),
+                zones=len(self.zones),
+                service_divisions=len(self.divisions),
+            ))
+            per_zone.extend(
+                ZoneMembershipSnapshot(date=day, zone=zone, zone_name=zone.name,
+                                       members=round(zone_members.get(zone.pk, 0) * share))
+                for zone in self.zones
+            )
+        MembershipSnapshot.objects.bulk_create(totals)
+        ZoneMembershipSnapshot.objects.bulk_create(per_zone)
+        self.counts.update(snapshots=len(totals))
+
+
+def generate(members, seed=0):
+    """Create about ``members`` members and everything around them; returns row counts"""
+    return _Generator(members, seed).run()
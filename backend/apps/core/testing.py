@@ -0,0 +1,42 @@
+"""Test helpers for query budgets.
+
+    class MemberApiTests(QueryBudgetMixin, APITestCase):
+        def test_list(self):
+            with self.assertWithinQueryBudget(MemberViewSet, 'list'):
+                self.client.get('/api/members/')
+
+The block fails if it runs more queries than the action's declared
+``query_budgets`` entry, or repeats any query shape REPEAT_THRESHOLD times
+(an N+1); the failure lists the offending statements and their call sites.
+"""
+from contextlib import contextmanager
+
+from .queries import QueryRecorder
+
+
+@contextmanager
+def query_budget(viewset, action, repeat_threshold=None):
+    budget = getattr(viewset, 'query_budgets', {}).get(action)
+    if budget is None:
+        raise AssertionError(f"{viewset.__name__} declares no query budget for '{action}'")
+
+    with QueryRecorder(call_sites=True) as recorder:
+        yield recorder
+
+    problems = []
+    if recorder.count > budget:
+        problems.append(
+            f"{viewset.__name__}.{action} ran {recorder.count} queries, budget is {budget}:"
+        )
+        problems.extend(f"  {times} x {shape}" for shape, times in recorder.shapes.most_common())
+    for shape, times in recorder.repeated(repeat_threshold):
+        problems.append(f"N+1: {times} x {shape}\n    from {recorder.describe(shape)}")
+    if problems:
+        raise AssertionError('\n'.join(problems))
+
+
+class QueryBudgetMixin:
+    """Adds ``assertWithinQueryBudget`` to a TestCase"""
+
+    def assertWithinQueryBudget(self, viewset, action, repeat_threshold=None):
+        return query_budget(viewset, action, repeat_threshold)
@@ -0,0 +1,168 @@
+import logging
+import tempfile
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import resolve
+from rest_framework.test import APIClient
+
+from apps.content.models import Photo
+from apps.media.models import MediaBlob
+from apps.structure.models import Zone
+from .benchmark import _url, endpoints
+from .profiling import list_profiles
+from .synthetic import generate
+from .testing import QueryBudgetMixin
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every declared ``query_budgets`` entry holds over synthetic data"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.TemporaryDirectory()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root.name)
+        cls.media.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media.disable()
+        cls.media_root.cleanup()
+
+    @classmethod
+    def setUpTestData(cls):
+        generate(60, seed=1)
+        cls.superuser = User.objects.create_superuser('budget', email='')
+
+    def test_declared_budgets(self):
+        client = APIClient()
+        client.force_authenticate(self.superuser)
+        checked = 0
+        for label, name, kwargs, model in endpoints():
+            url = _url(name, kwargs, model)
+            if url is None:
+                continue
+            view = resolve(url).func
+            viewset, action = view.cls, getattr(view, 'actions', {}).get('get')
+            if action not in getattr(viewset, 'query_budgets', {}):
+                continue
+            with self.subTest(label):
+                cache.clear()
+                with self.assertWithinQueryBudget(viewset, action):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                checked += 1
+        self.assertGreater(checked, 0)
+
+
+class SyntheticPhotoTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media = override_settings(MEDIA_ROOT=media_root.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_every_stored_image_is_referenced(self):
+        generate(60, seed=1)
+        self.assertTrue(Photo.objects.exists())
+        self.assertFalse(MediaBlob.objects.filter(ref_count__lt=1).exists())
+
+
+class MetricsAccessTests(TestCase):
+    url = '/metrics'
+
+    def scrape(self, ip='127.0.0.1', **extra):
+        return self.client.get(self.url, REMOTE_ADDR=ip, **extra)
+
+    @override_settings(METRICS={'TOKEN': ''})
+    def test_loopback_is_not_trusted_by_default(self):
+        # Behind a local proxy every external request comes from loopback
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape('::1').status_code, 403)
+
+    @override_settings(METRICS={'TOKEN': 's3cret'})
+    def test_bearer_token(self):
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.scrape().status_code, 403)
+
+    @override_settings(METRICS={'TOKEN': ''})
+    def test_empty_token_never_matches(self):
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    @override_settings(METRICS={'ALLOWED_IPS': ['10.0.0.5']})
+    def test_allowed_ips(self):
+        self.assertEqual(self.scrape('10.0.0.5').status_code, 200)
+        self.assertEqual(self.scrape('10.0.0.6').status_code, 403)
+
+
+class ProfilingTests(TestCase):
+    url = '/admin/?_profile=1'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        profiling = override_settings(PROFILING={'DIRECTORY': directory.name, 'SAMPLE_RATE': 0.0})
+        profiling.enable()
+        self.addCleanup(profiling.disable)
+
+    def test_session_superuser_gets_a_profile(self):
+        self.client.force_login(User.objects.create_superuser('profiler', email=''))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        [profile] = list_profiles()
+        self.assertEqual(response['X-Profile-Id'], profile['id'])
+        self.assertEqual(profile['user'], 'profiler')
+
+    def test_other_users_are_not_profiled(self):
+        self.assertNotIn('X-Profile-Id', self.client.get(self.url))
+        self.client.force_login(User.objects.create_user('member'))
+        self.assertNotIn('X-Profile-Id', self.client.get(self.url))
+        self.assertEqual(list_profiles(), [])
+
+
+class RequestTimingTests(TestCase):
+    url = '/api/zones/'
+
+    def setUp(self):
+        Zone.objects.create(name='North')
+        self.client = APIClient()
+
+    def get(self, user, **extra):
+        self.client.force_authenticate(user)
+        with self.assertLogs('apps.core.timing', logging.INFO) as logs:
+            response = self.client.get(self.url, **extra)
+        self.assertEqual(response.status_code, 200)
+        [record] = logs.records
+        return response, record
+
+    def test_staff_get_server_timing(self):
+        response, record = self.get(User.objects.create_superuser('admin', email=''),
+                                    HTTP_ORIGIN='http://localhost:3000')
+        timing = record.timing
+        self.assertEqual((timing['view'], timing['status'], timing['path']), ('ZoneViewSet.list', 200, self.url))
+        self.assertGreater(timing['queries'], 0)
+        self.assertTrue({'auth', 'permissions', 'filters', 'pagination', 'serialization', 'render'}
+                        <= set(timing['phases']))
+
+        entries = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+        self.assertEqual(entries, [*timing['phases'], 'db', 'total'])
+        self.assertIn(f'desc="{timing["queries"]} queries"', response['Server-Timing'])
+        self.assertEqual(response['Timing-Allow-Origin'], 'http://localhost:3000')
+
+    def test_other_users_are_only_logged(self):
+        user = User.objects.create_user('member')
+        user.user_permissions.add(Permission.objects.get(codename='view_zone'))
+        response, record = self.get(user)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual((record.levelno, record.timing['user']), (logging.INFO, user.pk))
+
+    @override_settings(REQUEST_TIMING={'SLOW_MS': 0, 'HEADER': False})
+    def test_slow_requests_warn(self):
+        response, record = self.get(User.objects.create_superuser('admin', email=''))
+        self.assertEqual(record.levelno, logging.WARNING)
+        self.assertNotIn('Server-Timing', response)
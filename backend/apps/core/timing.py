@@ -0,0 +1,168 @@
+"""Per-phase request timing.
+
+``RequestTimingMiddleware`` attaches a ``RequestTimings`` to each request,
+which counts and times the statements run on every connection. Views with
+``PhaseTimingMixin`` add the phases DRF goes through: authentication,
+permission checks, filter backends, pagination, serialization and rendering.
+The phases run one after the other; database time overlaps them, since
+queries run inside filtering, pagination and serialization.
+
+The result goes to the ``Server-Timing`` header for staff, where browser
+devtools show it next to the request, and to a structured log line for every
+request.
+
+Statements are counted by one execute wrapper per connection, installed when
+the connection opens, feeding the timings of the current context. Context
+variables follow the async ORM into the thread it runs queries on, so async
+views are counted as well as sync ones.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'HEADER': True,
+    'SLOW_MS': 1000,
+}
+
+
+def timing_setting(name):
+    return getattr(settings, 'REQUEST_TIMING', {}).get(name, DEFAULTS[name])
+
+
+class RequestTimings:
+    """Phase durations and database work of one request"""
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        self.db = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # A connection execute wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def as_dict(self, total):
+        return {
+            'duration_ms': round(total * 1000, 2),
+            'db_ms': round(self.db * 1000, 2),
+            'queries': self.queries,
+            'phases': {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+        }
+
+    def header(self, total):
+        """``Server-Timing`` value, e.g. ``auth;dur=0.4, db;dur=3.1;desc="4 queries", ...``"""
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        queries = f"{self.queries} quer{'y' if self.queries == 1 else 'ies'}"
+        entries.append(f'db;dur={self.db * 1000:.2f};desc="{queries}"')
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ', '.join(entries)
+
+
+_current = ContextVar('request_timings', default=None)
+
+
+def _record(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def track_queries(sender, connection, **kwargs):
+    """``connection_created`` receiver; also call it on connections already open"""
+    if _record not in connection.execute_wrappers:
+        # First: connection.execute_wrapper() blocks pop() the last entry on exit
+        connection.execute_wrappers.insert(0, _record)
+
+
+@contextmanager
+def timed_queries(timings):
+    """Count the statements run in this context, in any thread, into ``timings``"""
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def request_timings(request):
+    """The timings of ``request`` (a Django or DRF request), if it is being timed"""
+    request = getattr(request, '_request', request)
+    return getattr(request, '_timings', None)
+
+
+@contextmanager
+def phase(request, name):
+    timings = request_timings(request)
+    if timings is None:
+        yield
+    else:
+        with timings.phase(name):
+            yield
+
+
+def _timed(func, request, name):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with phase(request, name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class PhaseTimingMixin:
+    """Times the DRF phases of a view into its request's ``RequestTimings``"""
+
+    def perform_authentication(self, request):
+        with phase(request, 'auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with phase(request, 'permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with phase(request, 'permissions'):
+            super().check_object_permissions(request, obj)
+
+    def filter_queryset(self, queryset):
+        with phase(self.request, 'filters'):
+            return super().filter_queryset(queryset)
+
+    def paginate_queryset(self, queryset):
+        with phase(self.request, 'pagination'):
+            return super().paginate_queryset(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if request_timings(self.request) is not None:
+            # Serializers render lazily, when .data is first read
+            serializer.to_representation = _timed(
+                serializer.to_representation, self.request, 'serialization'
+            )
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request_timings(request) is not None and callable(getattr(response, 'render', None)):
+            # The handler renders the response after the view returns
+            response.render = _timed(response.render, request, 'render')
+        return response
@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import metrics, profile_download, profiles
+
+app_name = 'core'
+
+urlpatterns = [
+    path('metrics', metrics, name='metrics'),
+    path('api/profiles/', profiles, name='profiles'),
+    path('api/profiles/<str:profile_id>/', profile_download, name='profile-download'),
+]
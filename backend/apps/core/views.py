@@ -0,0 +1,73 @@
+import hmac
+
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .middleware import metrics_setting
+
+
+def _authorized(request):
+    token = metrics_setting('TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if hmac.compare_digest(supplied.encode(), token.encode()):
+            return True
+    return request.META.get('REMOTE_ADDR') in metrics_setting('ALLOWED_IPS')
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape endpoint. Open to requests bearing METRICS['TOKEN']
+    (``bearer_token`` in the scrape config) and to METRICS['ALLOWED_IPS'],
+    which is empty by default: behind a local proxy every client would
+    otherwise share the proxy's loopback address.
+    """
+    if not metrics_setting('ENABLED'):
+        raise Http404
+    if not _authorized(request):
+        return HttpResponseForbidden('Forbidden')
+
+    from .metrics import exposition
+    body, content_type = exposition()
+    return HttpResponse(body, content_type=content_type)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def profiles(request):
+    """Stored request profiles, newest first (see profiling.py)"""
+    if not (request.user.is_staff or request.user.is_superuser):
+        return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    from .profiling import list_profiles
+    return Response(list_profiles())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def profile_download(request, profile_id):
+    """
+    Download one profile in pstats format, or with ?summary=1 its top
+    functions as text. Query param for the summary: sort (default cumulative)
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    from .profiling import profile_path, summary
+    path = profile_path(profile_id)
+    if path is None:
+        return Response({'detail': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.query_params.get('summary') in ('1', 'true', 'yes'):
+        sort = request.query_params.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'calls'):
+            return Response(
+                {'detail': 'sort must be one of: cumulative, tottime, calls'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return HttpResponse(summary(path, sort=sort), content_type='text/plain; charset=utf-8')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name,
+                        content_type='application/octet-stream')
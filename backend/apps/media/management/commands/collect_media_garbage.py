@@ -0,0 +1,149 @@
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.media import references
+from apps.media.models import MediaBlob
+from apps.media.resize import cache_root, source_digests, stale_variants
+
+
+def walk_files(root):
+    """Yield (relative name, path, stat) for every file below ``root``, lazily"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    name = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                    yield name, entry.path, entry.stat(follow_symlinks=False)
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete or quarantine files under MEDIA_ROOT that no model references, and '
+        'delete cached resized variants of them. Intended to run from cron, e.g. nightly: '
+        '"python manage.py collect_media_garbage --quarantine /var/quarantine/media"'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report unreferenced files and reclaimable bytes',
+        )
+        parser.add_argument(
+            '--quarantine',
+            metavar='DIR',
+            help='Move unreferenced files here (keeping their relative path) instead of deleting them',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=getattr(settings, 'MEDIA_GC_GRACE_HOURS', 24),
+            help='Ignore files modified more recently than this (in-flight uploads)',
+        )
+        parser.add_argument(
+            '--verbose-list',
+            action='store_true',
+            help='Print every unreferenced file',
+        )
+
+    def handle(self, *args, **options):
+        root = str(settings.MEDIA_ROOT)
+        quarantine = options['quarantine']
+        if quarantine:
+            quarantine = os.path.abspath(quarantine)
+            if quarantine == root or quarantine.startswith(root + os.sep):
+                raise CommandError('The quarantine directory must be outside MEDIA_ROOT')
+        cutoff = time.time() - options['grace_hours'] * 3600
+
+        referenced = set(references.referenced_names())
+        self.stdout.write(f"{len(referenced)} referenced file(s)")
+
+        scanned = orphaned = reclaimable = 0
+        removed_blobs = []
+        for name, path, stat in walk_files(root):
+            scanned += 1
+            if name in referenced or stat.st_mtime > cutoff:
+                continue
+            orphaned += 1
+            reclaimable += stat.st_size
+            if options['verbose_list']:
+                self.stdout.write(f"  {name} ({format_bytes(stat.st_size)})")
+            if options['dry_run']:
+                continue
+
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            removed_blobs.append(name)
+            if len(removed_blobs) >= 1000:
+                MediaBlob.objects.filter(name__in=removed_blobs).delete()
+                removed_blobs = []
+
+        if removed_blobs:
+            MediaBlob.objects.filter(name__in=removed_blobs).delete()
+
+        verb = 'Would reclaim' if options['dry_run'] else ('Quarantined' if quarantine else 'Deleted')
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} file(s); {verb} {orphaned} unreferenced file(s), "
+            f"{format_bytes(reclaimable)}"
+        ))
+        self.collect_variants(referenced, cutoff, options)
+
+    def collect_variants(self, referenced, cutoff, options):
+        """Variants can be rendered again, so they are deleted even with --quarantine"""
+        live = source_digests(referenced)
+        count = size = 0
+        directories = set()
+        for path, file_size in stale_variants(live, cutoff):
+            count += 1
+            size += file_size
+            if options['verbose_list']:
+                self.stdout.write(f"  {path} ({format_bytes(file_size)})")
+            if options['dry_run']:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            directories.add(os.path.dirname(path))
+
+        root = os.path.abspath(str(cache_root()))
+        # Deepest first, so emptied digest directories free their prefix
+        for directory in sorted(directories, key=len, reverse=True):
+            while os.path.abspath(directory) != root:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} cached variant(s) of unreferenced sources, {format_bytes(size)}"
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(help_text='SHA-256 of the file content', max_length=64, unique=True)),
+                ('name', models.CharField(help_text='Storage name of the blob', max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(help_text='Size in bytes')),
+                ('ref_count', models.IntegerField(default=0, help_text='Number of model file references pointing at this blob')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class MediaBlob(models.Model):
+    """A unique piece of uploaded content, stored once under its SHA-256 digest"""
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text='SHA-256 of the file content'
+    )
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text='Storage name of the blob'
+    )
+    size = models.PositiveBigIntegerField(help_text='Size in bytes')
+    ref_count = models.IntegerField(
+        default=0,
+        help_text='Number of model file references pointing at this blob'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name
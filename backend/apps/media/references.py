@@ -0,0 +1,115 @@
+"""Reference counting for content-addressed blobs.
+
+Apps register the models whose files live in blob storage with ``track()``.
+Saves and deletes of those models then move ``MediaBlob.ref_count`` up and
+down. Writes that bypass model signals (``bulk_create``, ``update()``) must
+call ``retain()``/``release()`` themselves.
+
+Blobs whose count drops to zero are not removed here: a concurrent upload of
+the same content may be about to reuse them. They remain findable as
+``MediaBlob.objects.filter(ref_count=0)`` until deleted through the storage.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import F, FileField
+from django.db.models.signals import post_delete, post_save, pre_save
+
+
+_tracked = {}
+_sources = []
+
+
+def file_field_names(instance):
+    """Names of all files held in FileFields on ``instance``"""
+    names = set()
+    for field in instance._meta.get_fields():
+        if isinstance(field, FileField):
+            name = getattr(instance, field.attname).name
+            if name:
+                names.add(name)
+    return names
+
+
+def _adjust(names, delta):
+    """Add ``delta`` once per occurrence of each name, one UPDATE per multiplicity"""
+    from .models import MediaBlob
+    by_multiplicity = defaultdict(list)
+    for name, occurrences in Counter(name for name in names if name).items():
+        by_multiplicity[occurrences].append(name)
+    for occurrences, batch in by_multiplicity.items():
+        MediaBlob.objects.filter(name__in=batch).update(
+            ref_count=F('ref_count') + delta * occurrences
+        )
+
+
+def retain(names):
+    _adjust(names, 1)
+
+
+def release(names):
+    _adjust(names, -1)
+
+
+def replace(old_names, new_names):
+    old_names, new_names = set(old_names), set(new_names)
+    retain(new_names - old_names)
+    release(old_names - new_names)
+
+
+def _remember_names(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._media_names = set()
+        return
+    previous = sender._default_manager.filter(pk=instance.pk).first()
+    instance._media_names = _tracked[sender](previous) if previous else set()
+
+
+def _sync_names(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    names = _tracked[sender](instance)
+    replace(getattr(instance, '_media_names', set()), names)
+    instance._media_names = names
+
+
+def _release_names(sender, instance, **kwargs):
+    release(_tracked[sender](instance))
+
+
+def track(model, get_names=file_field_names):
+    """Keep blob reference counts in step with ``model``'s saves and deletes"""
+    _tracked[model] = get_names
+    uid = f"media-references-{model._meta.label_lower}"
+    pre_save.connect(_remember_names, sender=model, dispatch_uid=uid)
+    post_save.connect(_sync_names, sender=model, dispatch_uid=uid)
+    post_delete.connect(_release_names, sender=model, dispatch_uid=uid)
+
+
+def register_source(source):
+    """
+    Register a callable yielding stored names referenced outside FileFields
+    (for example derivatives listed in a JSONField).
+    """
+    if source not in _sources:
+        _sources.append(source)
+
+
+def referenced_names(chunk_size=2000):
+    """
+    Yield every stored name in use: each FileField of every installed model,
+    read with ``values_list`` in chunks, plus the registered extra sources.
+    Names may repeat.
+    """
+    from django.apps import apps
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, FileField):
+                rows = (
+                    model._default_manager.exclude(**{field.attname: ''})
+                    .exclude(**{f"{field.attname}__isnull": True})
+                    .values_list(field.attname, flat=True)
+                    .iterator(chunk_size=chunk_size)
+                )
+                yield from rows
+    for source in _sources:
+        yield from source(chunk_size)
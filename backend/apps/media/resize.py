@@ -0,0 +1,175 @@
+"""On-demand resized variants of stored images.
+
+URLs are signed so only sizes the server asked for can be produced. A variant
+is rendered on first request and kept on disk in a directory named after the
+source content digest; later requests only stat the file and let the front
+proxy send it. ``collect_media_garbage`` removes the directories of sources
+that are no longer referenced (see ``stale_variants``).
+"""
+import hashlib
+import os
+import tempfile
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.utils.crypto import constant_time_compare
+from PIL import Image, ImageOps
+
+from apps.content.images import MIME_TYPES, encode, open_upright
+
+
+FITS = ('contain', 'cover')
+SIGNING_SALT = 'apps.media.resize'
+
+
+class ResizeError(Exception):
+    pass
+
+
+def max_dimension():
+    return getattr(settings, 'MEDIA_RESIZE_MAX_DIMENSION', 3840)
+
+
+def cache_root():
+    return getattr(settings, 'MEDIA_RESIZE_CACHE_ROOT', settings.BASE_DIR / 'media_cache' / 'resize')
+
+
+def canonical(src, width, height, fit, fmt):
+    return f"{src}|{width or 0}|{height or 0}|{fit}|{fmt}"
+
+
+def sign(src, width, height, fit, fmt):
+    return signing.Signer(salt=SIGNING_SALT).signature(canonical(src, width, height, fit, fmt))
+
+
+def verify(signature, src, width, height, fit, fmt):
+    return constant_time_compare(signature or '', sign(src, width, height, fit, fmt))
+
+
+def resize_url(src, width=None, height=None, fit='contain', fmt='webp'):
+    """Relative, signed URL for a variant of the stored file ``src``"""
+    params = {'src': src, 'fit': fit, 'fmt': fmt}
+    if width:
+        params['w'] = width
+    if height:
+        params['h'] = height
+    params['sig'] = sign(src, width, height, fit, fmt)
+    return f"{settings.MEDIA_URL}resize/?{urlencode(params)}"
+
+
+def preset_url(src, preset):
+    width, height, fit, fmt = settings.MEDIA_RESIZE_PRESETS[preset]
+    return resize_url(src, width, height, fit, fmt)
+
+
+def source_digest(src, storage=default_storage):
+    """Content digest of a stored file; blob names already carry theirs"""
+    from .models import MediaBlob
+    digest = MediaBlob.objects.filter(name=src).values_list('digest', flat=True).first()
+    if digest:
+        return digest
+    return _stat_digest(src, os.stat(storage.path(src)))
+
+
+def _stat_digest(src, stat):
+    # Files stored before content addressing: key on identity and mtime
+    return hashlib.sha256(f"{src}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()
+
+
+def source_digests(names, storage=default_storage):
+    """``source_digest`` of every name in ``names`` that is still stored"""
+    from .models import MediaBlob
+    names = set(names)
+    digests = set()
+    rows = MediaBlob.objects.values_list('name', 'digest').iterator(chunk_size=2000)
+    for name, digest in rows:
+        if name in names:
+            names.discard(name)
+            digests.add(digest)
+    for name in names:
+        try:
+            digests.add(_stat_digest(name, os.stat(storage.path(name))))
+        except FileNotFoundError:
+            continue
+    return digests
+
+
+def variant_path(digest, width, height, fit, fmt):
+    return os.path.join(str(cache_root()), digest[:2], digest,
+                        f"{width or 0}x{height or 0}-{fit}.{fmt}")
+
+
+def stale_variants(live_digests, cutoff):
+    """
+    Yield ``(path, size)`` for every cached file not modified since ``cutoff``
+    whose source digest is not in ``live_digests``, including files left by
+    earlier cache layouts and interrupted renders.
+    """
+    def files(directory):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in live_digests:
+                        yield from files(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    if stat.st_mtime <= cutoff:
+                        yield entry.path, stat.st_size
+
+    root = str(cache_root())
+    try:
+        with os.scandir(root) as entries:
+            prefixes = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        return
+    for prefix in prefixes:
+        yield from files(prefix)
+
+
+def render(src, width, height, fit, fmt, storage=default_storage):
+    with storage.open(src, 'rb') as source:
+        image = open_upright(source)
+
+    if fit == 'cover' and width and height:
+        image = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    else:
+        # Fit inside the box without upscaling; a missing side is unbounded
+        image.thumbnail(
+            (width or image.width, height or image.height), Image.Resampling.LANCZOS
+        )
+    return encode(image, fmt)
+
+
+def get_variant(src, width, height, fit, fmt, storage=default_storage):
+    """Return the on-disk path of the variant, rendering it if needed"""
+    if fit not in FITS:
+        raise ResizeError(f"fit must be one of: {', '.join(FITS)}")
+    if fmt not in MIME_TYPES:
+        raise ResizeError(f"fmt must be one of: {', '.join(MIME_TYPES)}")
+    for value in (width, height):
+        if value is not None and not 0 < value <= max_dimension():
+            raise ResizeError(f"Dimensions must be between 1 and {max_dimension()}")
+    if not storage.exists(src):
+        raise FileNotFoundError(src)
+
+    path = variant_path(source_digest(src, storage), width, height, fit, fmt)
+    if os.path.exists(path):
+        return path
+
+    data = render(src, width, height, fit, fmt, storage)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.chmod(tmp_path, 0o644)
+        # Concurrent renders of the same variant simply replace each other
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
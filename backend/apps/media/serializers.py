@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+from .resize import preset_url
+
+
+class ResizedImageField(serializers.Field):
+    """
+    Read-only map of preset name to signed resize URL for an image field,
+    e.g. ``ResizedImageField(source='photo', presets=['avatar'])``.
+    """
+
+    def __init__(self, presets, **kwargs):
+        self.presets = presets
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for preset in self.presets:
+            url = preset_url(value.name, preset)
+            urls[preset] = request.build_absolute_uri(url) if request else url
+        return urls
@@ -0,0 +1,93 @@
+"""Content-addressed file storage.
+
+Uploads are hashed as they are streamed and stored once under
+``blobs/<aa>/<digest><ext>``. Saving content that is already stored only
+returns the existing name, so re-uploading the same image costs no disk
+writes. Every blob has a ``MediaBlob`` row whose reference count is kept up
+to date by ``apps.media.references``.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.storage.filesystem import safe_makedirs
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    hash_algorithm = 'sha256'
+    blob_prefix = 'blobs'
+
+    def blob_name(self, digest, ext):
+        return f"{self.blob_prefix}/{digest[:2]}/{digest}{ext}"
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(f"{self.blob_prefix}/")
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save()
+        return str(name).replace('\\', '/')
+
+    def hash_content(self, content):
+        digest = hashlib.new(self.hash_algorithm)
+        size = 0
+        for chunk in content.chunks():
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            digest.update(chunk)
+            size += len(chunk)
+        return digest.hexdigest(), size
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        digest, size = self.hash_content(content)
+        blob = MediaBlob.objects.filter(digest=digest).first()
+        if blob and self.exists(blob.name):
+            # Refresh the mtime so the garbage collector's grace period
+            # protects a blob that is being reused
+            os.utime(self.path(blob.name))
+            return blob.name
+
+        blob_name = blob.name if blob else self.blob_name(digest, os.path.splitext(name)[1].lower())
+        if not self.exists(blob_name):
+            self._write_atomic(blob_name, content)
+        MediaBlob.objects.get_or_create(
+            digest=digest,
+            defaults={'name': blob_name, 'size': size}
+        )
+        return blob_name
+
+    def _write_atomic(self, name, content):
+        """Write to a temporary file beside the target and rename it into place"""
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            safe_makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    tmp.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, name):
+        """Delete a file, unless it is a blob that is still referenced"""
+        from .models import MediaBlob
+
+        if self.is_blob(name):
+            blob = MediaBlob.objects.filter(name=name).first()
+            if blob and blob.ref_count > 0:
+                return
+            super().delete(name)
+            MediaBlob.objects.filter(name=name, ref_count__lte=0).delete()
+            return
+        super().delete(name)
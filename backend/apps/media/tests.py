@@ -0,0 +1,176 @@
+import io
+import os
+import tempfile
+from datetime import date
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from apps.content.models import Photo
+from . import references
+from .models import MediaBlob
+from .resize import get_variant
+
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue())
+
+
+def upload(color, name='photo.png'):
+    return SimpleUploadedFile(name, png(color).read(), 'image/png')
+
+
+class MediaRootTestCase(TestCase):
+    """Stores files and resized variants under a temporary directory"""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.media_root = os.path.join(root.name, 'media')
+        self.cache_root = os.path.join(root.name, 'cache')
+        paths = override_settings(MEDIA_ROOT=self.media_root, MEDIA_RESIZE_CACHE_ROOT=self.cache_root,
+                                  PHOTO_DERIVATIVE_WIDTHS=(32,), PHOTO_DERIVATIVE_FORMATS=('webp',))
+        paths.enable()
+        self.addCleanup(paths.disable)
+
+    def blob(self, name):
+        return MediaBlob.objects.get(name=name)
+
+
+class ReferenceCountTests(MediaRootTestCase):
+    def photo(self, color, name='photo.png'):
+        photo = Photo.objects.create(image=upload(color, name), date=date(2024, 5, 1))
+        photo.refresh_from_db()
+        return photo
+
+    def names(self, photo):
+        return [photo.image.name, *(d['name'] for d in photo.derivatives)]
+
+    def counts(self, photo):
+        return [self.blob(name).ref_count for name in self.names(photo)]
+
+    def test_same_content_is_stored_once(self):
+        first = default_storage.save('photos/a.png', png('red'))
+        second = default_storage.save('photos/b.png', png('red'))
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith('blobs/'))
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_duplicate_upload_and_delete(self):
+        first = self.photo('red', 'first.png')
+        self.assertEqual(self.counts(first), [1, 1])
+        second = self.photo('red', 'second.png')
+        self.assertEqual(self.names(second), self.names(first))
+        self.assertEqual(self.counts(first), [2, 2])
+
+        second.delete()
+        self.assertEqual(self.counts(first), [1, 1])
+        first.delete()
+        self.assertEqual(self.counts(first), [0, 0])
+        # Unreferenced blobs stay until collect_media_garbage removes them
+        self.assertTrue(default_storage.exists(first.image.name))
+
+    def test_replaced_image_releases_the_old_files(self):
+        photo = self.photo('red')
+        old_names = self.names(photo)
+        photo.image = upload('blue')
+        photo.save()
+        photo.refresh_from_db()
+        self.assertEqual(self.counts(photo), [1, 1])
+        self.assertEqual(self.blob(old_names[0]).ref_count, 0)
+        # The old derivative had no other user, so it was deleted at once
+        self.assertFalse(MediaBlob.objects.filter(name=old_names[1]).exists())
+        self.assertFalse(default_storage.exists(old_names[1]))
+
+    def test_referenced_blob_survives_storage_delete(self):
+        photo = self.photo('red')
+        default_storage.delete(photo.image.name)
+        self.assertTrue(default_storage.exists(photo.image.name))
+
+    def test_helpers_count_every_occurrence(self):
+        a = default_storage.save('a.png', png('red'))
+        b = default_storage.save('b.png', png('blue'))
+        references.retain([a, a, b])
+        self.assertEqual((self.blob(a).ref_count, self.blob(b).ref_count), (2, 1))
+        references.replace([a, b], [b])
+        self.assertEqual((self.blob(a).ref_count, self.blob(b).ref_count), (1, 1))
+        references.release([a, 'not-a-blob.png'])
+        self.assertEqual(self.blob(a).ref_count, 0)
+
+
+class GarbageCollectionTests(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.photo = Photo.objects.create(image=upload('red'), date=date(2024, 5, 1))
+        self.photo.refresh_from_db()
+        self.orphan = default_storage.save('photos/orphan.png', png('blue'))
+        self.stray = os.path.join(self.media_root, 'uploads', 'stray.txt')
+        os.makedirs(os.path.dirname(self.stray))
+        with open(self.stray, 'w') as stray:
+            stray.write('left behind')
+
+    def collect(self, *args):
+        out = io.StringIO()
+        call_command('collect_media_garbage', '--grace-hours', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_only_unreferenced_files(self):
+        output = self.collect()
+        self.assertIn('Deleted 2 unreferenced file(s)', output)
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertFalse(os.path.exists(self.stray))
+        self.assertFalse(MediaBlob.objects.filter(name=self.orphan).exists())
+        # The original and its derivatives, listed in a JSONField, are kept
+        for name in [self.photo.image.name, *(d['name'] for d in self.photo.derivatives)]:
+            self.assertTrue(default_storage.exists(name))
+
+    def test_grace_period_and_dry_run(self):
+        call_command('collect_media_garbage', stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(self.orphan))
+        self.assertIn('Would reclaim 2 unreferenced file(s)', self.collect('--dry-run'))
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_quarantine_keeps_relative_paths(self):
+        with tempfile.TemporaryDirectory() as quarantine:
+            self.collect('--quarantine', quarantine)
+            self.assertTrue(os.path.exists(os.path.join(quarantine, self.orphan)))
+            self.assertTrue(os.path.exists(os.path.join(quarantine, 'uploads', 'stray.txt')))
+        self.assertFalse(default_storage.exists(self.orphan))
+        with self.assertRaises(CommandError):
+            self.collect('--quarantine', os.path.join(self.media_root, 'quarantine'))
+
+
+class ResizeCacheCollectionTests(MediaRootTestCase):
+
+    def photo(self, color):
+        name = default_storage.save('photos/image.png', png(color))
+        return Photo.objects.create(image=name, date=date(2024, 5, 1), year=2024)
+
+    def collect(self, *args):
+        call_command('collect_media_garbage', '--grace-hours', '0', *args, stdout=io.StringIO())
+
+    def test_variants_of_deleted_sources_are_removed(self):
+        kept, deleted = self.photo('red'), self.photo('blue')
+        kept_variant = get_variant(kept.image.name, 32, None, 'contain', 'webp')
+        deleted_variant = get_variant(deleted.image.name, 32, None, 'contain', 'webp')
+        legacy = os.path.join(self.cache_root, 'ab', 'abcdef.webp')
+        os.makedirs(os.path.dirname(legacy), exist_ok=True)
+        with open(legacy, 'wb') as stale:
+            stale.write(b'old layout')
+        deleted.delete()
+
+        self.collect('--dry-run')
+        self.assertTrue(os.path.exists(deleted_variant))
+
+        self.collect()
+        self.assertTrue(os.path.exists(kept_variant))
+        self.assertFalse(os.path.exists(deleted_variant))
+        self.assertFalse(os.path.exists(os.path.dirname(deleted_variant)))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(get_variant(kept.image.name, 32, None, 'contain', 'webp'), kept_variant)
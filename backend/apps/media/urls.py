@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import resize
+
+app_name = 'media'
+
+urlpatterns = [
+    path('resize/', resize, name='resize'),
+]
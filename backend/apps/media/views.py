@@ -0,0 +1,58 @@
+import os
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .resize import MIME_TYPES, ResizeError, cache_root, get_variant, verify
+
+
+def _int_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    return int(value)
+
+
+@require_GET
+def resize(request):
+    """
+    Serve a signed, resized variant of a stored image.
+
+    The variant is rendered once and cached on disk. With
+    ``MEDIA_RESIZE_SENDFILE`` set to ``'x-accel'`` or ``'x-sendfile'`` the bytes
+    are handed to the front proxy instead of being streamed through Python.
+    """
+    src = request.GET.get('src', '')
+    fit = request.GET.get('fit', 'contain')
+    fmt = request.GET.get('fmt', 'webp')
+    try:
+        width = _int_param(request, 'w')
+        height = _int_param(request, 'h')
+    except ValueError:
+        return HttpResponseBadRequest('Invalid dimensions')
+
+    if not src or not verify(request.GET.get('sig'), src, width, height, fit, fmt):
+        return HttpResponseForbidden('Invalid signature')
+
+    try:
+        path = get_variant(src, width, height, fit, fmt)
+    except ResizeError as e:
+        return HttpResponseBadRequest(str(e))
+    except FileNotFoundError:
+        raise Http404('Image not found')
+
+    mode = getattr(settings, 'MEDIA_RESIZE_SENDFILE', None)
+    if mode == 'x-accel':
+        response = HttpResponse(content_type=MIME_TYPES[fmt])
+        relative = os.path.relpath(path, cache_root()).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = f"{settings.MEDIA_RESIZE_ACCEL_PREFIX}{relative}"
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type=MIME_TYPES[fmt])
+        response['X-Sendfile'] = path
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=MIME_TYPES[fmt])
+
+    # Signed parameters plus a content-addressed source make variants immutable
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
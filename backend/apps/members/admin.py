@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Member, Family, FamilyMember
+from .models import Member, Family, FamilyMember, MembershipSnapshot
 
 
 @admin.register(Member)
@@ -115,3 +115,20 @@ class FamilyMemberAdmin(admin.ModelAdmin):
         if request.user.is_superuser:
             return True
         return request.user.has_perm('members.manage_family_member')
+
+
+@admin.register(MembershipSnapshot)
+class MembershipSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['date', 'members', 'staff_members', 'families', 'zones', 'service_divisions']
+    date_hierarchy = 'date'
+
+    def has_view_permission(self, request, obj=None):
+        if request.user.is_superuser:
+            return True
+        return request.user.has_perm('accounts.view_dashboard')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.members.snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Record today's membership counts for the growth charts. "
+        'Idempotent; intended to run from cron once a day, e.g. shortly before midnight'
+    )
+
+    def handle(self, *args, **options):
+        snapshot = take_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Recorded {snapshot.date}: {snapshot.members} member(s), "
+            f"{snapshot.families} famil{'y' if snapshot.families == 1 else 'ies'}, "
+            f"{snapshot.zones} zone(s)"
+        ))
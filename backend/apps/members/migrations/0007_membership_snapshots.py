@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-19 05:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0006_remove_is_active'),
+        ('structure', '0003_remove_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MembershipSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('members', models.PositiveIntegerField()),
+                ('staff_members', models.PositiveIntegerField()),
+                ('families', models.PositiveIntegerField()),
+                ('zones', models.PositiveIntegerField()),
+                ('service_divisions', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ZoneMembershipSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('zone_name', models.CharField(max_length=100)),
+                ('members', models.PositiveIntegerField()),
+                ('zone', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='membership_snapshots', to='structure.zone')),
+            ],
+            options={
+                'ordering': ['date', 'zone_name'],
+                'indexes': [models.Index(fields=['date', 'zone'], name='members_zone_snapshot_idx')],
+            },
+        ),
+    ]
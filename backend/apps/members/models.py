@@ -101,8 +101,11 @@ class Family(models.Model):
             if self.head_member:
                 return f"{self.head_member.first_name}'s family"
             
-            # Try to find father or mother
-            family_members = self.family_members.select_related('member').all()
+            # Try to find father or mother (reusing prefetched rows if any)
+            if 'family_members' in getattr(self, '_prefetched_objects_cache', {}):
+                family_members = self.family_members.all()
+            else:
+                family_members = self.family_members.select_related('member').all()
             
             for fm in family_members:
                 if fm.relationship == 'father' and fm.member:
@@ -154,3 +157,43 @@ class FamilyMember(models.Model):
 
     def __str__(self):
         return f"{self.member.full_name} - {self.get_relationship_display()} ({self.family.display_name})"
+
+
+class MembershipSnapshot(models.Model):
+    """Church-wide totals as of one day, recorded by snapshot_membership"""
+    date = models.DateField(unique=True)
+    members = models.PositiveIntegerField()
+    staff_members = models.PositiveIntegerField()
+    families = models.PositiveIntegerField()
+    zones = models.PositiveIntegerField()
+    service_divisions = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"Membership on {self.date}"
+
+
+class ZoneMembershipSnapshot(models.Model):
+    """Members of one zone as of one day; the name is kept for deleted zones"""
+    date = models.DateField()
+    zone = models.ForeignKey(
+        'structure.Zone',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='membership_snapshots'
+    )
+    zone_name = models.CharField(max_length=100)
+    members = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['date', 'zone_name']
+        indexes = [
+            models.Index(fields=['date', 'zone'], name='members_zone_snapshot_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.zone_name} on {self.date}"
@@ -0,0 +1,21 @@
+"""
+Async read endpoint for the public staff page (see apps/core/asyncviews.py).
+Only members marked both as staff and as shown on the staff page are listed,
+with their public fields.
+"""
+from django.views.decorators.http import require_GET
+
+from apps.core.asyncviews import not_found, paginate, render
+from .models import Member
+from .serializers import StaffMemberSerializer
+
+
+@require_GET
+async def public_staff(request):
+    """Query params: page, page_size (up to 100)"""
+    queryset = Member.objects.filter(is_staff_member=True, show_in_staff_page=True)
+    page = await paginate(request, queryset.order_by('last_name', 'first_name', 'pk'),
+                          StaffMemberSerializer)
+    if page is None:
+        return not_found(request, 'Invalid page.')
+    return render(request, page)
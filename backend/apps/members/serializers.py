@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Member, Family, FamilyMember
+from apps.media.serializers import ResizedImageField
 
 
 class MemberSerializer(serializers.ModelSerializer):
@@ -7,6 +8,7 @@ class MemberSerializer(serializers.ModelSerializer):
     zone_name = serializers.CharField(source='zone.name', read_only=True)
     service_division_name = serializers.CharField(source='service_division.name', read_only=True)
     age = serializers.SerializerMethodField()
+    photo_variants = ResizedImageField(source='photo', presets=['avatar', 'avatar_large'])
 
     class Meta:
         model = Member
@@ -14,7 +16,7 @@ class MemberSerializer(serializers.ModelSerializer):
             'id', 'user', 'first_name', 'father_name', 'last_name', 'full_name',
             'gender', 'date_of_birth', 'age', 'use_age_instead_of_birthdate', 'phone', 'email', 'address',
             'zone', 'zone_name', 'service_division', 'service_division_name',
-            'photo', 'is_staff_member', 'staff_title',
+            'photo', 'photo_variants', 'is_staff_member', 'staff_title',
             'staff_bio', 'show_in_staff_page', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -55,6 +57,20 @@ class MemberSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class StaffMemberSerializer(serializers.ModelSerializer):
+    """Public staff page entry: names, title, bio and photo only"""
+    full_name = serializers.ReadOnlyField()
+    photo_variants = ResizedImageField(source='photo', presets=['avatar', 'avatar_large'])
+
+    class Meta:
+        model = Member
+        fields = [
+            'id', 'first_name', 'father_name', 'last_name', 'full_name',
+            'staff_title', 'staff_bio', 'photo', 'photo_variants'
+        ]
+        read_only_fields = fields
+
+
 class FamilyMemberSerializer(serializers.ModelSerializer):
     member = MemberSerializer(read_only=True)
     member_id = serializers.PrimaryKeyRelatedField(
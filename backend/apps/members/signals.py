@@ -0,0 +1,5 @@
+from apps.media import references
+from .models import Member
+
+
+references.track(Member)
@@ -0,0 +1,128 @@
+"""Daily membership snapshots and the growth time series built from them.
+
+Membership is a level, not a flow: moves between zones and deletions change
+it without leaving a trace in ``created_at``. ``take_snapshot`` records the
+current counts once a day; ``growth_series`` reads them back over a date range,
+downsampled to weeks or months by keeping the last snapshot in each bucket.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Family, Member, MembershipSnapshot, ZoneMembershipSnapshot
+
+
+GRANULARITIES = ('day', 'week', 'month')
+UNASSIGNED = 'Unassigned'
+
+
+def take_snapshot(date=None):
+    """
+    Record today's counts. Member counts, overall and per zone, come from one
+    grouped pass over members; the families and service divisions are
+    counted together in one more query. Every zone gets a row, with 0 when it
+    has no members, so its series has no gaps. Re-running on the same day
+    replaces that day's rows, so the job is safe to retry.
+    """
+    from apps.accounts.dashboard import count_rows
+    from apps.structure.models import ServiceDivision, Zone
+    date = date or timezone.localdate()
+
+    by_zone = {
+        row['zone']: row for row in
+        Member.objects.order_by()
+        .values('zone')
+        .annotate(members=Count('id'), staff=Count('id', filter=Q(is_staff_member=True)))
+    }
+    zones = list(Zone.objects.order_by('name').values_list('id', 'name'))
+    families, service_divisions = count_rows(Family, ServiceDivision)
+    totals = {
+        'members': sum(row['members'] for row in by_zone.values()),
+        'staff_members': sum(row['staff'] for row in by_zone.values()),
+        'families': families,
+        'zones': len(zones),
+        'service_divisions': service_divisions,
+    }
+
+    rows = [
+        ZoneMembershipSnapshot(
+            date=date,
+            zone_id=zone_id,
+            zone_name=name,
+            members=by_zone[zone_id]['members'] if zone_id in by_zone else 0,
+        )
+        for zone_id, name in zones
+    ]
+    if None in by_zone:
+        rows.append(ZoneMembershipSnapshot(
+            date=date, zone_id=None, zone_name=UNASSIGNED, members=by_zone[None]['members'],
+        ))
+
+    with transaction.atomic():
+        snapshot, _ = MembershipSnapshot.objects.update_or_create(date=date, defaults=totals)
+        ZoneMembershipSnapshot.objects.filter(date=date).delete()
+        ZoneMembershipSnapshot.objects.bulk_create(rows)
+    return snapshot
+
+
+def bucket_start(date, granularity):
+    if granularity == 'week':
+        return date - timedelta(days=date.weekday())
+    if granularity == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def default_granularity(start, end):
+    days = (end - start).days
+    if days <= 92:
+        return 'day'
+    if days <= 731:
+        return 'week'
+    return 'month'
+
+
+def growth_series(start, end, granularity='day'):
+    """
+    Totals and per-zone members between ``start`` and ``end`` (inclusive),
+    one point per bucket, dated by the bucket's start and holding the values
+    of the last snapshot within it.
+    """
+    snapshots = MembershipSnapshot.objects.filter(date__range=(start, end)).order_by('date')
+    latest = {}
+    for snapshot in snapshots:
+        latest[bucket_start(snapshot.date, granularity)] = snapshot
+
+    dates = {snapshot.date: bucket for bucket, snapshot in latest.items()}
+    zones = {}
+    zone_rows = (
+        ZoneMembershipSnapshot.objects.filter(date__in=list(dates))
+        .order_by('date', 'zone_name')
+        .values_list('date', 'zone_id', 'zone_name', 'members')
+    )
+    for date, zone_id, zone_name, members in zone_rows:
+        # Follow renamed zones by id; deleted zones and "unassigned" by name
+        key = zone_id if zone_id is not None else zone_name
+        zone = zones.setdefault(key, {'zone': zone_id, 'name': zone_name, 'series': []})
+        zone['name'] = zone_name
+        zone['series'].append({'date': dates[date], 'members': members})
+
+    return {
+        'granularity': granularity,
+        'start': start,
+        'end': end,
+        'series': [
+            {
+                'date': bucket,
+                'members': snapshot.members,
+                'staff_members': snapshot.staff_members,
+                'families': snapshot.families,
+                'zones': snapshot.zones,
+                'service_divisions': snapshot.service_divisions,
+            }
+            for bucket, snapshot in latest.items()
+        ],
+        'zones': sorted(zones.values(), key=lambda zone: zone['name']),
+    }
@@ -1,3 +1,135 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import Permission, User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.structure.models import ServiceDivision, Zone
+from .models import Family, Member, MembershipSnapshot, ZoneMembershipSnapshot
+from .snapshots import UNASSIGNED, take_snapshot
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.north = Zone.objects.create(name='North')
+        self.south = Zone.objects.create(name='South')
+        ServiceDivision.objects.create(name='Choir')
+        head = Member.objects.create(first_name='Abebe', last_name='Kebede', gender='male',
+                                     zone=self.north, is_staff_member=True)
+        Member.objects.create(first_name='Almaz', last_name='Tesfaye', gender='female',
+                              zone=self.north)
+        Member.objects.create(first_name='Dawit', last_name='Girma', gender='male')
+        Family.objects.create(head_member=head)
+
+    def test_totals(self):
+        snapshot = take_snapshot()
+        self.assertEqual(
+            (snapshot.members, snapshot.staff_members, snapshot.families,
+             snapshot.zones, snapshot.service_divisions),
+            (3, 1, 1, 2, 1),
+        )
+
+    def test_every_zone_gets_a_row(self):
+        snapshot = take_snapshot()
+        rows = ZoneMembershipSnapshot.objects.filter(date=snapshot.date)
+        self.assertEqual(
+            sorted(rows.values_list('zone_name', 'members')),
+            [('North', 2), ('South', 0), (UNASSIGNED, 1)],
+        )
+
+    def test_reads_in_three_queries(self):
+        # Members grouped by zone, the zones, then families and divisions together
+        with CaptureQueriesContext(connection) as queries:
+            take_snapshot()
+        reads = [q['sql'] for q in queries.captured_queries
+                 if q['sql'].startswith('SELECT') and 'snapshot' not in q['sql']]
+        self.assertEqual(len(reads), 3)
+
+    def test_rerun_replaces_the_day(self):
+        take_snapshot()
+        snapshot = take_snapshot()
+        self.assertEqual(ZoneMembershipSnapshot.objects.filter(date=snapshot.date).count(), 3)
+
+
+class GrowthTests(TestCase):
+    url = '/api/dashboard/growth/'
+
+    def setUp(self):
+        zone = Zone.objects.create(name='North')
+        # Monday 2024-05-06 to Sunday 2024-05-19: two weeks of daily snapshots
+        for offset in range(14):
+            day = date(2024, 5, 6) + timedelta(days=offset)
+            MembershipSnapshot.objects.create(date=day, members=100 + offset, staff_members=5,
+                                              families=40, zones=1, service_divisions=2)
+            # The zone was renamed in the second week
+            ZoneMembershipSnapshot.objects.create(date=day, zone=zone, members=60 + offset,
+                                                  zone_name='North' if offset < 7 else 'Upper North')
+            ZoneMembershipSnapshot.objects.create(date=day, zone=None, zone_name=UNASSIGNED,
+                                                  members=40)
+        staff = User.objects.create_user('staff')
+        staff.user_permissions.add(Permission.objects.get(codename='view_dashboard'))
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+
+    def test_weekly_buckets_hold_the_last_snapshot(self):
+        body = self.client.get(self.url, {'start': '2024-05-06', 'end': '2024-05-19',
+                                          'granularity': 'week'}).json()
+        self.assertEqual([(p['date'], p['members']) for p in body['series']],
+                         [('2024-05-06', 106), ('2024-05-13', 113)])
+        # Renamed zones are followed by id and shown under their latest name
+        self.assertEqual(
+            [(z['name'], [(p['date'], p['members']) for p in z['series']]) for z in body['zones']],
+            [(UNASSIGNED, [('2024-05-06', 40), ('2024-05-13', 40)]),
+             ('Upper North', [('2024-05-06', 66), ('2024-05-13', 73)])],
+        )
+
+    def test_default_granularity_from_the_range(self):
+        body = self.client.get(self.url, {'start': '2024-05-10', 'end': '2024-05-12'}).json()
+        self.assertEqual(body['granularity'], 'day')
+        self.assertEqual([p['members'] for p in body['series']], [104, 105, 106])
+
+    def test_invalid_parameters(self):
+        for params in ({'start': 'May'}, {'start': '2024-05-19', 'end': '2024-05-06'},
+                       {'granularity': 'hour'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        member = APIClient()
+        member.force_authenticate(User.objects.create_user('member'))
+        self.assertEqual(member.get(self.url).status_code, 403)
+
+
+class PublicStaffTests(TestCase):
+    url = '/api/public/staff/'
+
+    def staff(self, first_name, last_name, **fields):
+        return Member.objects.create(
+            first_name=first_name, last_name=last_name, gender='M', phone='+251911000000',
+            email=f'{first_name.lower()}@example.com', address='Bole, Addis Ababa',
+            date_of_birth=date(1980, 1, 1), staff_title='Deacon', **fields,
+        )
+
+    def setUp(self):
+        self.staff('Yonas', 'Tadesse', is_staff_member=True, show_in_staff_page=True)
+        self.staff('Abel', 'Tadesse', is_staff_member=True, show_in_staff_page=True)
+        self.staff('Hidden', 'Staff', is_staff_member=True)
+        self.staff('Not', 'Staff', show_in_staff_page=True)
+
+    async def test_only_shown_staff_with_public_fields(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([row['full_name'] for row in body['results']], ['Abel Tadesse', 'Yonas Tadesse'])
+        self.assertEqual(body['results'][0]['staff_title'], 'Deacon')
+        for row in body['results']:
+            self.assertFalse({'phone', 'email', 'address', 'date_of_birth', 'age', 'user', 'zone'} & set(row))
+        self.assertNotIn('example.com', response.content.decode())
+        self.assertNotIn('+251', response.content.decode())
 
-# Create your tests here.
+    async def test_pages(self):
+        body = (await self.async_client.get(self.url, {'page_size': 1, 'page': 'last'})).json()
+        self.assertEqual((body['count'], body['results'][0]['first_name']), (2, 'Yonas'))
+        self.assertIsNone(body['next'])
+        self.assertIn('page_size=1', body['previous'])
+        self.assertEqual((await self.async_client.get(self.url, {'page': 'x'})).status_code, 404)
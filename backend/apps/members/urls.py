@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import MemberViewSet, FamilyViewSet, FamilyMemberViewSet
+from . import public_views
 
 router = DefaultRouter()
 router.register(r'members', MemberViewSet, basename='member')
@@ -11,4 +12,6 @@ app_name = 'members'
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Async read endpoint for the public staff page
+    path('public/staff/', public_views.public_staff, name='public-staff'),
 ]
@@ -2,6 +2,7 @@ from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.timing import PhaseTimingMixin
 from .models import Member, Family, FamilyMember
 from .serializers import (
     MemberSerializer, FamilySerializer, FamilyCreateSerializer,
@@ -10,10 +11,11 @@ from .serializers import (
 from .permissions import MemberPermission, FamilyPermission
 
 
-class MemberViewSet(viewsets.ModelViewSet):
+class MemberViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = Member.objects.select_related('zone', 'service_division', 'user').all()
     serializer_class = MemberSerializer
     permission_classes = [MemberPermission]
+    query_budgets = {'list': 3, 'retrieve': 2}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['zone', 'service_division', 'is_staff_member']
     search_fields = ['first_name', 'last_name', 'email', 'phone']
@@ -23,29 +25,19 @@ class MemberViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         
-        # Filter by zone if user is a zone leader
+        # Filter by zone / service division if user leads one
         if not self.request.user.is_superuser:
-            from apps.structure.models import ZoneLeader
-            try:
-                zone_leader = ZoneLeader.objects.get(member__user=self.request.user)
-                if self.request.user.has_perm('members.view_zone_members'):
-                    queryset = queryset.filter(zone=zone_leader.zone)
-            except ZoneLeader.DoesNotExist:
-                pass
-            
-            # Filter by service division if user is a service leader
-            from apps.structure.models import ServiceLeader
-            try:
-                service_leader = ServiceLeader.objects.get(member__user=self.request.user)
-                if self.request.user.has_perm('members.view_service_members'):
-                    queryset = queryset.filter(service_division=service_leader.service_division)
-            except ServiceLeader.DoesNotExist:
-                pass
+            from apps.accounts.scopes import leadership_scope
+            scope = leadership_scope(self.request.user)
+            if scope['zones'] and self.request.user.has_perm('members.view_zone_members'):
+                queryset = queryset.filter(zone__in=scope['zones'])
+            if scope['services'] and self.request.user.has_perm('members.view_service_members'):
+                queryset = queryset.filter(service_division__in=scope['services'])
         
         return queryset
 
 
-class FamilyViewSet(viewsets.ModelViewSet):
+class FamilyViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = Family.objects.prefetch_related('family_members__member').all()
     permission_classes = [FamilyPermission]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -94,7 +86,7 @@ class FamilyViewSet(viewsets.ModelViewSet):
             return Response({'status': 'member removed'})
 
 
-class FamilyMemberViewSet(viewsets.ModelViewSet):
+class FamilyMemberViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = FamilyMember.objects.select_related('family', 'member').all()
     serializer_class = FamilyMemberSerializer
     permission_classes = [FamilyPermission]
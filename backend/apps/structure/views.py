@@ -1,7 +1,10 @@
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.members.models import Member
+from apps.core.timing import PhaseTimingMixin
 from .models import Zone, ZoneGroup, ServiceDivision, ZoneLeader, ServiceLeader, BibleStudyGroup
 from .serializers import (
     ZoneSerializer, ZoneGroupSerializer, ServiceDivisionSerializer,
@@ -10,7 +13,7 @@ from .serializers import (
 from .permissions import ZonePermission, ServiceDivisionPermission
 
 
-class ZoneViewSet(viewsets.ModelViewSet):
+class ZoneViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = Zone.objects.prefetch_related('members', 'zone_groups').all()
     serializer_class = ZoneSerializer
     permission_classes = [ZonePermission]
@@ -25,13 +28,10 @@ class ZoneViewSet(viewsets.ModelViewSet):
         
         # Filter by user's zone if they are a zone leader
         if not self.request.user.is_superuser:
-            from apps.structure.models import ZoneLeader
-            try:
-                zone_leader = ZoneLeader.objects.get(member__user=self.request.user)
-                if self.request.user.has_perm('structure.view_own_zone'):
-                    queryset = queryset.filter(id=zone_leader.zone.id)
-            except ZoneLeader.DoesNotExist:
-                pass
+            from apps.accounts.scopes import leadership_scope
+            zones = leadership_scope(self.request.user)['zones']
+            if zones and self.request.user.has_perm('structure.view_own_zone'):
+                queryset = queryset.filter(id__in=zones)
         
         return queryset
 
@@ -52,10 +52,11 @@ class ZoneViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ZoneGroupViewSet(viewsets.ModelViewSet):
+class ZoneGroupViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = ZoneGroup.objects.select_related('zone').all()
     serializer_class = ZoneGroupSerializer
     permission_classes = [ZonePermission]
+    query_budgets = {'list': 2}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['zone', 'group_type']
     search_fields = ['name']
@@ -63,7 +64,7 @@ class ZoneGroupViewSet(viewsets.ModelViewSet):
     ordering = ['zone', 'group_type', 'name']
 
 
-class ServiceDivisionViewSet(viewsets.ModelViewSet):
+class ServiceDivisionViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = ServiceDivision.objects.prefetch_related('members').all()
     serializer_class = ServiceDivisionSerializer
     permission_classes = [ServiceDivisionPermission]
@@ -78,13 +79,10 @@ class ServiceDivisionViewSet(viewsets.ModelViewSet):
         
         # Filter by user's service division if they are a service leader
         if not self.request.user.is_superuser:
-            from apps.structure.models import ServiceLeader
-            try:
-                service_leader = ServiceLeader.objects.get(member__user=self.request.user)
-                if self.request.user.has_perm('structure.view_own_service_division'):
-                    queryset = queryset.filter(id=service_leader.service_division.id)
-            except ServiceLeader.DoesNotExist:
-                pass
+            from apps.accounts.scopes import leadership_scope
+            services = leadership_scope(self.request.user)['services']
+            if services and self.request.user.has_perm('structure.view_own_service_division'):
+                queryset = queryset.filter(id__in=services)
         
         return queryset
 
@@ -98,7 +96,7 @@ class ServiceDivisionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ZoneLeaderViewSet(viewsets.ModelViewSet):
+class ZoneLeaderViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = ZoneLeader.objects.select_related('zone', 'member').all()
     serializer_class = ZoneLeaderSerializer
     permission_classes = [ZonePermission]
@@ -108,7 +106,7 @@ class ZoneLeaderViewSet(viewsets.ModelViewSet):
     ordering = ['zone', 'member']
 
 
-class ServiceLeaderViewSet(viewsets.ModelViewSet):
+class ServiceLeaderViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     queryset = ServiceLeader.objects.select_related('service_division', 'member').all()
     serializer_class = ServiceLeaderSerializer
     permission_classes = [ServiceDivisionPermission]
@@ -118,10 +116,15 @@ class ServiceLeaderViewSet(viewsets.ModelViewSet):
     ordering = ['service_division', 'member']
 
 
-class BibleStudyGroupViewSet(viewsets.ModelViewSet):
-    queryset = BibleStudyGroup.objects.select_related('zone').prefetch_related('members', 'leaders').all()
+class BibleStudyGroupViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
+    # The nested MemberSerializer reads each member's zone and service division
+    queryset = BibleStudyGroup.objects.select_related('zone').prefetch_related(
+        Prefetch('members', queryset=Member.objects.select_related('zone', 'service_division')),
+        Prefetch('leaders', queryset=Member.objects.select_related('zone', 'service_division')),
+    ).all()
     serializer_class = BibleStudyGroupSerializer
     permission_classes = [ZonePermission]
+    query_budgets = {'list': 5}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['zone']
     search_fields = ['name', 'place_of_study']
@@ -3,6 +3,12 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The public read endpoints under /api/public/ are async views and the
+project's own middleware runs natively under ASGI, so those requests hold no
+worker thread while they wait on the database; Django's built-in middleware
+and the async ORM still hop to a per-request thread for their sync work.
+Everything else runs on threads, as under WSGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
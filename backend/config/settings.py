@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -46,6 +47,8 @@ INSTALLED_APPS = [
     "corsheaders",
 
     # Project apps
+    "apps.core",
+    "apps.media",
     "apps.accounts",
     "apps.members",
     "apps.structure",
@@ -53,14 +56,19 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.MetricsMiddleware',
+    'apps.core.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # After authentication, so session superusers can ask for a profile
+    'apps.core.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.core.middleware.QueryInspectionMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -99,7 +107,7 @@ DATABASES = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.accounts.authentication.DigestJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -111,6 +119,10 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    # Per client IP; logins are throttled separately (LOGIN_THROTTLE below)
+    "DEFAULT_THROTTLE_RATES": {
+        "token_refresh": "60/min",
+    },
 }
 
 # CORS settings for frontend
@@ -143,6 +155,108 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Per-request query counting, budget checks and N+1 detection
+# (see apps/core/queries.py); call sites are captured in development only
+QUERY_INSPECTION = {
+    'ENABLED': DEBUG,
+    'REPEAT_THRESHOLD': 5,
+    'CALL_SITES': DEBUG,
+}
+
+# Per-phase request timing (see apps/core/timing.py): a Server-Timing header
+# for staff and one JSON log line per request, at WARNING from SLOW_MS
+REQUEST_TIMING = {
+    'ENABLED': True,
+    'HEADER': True,
+    'SLOW_MS': 1000,
+}
+
+# Request profiling (see apps/core/profiling.py): superusers send
+# X-Profile: 1 or ?_profile=1; SAMPLE_RATE profiles a fraction of all requests
+PROFILING = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.0,
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'MAX_PROFILES': 200,
+}
+
+# Prometheus metrics at /metrics (see apps/core/metrics.py). Under a
+# multi-process server set PROMETHEUS_MULTIPROC_DIR to an empty directory
+# shared by the workers. Scrapes need the bearer TOKEN, or a REMOTE_ADDR in
+# ALLOWED_IPS. Behind a proxy on the same host (nginx) every request arrives
+# from loopback, so never list 127.0.0.1 or ::1 there; with no TOKEN and no
+# ALLOWED_IPS the endpoint refuses everyone
+METRICS = {
+    'ENABLED': True,
+    'ALLOWED_IPS': [],
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+}
+
+# Upload sizes are recorded for /metrics before the default handlers run
+FILE_UPLOAD_HANDLERS = [
+    'apps.core.metrics.UploadMetricsHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'apps': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Permission checks read a compiled per-user set cached across requests
+# (see apps/accounts/permission_cache.py)
+AUTHENTICATION_BACKENDS = ['apps.accounts.backends.CachedPermissionBackend']
+
+# Version stamps used for cache invalidation must be shared by every worker:
+# with more than one process, point this at Redis or Memcached, e.g.
+# 'django.core.cache.backends.redis.RedisCache'. Until then the permission
+# digests in access tokens are ignored and every request loads the user from
+# the database (`manage.py check --deploy` warns about it).
+CACHES = {
+    'default': {
+        # LocMemCache counting hits and misses for /metrics
+        'BACKEND': 'apps.core.metrics.LocMemCache',
+    },
+}
+
+# Upper bound (seconds) on how long a cached permission set may be served,
+# in case a version bump is missed by a worker with a process-local cache.
+# Version stamps themselves never expire; this does not apply to them
+PERMISSION_CACHE_TIMEOUT = 300
+
+# Login throttling (see apps/accounts/throttling.py): sliding windows of
+# WINDOW seconds; past the failure limits a key is blocked for
+# BACKOFF_BASE * 2**excess seconds, up to BACKOFF_MAX. Counters live in the
+# LOGIN_THROTTLE_CACHE alias, which must be shared by all workers in production.
+# Clients are identified by REMOTE_ADDR; behind reverse proxies that append to
+# X-Forwarded-For (nginx: $proxy_add_x_forwarded_for), set TRUSTED_PROXIES to
+# their number, or every client shares the proxy's address.
+LOGIN_THROTTLE_CACHE = 'default'
+LOGIN_THROTTLE = {
+    'WINDOW': 300,
+    'IP_ATTEMPTS': 60,
+    'IP_FAILURES': 20,
+    'USERNAME_FAILURES': 5,
+    'BACKOFF_BASE': 2,
+    'BACKOFF_MAX': 15 * 60,
+    'TRUSTED_PROXIES': int(os.environ.get('TRUSTED_PROXIES', 0)),
+}
+
+# Threads hashing passwords concurrently when provisioning accounts in bulk
+PASSWORD_HASH_WORKERS = 4
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -166,6 +280,38 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are stored once per unique content (see apps/media/storage.py)
+STORAGES = {
+    "default": {
+        "BACKEND": "apps.media.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# collect_media_garbage ignores files modified more recently than this
+MEDIA_GC_GRACE_HOURS = 24
+
+# On-demand image resizing (/media/resize/, see apps/media/resize.py).
+# collect_media_garbage deletes the cached variants of unreferenced images
+MEDIA_RESIZE_CACHE_ROOT = BASE_DIR / 'media_cache' / 'resize'
+MEDIA_RESIZE_MAX_DIMENSION = 3840
+# None streams through Django; 'x-accel' (nginx) or 'x-sendfile' (Apache)
+# hands the cached file to the front proxy. For nginx, map the prefix below
+# to MEDIA_RESIZE_CACHE_ROOT in an `internal` location.
+MEDIA_RESIZE_SENDFILE = None
+MEDIA_RESIZE_ACCEL_PREFIX = '/protected/resize/'
+# name: (width, height, fit, format)
+MEDIA_RESIZE_PRESETS = {
+    'hero_large': (1920, 1080, 'cover', 'webp'),
+    'hero_small': (768, 1024, 'cover', 'webp'),
+    'avatar': (160, 160, 'cover', 'webp'),
+    'avatar_large': (480, 480, 'cover', 'webp'),
+    'blog_card': (640, 360, 'cover', 'webp'),
+    'blog_cover': (1280, 720, 'cover', 'webp'),
+}
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -176,3 +322,20 @@ SIMPLE_JWT = {
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+
+# Rotated refresh tokens are revoked in apps.accounts.RevokedToken (pruned by
+# the prune_revoked_tokens command); recent revocations are remembered in
+# process to reject replays without a query, and tokens found valid are
+# trusted for NEGATIVE_TTL seconds, the delay before a revocation made by
+# another worker is seen
+TOKEN_REVOCATION_LRU_SIZE = 10000
+TOKEN_REVOCATION_NEGATIVE_TTL = 5
+
+# Photo derivatives generated on upload (see apps/content/images.py)
+PHOTO_DERIVATIVE_WIDTHS = (320, 640, 1280, 1920)
+PHOTO_DERIVATIVE_FORMATS = ('avif', 'webp')
+
+# Bulk photo uploads: worker threads per request, and room for whole albums
+# (Django rejects more than 100 files per request by default)
+PHOTO_INGEST_WORKERS = 4
+DATA_UPLOAD_MAX_NUMBER_FILES = 500
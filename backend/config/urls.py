@@ -26,6 +26,9 @@ urlpatterns = [
     path("api/", include("apps.members.urls")),    # members & families
     path("api/", include("apps.structure.urls")),  # zones, services, leaders
     path("api/", include("apps.content.urls")),    # blog, hero, social feeds
+
+    path("media/", include("apps.media.urls")),    # signed on-demand resizing
+    path("", include("apps.core.urls")),           # Prometheus metrics
 ]
 
 if settings.DEBUG:
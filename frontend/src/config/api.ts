@@ -7,6 +7,7 @@ export const API_ENDPOINTS = {
   REFRESH: '/auth/refresh/',
   CHECK_AUTH: '/auth/check/',
   DASHBOARD_STATS: '/dashboard/stats/',
+  DASHBOARD_GROWTH: '/dashboard/growth/',
   
   // Members
   MEMBERS: '/members/',
@@ -28,6 +29,12 @@ export const API_ENDPOINTS = {
   ACTIVE_HERO: '/hero-sections/active/',
   PHOTOS: '/photos/',
   
+  // Public site (async read-only endpoints)
+  PUBLIC_BLOG_POSTS: '/public/blog-posts/',
+  PUBLIC_HERO: '/public/hero/',
+  PUBLIC_PHOTOS: '/public/photos/',
+  PUBLIC_STAFF: '/public/staff/',
+  
   // Roles & Permissions
   GROUPS: '/groups/',
   PERMISSIONS: '/permissions/',
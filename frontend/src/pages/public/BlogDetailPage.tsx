@@ -22,7 +22,7 @@ const BlogDetailPage: React.FC = () => {
     setLoading(true);
     setError(null);
     try {
-      const data = await contentService.getBlogPostBySlug(slug!);
+      const data = await contentService.getPublicBlogPost(slug!);
       setPost(data);
     } catch (err: any) {
       console.error('Error fetching post:', err);
@@ -19,11 +19,11 @@ const BlogListPage: React.FC = () => {
   const fetchPosts = async () => {
     setLoading(true);
     try {
-      const params: any = { page, status: 'published' };
+      const params: any = { page };
       if (searchTerm) {
         params.search = searchTerm;
       }
-      const data = await contentService.getBlogPosts(params);
+      const data = await contentService.getPublicBlogPosts(params);
       setPosts(data.results);
       setTotalPages(Math.ceil(data.count / 20));
     } catch (error) {
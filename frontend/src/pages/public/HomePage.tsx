@@ -37,7 +37,7 @@ const HomePage: React.FC = () => {
 
   const fetchRecentPosts = async () => {
     try {
-      const data = await contentService.getBlogPosts({ page: 1, status: 'published' });
+      const data = await contentService.getPublicBlogPosts({ page: 1 });
       setRecentPosts(data.results.slice(0, 3));
     } catch (error) {
       console.error('Error fetching posts:', error);
@@ -22,14 +22,8 @@ const PhotosPage: React.FC = () => {
 
   const fetchAvailableYears = async () => {
     try {
-      const response = await contentService.getPhotos({ page_size: 1000 });
-      const years = new Set<number>();
-      response.results.forEach((photo) => {
-        if (photo.year) {
-          years.add(photo.year);
-        }
-      });
-      setAvailableYears(Array.from(years).sort((a, b) => b - a));
+      const facets = await contentService.getPhotoFacets();
+      setAvailableYears(facets.years.map((facet) => facet.year));
     } catch (error) {
       console.error('Error fetching years:', error);
     }
@@ -41,7 +35,7 @@ const PhotosPage: React.FC = () => {
       const params: any = { page };
       if (yearFilter) params.year = Number(yearFilter);
 
-      const data = await contentService.getPhotos(params);
+      const data = await contentService.getPublicPhotos(params);
       setPhotos(data.results);
       setTotalPages(Math.ceil(data.count / 20));
     } catch (error) {
@@ -131,15 +125,33 @@ const PhotosPage: React.FC = () => {
                         e.currentTarget.style.transform = 'scale(1)';
                       }}
                       >
-                        <img 
-                          src={photo.image as string} 
-                          alt="Photo" 
-                          style={{
-                            width: '100%',
-                            height: 'auto',
-                            display: 'block'
-                          }}
-                        />
+                        <picture>
+                          {photo.sources?.map((source) => (
+                            <source
+                              key={source.type}
+                              type={source.type}
+                              srcSet={source.srcset}
+                              sizes="(max-width: 600px) 100vw, 300px"
+                            />
+                          ))}
+                          <img 
+                            src={photo.image as string} 
+                            srcSet={photo.srcset || undefined}
+                            sizes="(max-width: 600px) 100vw, 300px"
+                            width={photo.width || undefined}
+                            height={photo.height || undefined}
+                            loading="lazy"
+                            decoding="async"
+                            alt="Photo" 
+                            style={{
+                              width: '100%',
+                              height: 'auto',
+                              display: 'block',
+                              backgroundImage: photo.placeholder ? `url(${photo.placeholder})` : undefined,
+                              backgroundSize: 'cover'
+                            }}
+                          />
+                        </picture>
                       </div>
                     ))}
                   </div>
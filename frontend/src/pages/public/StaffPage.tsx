@@ -26,12 +26,8 @@ const StaffPage: React.FC = () => {
   const fetchStaff = async () => {
     setLoading(true);
     try {
-      const response = await apiClient.get(API_ENDPOINTS.MEMBERS, {
-        params: {
-          is_staff_member: true,
-          show_in_staff_page: true,
-          page_size: 100,
-        },
+      const response = await apiClient.get(API_ENDPOINTS.PUBLIC_STAFF, {
+        params: { page_size: 100 },
       });
       setStaff(response.data.results || []);
     } catch (error) {
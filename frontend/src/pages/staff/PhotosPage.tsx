@@ -31,14 +31,8 @@ const PhotosPage: React.FC = () => {
 
   const fetchAvailableYears = async () => {
     try {
-      const response = await contentService.getPhotos({ page_size: 1000 });
-      const years = new Set<number>();
-      response.results.forEach((photo) => {
-        if (photo.year) {
-          years.add(photo.year);
-        }
-      });
-      setAvailableYears(Array.from(years).sort((a, b) => b - a));
+      const facets = await contentService.getPhotoFacets();
+      setAvailableYears(facets.years.map((facet) => facet.year));
     } catch (error) {
       console.error('Error fetching years:', error);
     }
@@ -51,10 +51,28 @@ export interface Photo {
   year: number;
   title?: string;
   description?: string;
+  width?: number | null;
+  height?: number | null;
+  placeholder?: string;
+  srcset?: string;
+  sources?: { type: string; srcset: string }[];
   created_at?: string;
   updated_at?: string;
 }
 
+export interface PhotoFacets {
+  total: number;
+  years: {
+    year: number;
+    count: number;
+    months?: {
+      month: number;
+      count: number;
+      dates?: { date: string; count: number }[];
+    }[];
+  }[];
+}
+
 export interface ListResponse<T> {
   count: number;
   next: string | null;
@@ -73,6 +91,19 @@ export const contentService = {
     return response.data;
   },
 
+  async getPublicBlogPosts(params?: {
+    page?: number;
+    search?: string;
+  }): Promise<ListResponse<BlogPost>> {
+    const response = await apiClient.get<ListResponse<BlogPost>>(API_ENDPOINTS.PUBLIC_BLOG_POSTS, { params });
+    return response.data;
+  },
+
+  async getPublicBlogPost(slug: string): Promise<BlogPost> {
+    const response = await apiClient.get<BlogPost>(`${API_ENDPOINTS.PUBLIC_BLOG_POSTS}${slug}/`);
+    return response.data;
+  },
+
   async getBlogPost(id: number): Promise<BlogPost> {
     const response = await apiClient.get<BlogPost>(`${API_ENDPOINTS.BLOG_POSTS}${id}/`);
     return response.data;
@@ -129,7 +160,7 @@ export const contentService = {
 
   async getActiveHero(): Promise<HeroSection | null> {
     try {
-      const response = await apiClient.get<HeroSection>(API_ENDPOINTS.ACTIVE_HERO);
+      const response = await apiClient.get<HeroSection>(API_ENDPOINTS.PUBLIC_HERO);
       return response.data;
     } catch (error: any) {
       // If 404, no active hero exists
@@ -209,6 +240,22 @@ export const contentService = {
     return response.data;
   },
 
+  async getPublicPhotos(params?: {
+    page?: number;
+    year?: number;
+  }): Promise<ListResponse<Photo>> {
+    const response = await apiClient.get<ListResponse<Photo>>(API_ENDPOINTS.PUBLIC_PHOTOS, { params });
+    return response.data;
+  },
+
+  async getPhotoFacets(params?: {
+    granularity?: 'year' | 'month' | 'date';
+    year?: number;
+  }): Promise<PhotoFacets> {
+    const response = await apiClient.get<PhotoFacets>(`${API_ENDPOINTS.PHOTOS}facets/`, { params });
+    return response.data;
+  },
+
   async getPhoto(id: number): Promise<Photo> {
     const response = await apiClient.get<Photo>(`${API_ENDPOINTS.PHOTOS}${id}/`);
     return response.data;